@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+from admin_app.models import DailyAdStats, DailyRequestStats, DailyReviewStats
+from rent.models import RentAdvertisement, RentRequest, Review
+
+
+def ads_rows():
+    return (
+        RentAdvertisement.objects.annotate(date=TruncDate("created_at"))
+        .values("date", "category_id")
+        .annotate(ads=Count("id"), approved_ads=Count("id", filter=Q(approved=True)))
+        .order_by()
+    )
+
+
+def requests_rows():
+    # Status changes are not timestamped, so accepted and closed requests
+    # are counted on the day they were sent.
+    return (
+        RentRequest.objects.annotate(date=TruncDate("created_at"))
+        .values("date", category_id=F("advertisement__category_id"))
+        .annotate(
+            sent=Count("id"),
+            accepted=Count("id", filter=Q(status="accepted")),
+            closed=Count("id", filter=Q(status="closed")),
+        )
+        .order_by()
+    )
+
+
+def reviews_rows():
+    return (
+        Review.objects.annotate(date=TruncDate("created_at"))
+        .values("date", category_id=F("advertisement__category_id"))
+        .annotate(reviews=Count("id"), rating_total=Sum("rating"))
+        .order_by()
+    )
+
+
+# Series that can be rebuilt -> (rollup model, GROUP BY query). Favorites
+# have no timestamp, so their rollup cannot be rebuilt.
+REBUILDABLE = {
+    "ads": (DailyAdStats, ads_rows),
+    "requests": (DailyRequestStats, requests_rows),
+    "reviews": (DailyReviewStats, reviews_rows),
+}
+
+
+class Command(BaseCommand):
+    """
+    Rebuild daily dashboard rollups from the source tables with one
+    GROUP BY query each. Rows written while it runs may be counted twice
+    or not at all, so run it when the site is quiet.
+    """
+    help = "Rebuild the dashboard's daily statistics."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1_000, help="Rollup rows per insert.")
+        parser.add_argument(
+            "--series", nargs="+", choices=list(REBUILDABLE), default=list(REBUILDABLE),
+            help="Rollups to rebuild (default: all)."
+        )
+
+    def handle(self, *args, **options):
+        for series in options["series"]:
+            model, rows = REBUILDABLE[series]
+            with transaction.atomic():
+                model.objects.all().delete()
+                created = model.objects.bulk_create(
+                    [model(**row) for row in rows().iterator()],
+                    batch_size=options["batch_size"],
+                )
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(created)} daily {series} rows."))
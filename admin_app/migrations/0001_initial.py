@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_ad_stats(apps, schema_editor):
+    RentAdvertisement = apps.get_model('rent', 'RentAdvertisement')
+    DailyAdStats = apps.get_model('admin_app', 'DailyAdStats')
+    rows = (
+        RentAdvertisement.objects.annotate(date=TruncDate('created_at'))
+        .values('date', 'category_id')
+        .annotate(ads=Count('id'), approved_ads=Count('id', filter=Q(approved=True)))
+        .order_by()
+    )
+    DailyAdStats.objects.bulk_create(
+        [DailyAdStats(**row) for row in rows.iterator()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('rent', '0008_advertisementimage_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAdStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Local date the counted events belong to.')),
+                ('ads', models.IntegerField(default=0, help_text='Number of advertisements created on this date.')),
+                ('approved_ads', models.IntegerField(default=0, help_text='How many of those advertisements are approved.')),
+                ('category', models.ForeignKey(blank=True, help_text='Category of the advertisements; empty for uncategorized ads.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='rent.category')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('date', 'category'), name='dailyadstats_date_category'), models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('date',), name='dailyadstats_date_uncat')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_ad_stats, migrations.RunPython.noop),
+    ]
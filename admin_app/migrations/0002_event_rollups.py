@@ -0,0 +1,125 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_event_rollups(apps, schema_editor):
+    # Status changes were never timestamped, so accepted and closed
+    # requests are counted on the day they were sent.
+    RentRequest = apps.get_model('rent', 'RentRequest')
+    Review = apps.get_model('rent', 'Review')
+    DailyRequestStats = apps.get_model('admin_app', 'DailyRequestStats')
+    DailyReviewStats = apps.get_model('admin_app', 'DailyReviewStats')
+    requests = (
+        RentRequest.objects.annotate(date=TruncDate('created_at'))
+        .values('date', category_id=models.F('advertisement__category_id'))
+        .annotate(
+            sent=Count('id'),
+            accepted=Count('id', filter=Q(status='accepted')),
+            closed=Count('id', filter=Q(status='closed')),
+        )
+        .order_by()
+    )
+    DailyRequestStats.objects.bulk_create(
+        [DailyRequestStats(**row) for row in requests.iterator()], batch_size=1000
+    )
+    reviews = (
+        Review.objects.annotate(date=TruncDate('created_at'))
+        .values('date', category_id=models.F('advertisement__category_id'))
+        .annotate(reviews=Count('id'), rating_total=Sum('rating'))
+        .order_by()
+    )
+    DailyReviewStats.objects.bulk_create(
+        [DailyReviewStats(**row) for row in reviews.iterator()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0001_initial'),
+        ('rent', '0008_advertisementimage_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyFavoriteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Local date the counted events belong to.')),
+                ('added', models.IntegerField(default=0, help_text='Favorites added on this date.')),
+                ('removed', models.IntegerField(default=0, help_text='Favorites removed on this date.')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRequestStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Local date the counted events belong to.')),
+                ('sent', models.IntegerField(default=0, help_text='Rent requests sent on this date.')),
+                ('accepted', models.IntegerField(default=0, help_text='Rent requests accepted on this date.')),
+                ('closed', models.IntegerField(default=0, help_text='Rent requests closed on this date.')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyReviewStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Local date the counted events belong to.')),
+                ('reviews', models.IntegerField(default=0, help_text='Reviews posted on this date.')),
+                ('rating_total', models.IntegerField(default=0, help_text='Sum of the ratings of those reviews.')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='dailyfavoritestats',
+            name='category',
+            field=models.ForeignKey(blank=True, help_text='Category of the advertisements; empty for uncategorized ads.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='rent.category'),
+        ),
+        migrations.AddField(
+            model_name='dailyrequeststats',
+            name='category',
+            field=models.ForeignKey(blank=True, help_text='Category of the advertisements; empty for uncategorized ads.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='rent.category'),
+        ),
+        migrations.AddField(
+            model_name='dailyreviewstats',
+            name='category',
+            field=models.ForeignKey(blank=True, help_text='Category of the advertisements; empty for uncategorized ads.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='rent.category'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyfavoritestats',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('date', 'category'), name='dailyfavoritestats_date_category'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyfavoritestats',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('date',), name='dailyfavoritestats_date_uncat'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrequeststats',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('date', 'category'), name='dailyrequeststats_date_category'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrequeststats',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('date',), name='dailyrequeststats_date_uncat'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyreviewstats',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('date', 'category'), name='dailyreviewstats_date_category'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyreviewstats',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('date',), name='dailyreviewstats_date_uncat'),
+        ),
+        migrations.RunPython(backfill_event_rollups, migrations.RunPython.noop),
+    ]
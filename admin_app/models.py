@@ -1,3 +1,120 @@
 from django.db import models
 
-# Create your models here.
+
+class DailyRollup(models.Model):
+    """
+    Base for per-day, per-category rollup tables read by the dashboard.
+    Rows are updated with `admin_app.rollups.increment`.
+    """
+    date = models.DateField(
+        help_text="Local date the counted events belong to."
+    )
+    category = models.ForeignKey(
+        "rent.Category",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        help_text="Category of the advertisements; empty for uncategorized ads."
+    )
+
+    class Meta:
+        abstract = True
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "category"],
+                condition=models.Q(category__isnull=False),
+                name="%(class)s_date_category",
+            ),
+            models.UniqueConstraint(
+                fields=["date"],
+                condition=models.Q(category__isnull=True),
+                name="%(class)s_date_uncat",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} / {self.category_id or '-'}"
+
+
+class DailyAdStats(DailyRollup):
+    """
+    Daily rollup of rental advertisements per category.
+
+    Ads are bucketed by the local date they were created on and the counts
+    follow their current state (deleted ads are subtracted, approval changes
+    move `approved_ads`), so summing any date range gives the same numbers
+    as counting the ads table. Kept up to date by `admin_app.signals`;
+    rebuild with `manage.py backfill_dashboard_stats`.
+    """
+    ads = models.IntegerField(
+        default=0,
+        help_text="Number of advertisements created on this date."
+    )
+    approved_ads = models.IntegerField(
+        default=0,
+        help_text="How many of those advertisements are approved."
+    )
+
+    class Meta(DailyRollup.Meta):
+        pass
+
+
+class DailyRequestStats(DailyRollup):
+    """
+    Rent request activity per day and category of the requested ad:
+    requests sent, and requests that became accepted or closed that day.
+    """
+    sent = models.IntegerField(
+        default=0,
+        help_text="Rent requests sent on this date."
+    )
+    accepted = models.IntegerField(
+        default=0,
+        help_text="Rent requests accepted on this date."
+    )
+    closed = models.IntegerField(
+        default=0,
+        help_text="Rent requests closed on this date."
+    )
+
+    class Meta(DailyRollup.Meta):
+        pass
+
+
+class DailyReviewStats(DailyRollup):
+    """
+    Reviews per day and category of the reviewed ad, with the sum of their
+    ratings for computing averages over any period. Like `DailyAdStats`,
+    reviews stay on the day they were posted and the counts follow edits
+    and deletions.
+    """
+    reviews = models.IntegerField(
+        default=0,
+        help_text="Reviews posted on this date."
+    )
+    rating_total = models.IntegerField(
+        default=0,
+        help_text="Sum of the ratings of those reviews."
+    )
+
+    class Meta(DailyRollup.Meta):
+        pass
+
+
+class DailyFavoriteStats(DailyRollup):
+    """
+    Favorites added and removed per day and category of the ad.
+    Favorites carry no timestamp, so counting starts with this table.
+    """
+    added = models.IntegerField(
+        default=0,
+        help_text="Favorites added on this date."
+    )
+    removed = models.IntegerField(
+        default=0,
+        help_text="Favorites removed on this date."
+    )
+
+    class Meta(DailyRollup.Meta):
+        pass
@@ -0,0 +1,37 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+def increment(model, keys, **deltas):
+    """
+    Add `deltas` to the counters of the rollup row identified by `keys`,
+    creating the row when it does not exist yet.
+
+    The increments are applied in SQL, so concurrent writers never lose
+    updates; a writer that loses the race to create the row retries the
+    update.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**keys).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **deltas)
+    except IntegrityError:
+        model.objects.filter(**keys).update(**updates)
+
+
+def reassign(queryset, key_fields, counters, **replacement):
+    """
+    Move the counters of the rollup rows in `queryset` onto the rows whose
+    key is the same except for `replacement`, then delete them. Used when
+    a value the rollup is keyed on (e.g. a category) is deleted.
+    """
+    for row in queryset:
+        keys = {field: getattr(row, field) for field in key_fields}
+        keys.update(replacement)
+        increment(queryset.model, keys, **{field: getattr(row, field) for field in counters})
+    queryset.delete()
@@ -0,0 +1,45 @@
+from rest_framework import serializers
+
+from admin_app.timeseries import INTERVALS, SERIES
+
+
+class DateRangeSerializer(serializers.Serializer):
+    """
+    Query parameters selecting an inclusive range of days for dashboard statistics.
+    """
+    start = serializers.DateField(
+        required=False,
+        help_text="First day to include (YYYY-MM-DD). Defaults to the first recorded day."
+    )
+    end = serializers.DateField(
+        required=False,
+        help_text="Last day to include (YYYY-MM-DD). Defaults to today."
+    )
+
+    def validate(self, attrs):
+        if "start" in attrs and "end" in attrs and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("`start` must not be after `end`.")
+        return attrs
+
+
+class TimeSeriesSerializer(DateRangeSerializer):
+    """
+    Query parameters of the dashboard time-series and its CSV export.
+    """
+    series = serializers.ChoiceField(
+        choices=list(SERIES),
+        help_text="Which activity to report: ads, requests, reviews or favorites."
+    )
+    interval = serializers.ChoiceField(
+        choices=list(INTERVALS),
+        default="day",
+        help_text="Bucket size. Weeks start on Monday; buckets are labelled with their first day."
+    )
+    category = serializers.IntegerField(
+        required=False,
+        help_text="Only count activity on advertisements in this category."
+    )
+    by_category = serializers.BooleanField(
+        default=False,
+        help_text="Split every bucket per category."
+    )
@@ -0,0 +1,202 @@
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from admin_app.models import (
+    DailyAdStats, DailyFavoriteStats, DailyRequestStats, DailyReviewStats
+)
+from admin_app.rollups import increment, reassign
+from rent.models import Category, Favorite, RentAdvertisement, RentRequest, Review
+from rent.signals import advertisements_approval_changed, rent_requests_closed
+
+
+ROLLUP_FIELDS = {"approved", "category"}
+REQUEST_STATUS_COUNTERS = {"accepted": "accepted", "closed": "closed"}
+
+
+def _bucket(created_at, category_id):
+    return {"date": timezone.localdate(created_at), "category_id": category_id}
+
+
+@receiver(pre_save, sender=RentAdvertisement)
+def remember_advertisement_state(sender, instance, update_fields=None, **kwargs):
+    """
+    Load the stored approval and category of an ad about to be updated,
+    so the rollup can be corrected once the save succeeds.
+    """
+    instance._rollup_previous = None
+    if instance._state.adding or (update_fields is not None and not ROLLUP_FIELDS & set(update_fields)):
+        return
+    instance._rollup_previous = (
+        RentAdvertisement.objects.filter(pk=instance.pk)
+        .values_list("approved", "category_id", "created_at")
+        .first()
+    )
+
+
+@receiver(post_save, sender=RentAdvertisement)
+def count_saved_advertisement(sender, instance, created, **kwargs):
+    if created:
+        increment(
+            DailyAdStats, _bucket(instance.created_at, instance.category_id),
+            ads=1, approved_ads=int(instance.approved),
+        )
+        return
+
+    previous = getattr(instance, "_rollup_previous", None)
+    if previous is None:
+        return
+    approved, category_id, created_at = previous
+    if category_id != instance.category_id:
+        increment(DailyAdStats, _bucket(created_at, category_id), ads=-1, approved_ads=-int(approved))
+        increment(
+            DailyAdStats, _bucket(created_at, instance.category_id),
+            ads=1, approved_ads=int(instance.approved),
+        )
+    elif approved != instance.approved:
+        increment(
+            DailyAdStats, _bucket(created_at, category_id),
+            approved_ads=1 if instance.approved else -1,
+        )
+
+
+@receiver(post_delete, sender=RentAdvertisement)
+def count_deleted_advertisement(sender, instance, **kwargs):
+    increment(
+        DailyAdStats, _bucket(instance.created_at, instance.category_id),
+        ads=-1, approved_ads=-int(instance.approved),
+    )
+
+
+@receiver(advertisements_approval_changed)
+def count_approval_changes(sender, ad_ids, approved, **kwargs):
+    buckets = (
+        RentAdvertisement.objects.filter(id__in=ad_ids)
+        .annotate(date=TruncDate("created_at"))
+        .values("date", "category_id")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for bucket in buckets:
+        increment(
+            DailyAdStats, {"date": bucket["date"], "category_id": bucket["category_id"]},
+            approved_ads=bucket["count"] if approved else -bucket["count"],
+        )
+
+
+def _advertisement_category(instance):
+    """
+    Category id of the advertisement a request, review or favorite belongs to.
+    """
+    if type(instance).advertisement.is_cached(instance):
+        return instance.advertisement.category_id
+    return (
+        RentAdvertisement.objects.filter(pk=instance.advertisement_id)
+        .values_list("category_id", flat=True)
+        .first()
+    )
+
+
+def _today_bucket(instance):
+    return {"date": timezone.localdate(), "category_id": _advertisement_category(instance)}
+
+
+@receiver(pre_save, sender=RentRequest)
+def remember_request_status(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_previous_status = None
+    if instance._state.adding or (update_fields is not None and "status" not in update_fields):
+        return
+    instance._rollup_previous_status = (
+        RentRequest.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=RentRequest)
+def count_request_activity(sender, instance, created, **kwargs):
+    """
+    Count a request when it is sent and again on the day it moves to
+    accepted or closed.
+    """
+    deltas = {}
+    if created:
+        deltas["sent"] = 1
+        previous = None
+    else:
+        previous = getattr(instance, "_rollup_previous_status", None)
+        if previous is None:
+            return
+    counter = REQUEST_STATUS_COUNTERS.get(instance.status)
+    if counter and previous != instance.status:
+        deltas[counter] = 1
+    if deltas:
+        increment(DailyRequestStats, _today_bucket(instance), **deltas)
+
+
+@receiver(rent_requests_closed)
+def count_closed_requests(sender, advertisement, count, **kwargs):
+    increment(
+        DailyRequestStats,
+        {"date": timezone.localdate(), "category_id": advertisement.category_id},
+        closed=count,
+    )
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_previous_rating = None
+    if instance._state.adding or (update_fields is not None and "rating" not in update_fields):
+        return
+    instance._rollup_previous_rating = (
+        Review.objects.filter(pk=instance.pk).values_list("rating", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Review)
+def count_saved_review(sender, instance, created, **kwargs):
+    # Reviews follow their current state on the day they were posted, like ads.
+    if created:
+        deltas = {"reviews": 1, "rating_total": instance.rating}
+    else:
+        previous = getattr(instance, "_rollup_previous_rating", None)
+        if previous is None or previous == instance.rating:
+            return
+        deltas = {"rating_total": instance.rating - previous}
+    increment(
+        DailyReviewStats, _bucket(instance.created_at, _advertisement_category(instance)), **deltas
+    )
+
+
+@receiver(post_delete, sender=Review)
+def count_deleted_review(sender, instance, **kwargs):
+    increment(
+        DailyReviewStats, _bucket(instance.created_at, _advertisement_category(instance)),
+        reviews=-1, rating_total=-instance.rating,
+    )
+
+
+@receiver(post_save, sender=Favorite)
+def count_added_favorite(sender, instance, created, **kwargs):
+    if created:
+        increment(DailyFavoriteStats, _today_bucket(instance), added=1)
+
+
+@receiver(post_delete, sender=Favorite)
+def count_removed_favorite(sender, instance, **kwargs):
+    increment(DailyFavoriteStats, _today_bucket(instance), removed=1)
+
+
+@receiver(pre_delete, sender=Category)
+def uncategorize_stats(sender, instance, **kwargs):
+    # Deleting a category sets its ads' category to NULL without signals.
+    for model, counters in [
+        (DailyAdStats, ["ads", "approved_ads"]),
+        (DailyRequestStats, ["sent", "accepted", "closed"]),
+        (DailyReviewStats, ["reviews", "rating_total"]),
+        (DailyFavoriteStats, ["added", "removed"]),
+    ]:
+        reassign(
+            model.objects.filter(category=instance),
+            ["date", "category_id"], counters, category_id=None,
+        )
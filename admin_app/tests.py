@@ -1,3 +1,350 @@
-from django.test import TestCase
+import csv
+from datetime import date, timedelta
+from importlib import import_module
+from io import StringIO
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Sum
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from admin_app.models import DailyAdStats, DailyFavoriteStats, DailyRequestStats, DailyReviewStats
+from rent.models import Category, Favorite, RentAdvertisement, RentRequest, Review
+from rent.services import set_advertisements_approval
+from rent.tests import create_ad
+
+
+def ad_rollup():
+    """
+    Return the ad rollup as {(date, category id): (ads, approved ads)},
+    leaving out rows whose counters dropped back to zero.
+    """
+    rows = (
+        DailyAdStats.objects.values("date", "category_id")
+        .annotate(total_ads=Sum("ads"), total_approved=Sum("approved_ads"))
+        .order_by()
+    )
+    return {
+        (row["date"], row["category_id"]): (row["total_ads"], row["total_approved"])
+        for row in rows
+        if row["total_ads"] or row["total_approved"]
+    }
+
+
+class AdRollupTests(APITestCase):
+    """
+    `DailyAdStats` follows ad changes made through saves, deletes and
+    `set_advertisements_approval`.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw12345!")
+        self.admin = User.objects.create_superuser("admin@example.com", "pw12345!")
+        self.flat = Category.objects.create(name="Flat")
+        self.house = Category.objects.create(name="House")
+        self.today = timezone.localdate()
+
+    def assertRollup(self, expected):
+        self.assertEqual(ad_rollup(), {
+            (self.today, category.pk if category else None): counts for category, counts in expected.items()
+        })
+
+    def test_create(self):
+        create_ad(self.owner, category=self.flat)
+        create_ad(self.owner, category=self.flat, approved=True)
+        create_ad(self.owner, category=None)
+        self.assertRollup({self.flat: (2, 1), None: (1, 0)})
+
+    def test_single_approve(self):
+        ad = create_ad(self.owner, category=self.flat)
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(reverse("ads-approve", kwargs={"pk": ad.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertRollup({self.flat: (1, 1)})
+
+    def test_approval_saved_on_the_model(self):
+        ad = create_ad(self.owner, category=self.flat)
+        ad.approved = True
+        ad.save()
+        self.assertRollup({self.flat: (1, 1)})
+        ad.approved = False
+        ad.save(update_fields=["approved"])
+        self.assertRollup({self.flat: (1, 0)})
+
+    def test_bulk_approve_and_reject(self):
+        flats = [create_ad(self.owner, category=self.flat) for _ in range(2)]
+        house = create_ad(self.owner, category=self.house, approved=True)
+        set_advertisements_approval([ad.pk for ad in flats] + [house.pk], approved=True)
+        self.assertRollup({self.flat: (2, 2), self.house: (1, 1)})
+        set_advertisements_approval([flats[0].pk, house.pk], approved=False)
+        self.assertRollup({self.flat: (2, 1), self.house: (1, 0)})
+
+    def test_category_change(self):
+        ad = create_ad(self.owner, category=self.flat, approved=True)
+        create_ad(self.owner, category=self.flat)
+        ad.category = self.house
+        ad.save()
+        self.assertRollup({self.flat: (1, 0), self.house: (1, 1)})
+
+    def test_delete(self):
+        ad = create_ad(self.owner, category=self.flat, approved=True)
+        create_ad(self.owner, category=self.flat)
+        ad.delete()
+        self.assertRollup({self.flat: (1, 0)})
+
+    def test_category_delete(self):
+        create_ad(self.owner, category=self.flat, approved=True)
+        create_ad(self.owner, category=None)
+        self.flat.delete()
+        self.assertRollup({None: (2, 1)})
+
+    def test_rollup_is_bucketed_by_creation_date(self):
+        ad = create_ad(self.owner, category=self.flat)
+        # Moved to another day without signals, then approved.
+        earlier = ad.created_at - timedelta(days=3)
+        RentAdvertisement.objects.filter(pk=ad.pk).update(created_at=earlier)
+        DailyAdStats.objects.update(date=timezone.localdate(earlier))
+        set_advertisements_approval([ad.pk], approved=True)
+        ad.refresh_from_db()
+        ad.delete()
+        self.assertEqual(ad_rollup(), {})
+
+    def test_dashboard_totals(self):
+        approved = create_ad(self.owner, category=self.flat)
+        create_ad(self.owner, category=self.house)
+        deleted = create_ad(self.owner, category=None)
+        set_advertisements_approval([approved.pk], approved=True)
+        deleted.delete()
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse("dashboard-stats-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_ads"], 2)
+        self.assertEqual(response.data["approved_ads"], 1)
+        self.assertEqual(response.data["pending_ads"], 1)
+        self.assertEqual(response.data["ads_last_7_days"], 2)
+        self.assertEqual(response.data["ads_current_month"], 2)
+        self.assertEqual(response.data["ads_last_month"], 0)
+        self.assertEqual(response.data["total_ads"], RentAdvertisement.objects.count())
+
+    def test_dashboard_is_admin_only(self):
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.get(reverse("dashboard-stats-list")).status_code, 403)
+
+
+class AdRollupBackfillTests(APITestCase):
+    """
+    The migration and `backfill_dashboard_stats` rebuild the ad rollup from
+    the ads table, bucketed by creation date.
+    """
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        flat = Category.objects.create(name="Flat")
+        ads = [
+            create_ad(owner, category=flat, approved=True),
+            create_ad(owner, category=flat),
+            create_ad(owner, category=None),
+        ]
+        self.earlier = ads[0].created_at - timedelta(days=40)
+        RentAdvertisement.objects.filter(pk=ads[0].pk).update(created_at=self.earlier)
+        today = timezone.localdate()
+        self.expected = {
+            (timezone.localdate(self.earlier), flat.pk): (1, 1),
+            (today, flat.pk): (1, 0),
+            (today, None): (1, 0),
+        }
+        # Whatever the signals recorded is thrown away by the rebuild.
+        DailyAdStats.objects.update(ads=99)
+
+    def test_migration(self):
+        DailyAdStats.objects.all().delete()
+        migration = import_module("admin_app.migrations.0001_initial")
+        migration.backfill_daily_ad_stats(apps, None)
+        self.assertEqual(ad_rollup(), self.expected)
+
+    def test_command(self):
+        call_command("backfill_dashboard_stats", "--series", "ads", stdout=StringIO())
+        self.assertEqual(ad_rollup(), self.expected)
+
+
+class TimeSeriesTests(APITestCase):
+    """
+    `/dashboard-stats/timeseries/`, `/categories/` and `/export/` over
+    rollup rows written directly.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser("admin@example.com", "pw12345!")
+        cls.flat = Category.objects.create(name="Flat")
+        cls.house = Category.objects.create(name="House")
+        DailyAdStats.objects.bulk_create([
+            DailyAdStats(date=date(2026, 3, 2), category=cls.flat, ads=2, approved_ads=1),  # Monday
+            DailyAdStats(date=date(2026, 3, 4), category=cls.house, ads=1, approved_ads=1),
+            DailyAdStats(date=date(2026, 3, 9), category=cls.flat, ads=1, approved_ads=0),  # Monday
+            DailyAdStats(date=date(2026, 4, 1), category=None, ads=3, approved_ads=0),
+        ])
+        DailyReviewStats.objects.bulk_create([
+            DailyReviewStats(date=date(2026, 3, 2), category=cls.flat, reviews=2, rating_total=9),
+            DailyReviewStats(date=date(2026, 3, 4), category=cls.house, reviews=1, rating_total=2),
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def get(self, action, **params):
+        params.setdefault("start", "2026-03-01")
+        params.setdefault("end", "2026-04-30")
+        return self.client.get(reverse(f"dashboard-stats-{action}"), params)
+
+    def buckets(self, **params):
+        response = self.get("timeseries", series="ads", **params)
+        self.assertEqual(response.status_code, 200)
+        return [
+            (bucket["period"], bucket.get("category"), bucket["ads"], bucket["approved_ads"], bucket["pending_ads"])
+            for bucket in response.data["buckets"]
+        ]
+
+    def test_day(self):
+        self.assertEqual(self.buckets(interval="day"), [
+            (date(2026, 3, 2), None, 2, 1, 1),
+            (date(2026, 3, 4), None, 1, 1, 0),
+            (date(2026, 3, 9), None, 1, 0, 1),
+            (date(2026, 4, 1), None, 3, 0, 3),
+        ])
+
+    def test_week(self):
+        self.assertEqual(self.buckets(interval="week"), [
+            (date(2026, 3, 2), None, 3, 2, 1),
+            (date(2026, 3, 9), None, 1, 0, 1),
+            (date(2026, 3, 30), None, 3, 0, 3),
+        ])
+
+    def test_month(self):
+        self.assertEqual(self.buckets(interval="month"), [
+            (date(2026, 3, 1), None, 4, 2, 2),
+            (date(2026, 4, 1), None, 3, 0, 3),
+        ])
+
+    def test_by_category(self):
+        self.assertEqual(self.buckets(interval="month", by_category=True), [
+            (date(2026, 3, 1), self.flat.pk, 3, 1, 2),
+            (date(2026, 3, 1), self.house.pk, 1, 1, 0),
+            (date(2026, 4, 1), None, 3, 0, 3),
+        ])
+
+    def test_category_and_range(self):
+        self.assertEqual(self.buckets(interval="month", category=self.flat.pk, start="2026-03-03"), [
+            (date(2026, 3, 1), None, 1, 0, 1),
+        ])
+
+    def test_end_defaults_to_today(self):
+        response = self.client.get(reverse("dashboard-stats-timeseries"), {"series": "ads"})
+        self.assertEqual(response.data["end"], timezone.localdate())
+        self.assertEqual(len(response.data["buckets"]), 4)
+
+    def test_reviews_average(self):
+        response = self.get("timeseries", series="reviews", interval="week")
+        self.assertEqual(response.data["buckets"], [{
+            "period": date(2026, 3, 2), "reviews": 3, "rating_total": 11, "average_rating": 3.67,
+        }])
+
+    def test_invalid_parameters(self):
+        for params in [
+            {},
+            {"series": "sales"},
+            {"series": "ads", "interval": "year"},
+            {"series": "ads", "start": "2026-04-01", "end": "2026-03-01"},
+            {"series": "ads", "start": "yesterday"},
+            {"series": "ads", "category": "flat"},
+        ]:
+            with self.subTest(params=params):
+                response = self.client.get(reverse("dashboard-stats-timeseries"), params)
+                self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse("dashboard-stats-categories"), {"start": "2026-04-01", "end": "2026-03-01"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_categories(self):
+        response = self.get("categories", end="2026-03-31")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["total_ads"], response.data["approved_ads"]), (4, 2))
+        self.assertEqual(response.data["categories"], [
+            {"category": self.flat.pk, "category_name": "Flat", "ads": 3, "approved_ads": 1, "pending_ads": 2},
+            {"category": self.house.pk, "category_name": "House", "ads": 1, "approved_ads": 1, "pending_ads": 0},
+        ])
+
+    def test_export(self):
+        response = self.get("export", series="ads", interval="month", by_category=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="ads-month-20260430.csv"'
+        )
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows, [
+            ["period", "category", "category_name", "ads", "approved_ads", "pending_ads"],
+            ["2026-03-01", str(self.flat.pk), "Flat", "3", "1", "2"],
+            ["2026-03-01", str(self.house.pk), "House", "1", "1", "0"],
+            ["2026-04-01", "", "", "3", "0", "3"],
+        ])
+
+    def test_export_rejects_invalid_parameters(self):
+        self.assertEqual(self.get("export", series="ads", interval="year").status_code, 400)
+
+    def test_admin_only(self):
+        user = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        self.client.force_authenticate(user)
+        self.assertEqual(self.get("timeseries", series="ads").status_code, 403)
+
+
+class ActivityRollupTests(APITestCase):
+    """
+    Request, review and favorite rollups, and their rebuild.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw12345!")
+        self.tenants = [User.objects.create_user(f"tenant{index}@example.com", "pw12345!") for index in range(2)]
+        self.flat = Category.objects.create(name="Flat")
+        self.ad = create_ad(self.owner, category=self.flat)
+        self.bucket = {"date": timezone.localdate(), "category": self.flat}
+
+    def counters(self, model, *fields):
+        return tuple(model.objects.filter(**self.bucket).values_list(*fields).get())
+
+    def test_requests(self):
+        first = RentRequest.objects.create(advertisement=self.ad, sender=self.tenants[0], status="pending")
+        RentRequest.objects.create(advertisement=self.ad, sender=self.tenants[1], status="pending")
+        first.status = "accepted"
+        first.save()
+        self.assertEqual(self.counters(DailyRequestStats, "sent", "accepted", "closed"), (2, 1, 0))
+
+    def test_reviews(self):
+        review = Review.objects.create(advertisement=self.ad, user=self.tenants[0], rating=4)
+        Review.objects.create(advertisement=self.ad, user=self.tenants[1], rating=2)
+        review.rating = 5
+        review.save()
+        self.assertEqual(self.counters(DailyReviewStats, "reviews", "rating_total"), (2, 7))
+        review.delete()
+        self.assertEqual(self.counters(DailyReviewStats, "reviews", "rating_total"), (1, 2))
+
+    def test_favorites(self):
+        favorite = Favorite.objects.create(user=self.tenants[0], advertisement=self.ad)
+        Favorite.objects.create(user=self.tenants[1], advertisement=self.ad)
+        favorite.delete()
+        self.assertEqual(self.counters(DailyFavoriteStats, "added", "removed"), (2, 1))
+
+    def test_migration_backfill(self):
+        RentRequest.objects.create(advertisement=self.ad, sender=self.tenants[0], status="accepted")
+        Review.objects.create(advertisement=self.ad, user=self.tenants[0], rating=4)
+        DailyRequestStats.objects.all().delete()
+        DailyReviewStats.objects.all().delete()
+        import_module("admin_app.migrations.0002_event_rollups").backfill_event_rollups(apps, None)
+        self.assertEqual(self.counters(DailyRequestStats, "sent", "accepted", "closed"), (1, 1, 0))
+        self.assertEqual(self.counters(DailyReviewStats, "reviews", "rating_total"), (1, 4))
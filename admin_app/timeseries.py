@@ -0,0 +1,92 @@
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from admin_app.models import DailyAdStats, DailyFavoriteStats, DailyRequestStats, DailyReviewStats
+
+
+# Series name -> (rollup model, counter fields).
+SERIES = {
+    "ads": (DailyAdStats, ["ads", "approved_ads"]),
+    "requests": (DailyRequestStats, ["sent", "accepted", "closed"]),
+    "reviews": (DailyReviewStats, ["reviews", "rating_total"]),
+    "favorites": (DailyFavoriteStats, ["added", "removed"]),
+}
+
+# Series name -> values computed from the counters of a bucket.
+DERIVED = {
+    "ads": ["pending_ads"],
+    "reviews": ["average_rating"],
+    "favorites": ["net"],
+}
+
+# Weeks start on Monday.
+INTERVALS = {
+    "day": lambda field: F(field),
+    "week": TruncWeek,
+    "month": TruncMonth,
+}
+
+
+def get_buckets(series, interval, end, start=None, category=None, by_category=False):
+    """
+    Return a values queryset of one series summed per `interval`, with a
+    `period` key (first day of the bucket) and one key per counter.
+    Buckets without activity are left out.
+
+    With `by_category` every bucket is further split per category, adding
+    `category` and `category_name` keys.
+    """
+    model, counters = SERIES[series]
+    rows = model.objects.filter(date__lte=end)
+    if start is not None:
+        rows = rows.filter(date__gte=start)
+    if category is not None:
+        rows = rows.filter(category_id=category)
+
+    rows = rows.annotate(period=INTERVALS[interval]("date"))
+    group_by = ["period"]
+    if by_category:
+        rows = rows.annotate(category_name=F("category__name"))
+        group_by += ["category", "category_name"]
+    return (
+        rows.values(*group_by)
+        .annotate(**{f"total_{counter}": Sum(counter) for counter in counters})
+        .order_by(*group_by[:2])
+    )
+
+
+def format_bucket(series, row):
+    """
+    Turn a row from `get_buckets` into the API representation, adding the
+    values derived from the counters.
+    """
+    _, counters = SERIES[series]
+    bucket = {"period": row["period"]}
+    if "category" in row:
+        bucket["category"] = row["category"]
+        bucket["category_name"] = row["category_name"]
+    for counter in counters:
+        bucket[counter] = row[f"total_{counter}"]
+
+    if series == "ads":
+        bucket["pending_ads"] = bucket["ads"] - bucket["approved_ads"]
+    elif series == "reviews":
+        bucket["average_rating"] = (
+            round(bucket["rating_total"] / bucket["reviews"], 2) if bucket["reviews"] else None
+        )
+    elif series == "favorites":
+        bucket["net"] = bucket["added"] - bucket["removed"]
+    return bucket
+
+
+def get_columns(series, by_category=False):
+    """
+    Keys of a formatted bucket, in order, for CSV headers.
+    """
+    _, counters = SERIES[series]
+    columns = ["period"]
+    if by_category:
+        columns += ["category", "category_name"]
+    columns += counters
+    columns += DERIVED.get(series, [])
+    return columns
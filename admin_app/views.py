@@ -1,15 +1,39 @@
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAdminUser
-from django.db.models import Count, Q
-from django.utils.timezone import now, timedelta
-from rent.models import RentAdvertisement
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+import csv
+
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils.timezone import localdate, timedelta
+from admin_app.models import DailyAdStats
+from admin_app.serializers import DateRangeSerializer, TimeSeriesSerializer
+from admin_app.timeseries import format_bucket, get_buckets, get_columns
+from rent.cache import get_cache_stats
+
+
+class Echo:
+    """
+    File-like object whose `write` hands the line back, so `csv.writer`
+    rows can be streamed without building the file in memory.
+    """
+
+    def write(self, value):
+        return value
 
 
 class DashboardStatsViewSet(ViewSet):
     """
     API endpoint providing admin dashboard statistics for rental advertisements.
     Only accessible to admin users.
+
+    Statistics are read from daily rollups (one row per day and category,
+    see `admin_app.models`), so they cost O(days) rather than a scan of the
+    ads, requests, reviews or favorites tables.
     """
     permission_classes = [IsAdminUser]
 
@@ -21,35 +45,146 @@ class DashboardStatsViewSet(ViewSet):
             - total_ads: Total number of ads in the system.
             - approved_ads: Ads that have been approved by admins.
             - pending_ads: Ads awaiting approval.
-            - ads_last_7_days: Ads created in the last 7 days.
+            - ads_last_7_days: Ads created in the last 7 days (today included).
             - ads_current_month: Ads created in the current month.
             - ads_last_month: Ads created in the previous month.
         """
-        today = now()
+        today = localdate()
 
         # Date ranges
-        last_7_days = today - timedelta(days=7)
-        current_month = today.month
-        current_year = today.year
-
-        # Last month calculations
-        last_month = 12 if current_month == 1 else current_month - 1
-        last_month_year = current_year - 1 if current_month == 1 else current_year
+        last_7_days = today - timedelta(days=6)
+        current_month = today.replace(day=1)
+        last_month = (current_month - timedelta(days=1)).replace(day=1)
 
         # Aggregated statistics
-        stats = RentAdvertisement.objects.aggregate(
-            total_ads=Count("id"),
-            approved_ads=Count("id", filter=Q(approved=True)),
-            pending_ads=Count("id", filter=Q(approved=False)),
-            ads_last_7_days=Count("id", filter=Q(created_at__gte=last_7_days)),
-            ads_current_month=Count(
-                "id",
-                filter=Q(created_at__year=current_year, created_at__month=current_month)
-            ),
-            ads_last_month=Count(
-                "id",
-                filter=Q(created_at__year=last_month_year, created_at__month=last_month)
+        totals = DailyAdStats.objects.aggregate(
+            total_ads=Coalesce(Sum("ads"), 0),
+            approved_ads=Coalesce(Sum("approved_ads"), 0),
+            ads_last_7_days=Coalesce(Sum("ads", filter=Q(date__gte=last_7_days)), 0),
+            ads_current_month=Coalesce(Sum("ads", filter=Q(date__gte=current_month)), 0),
+            ads_last_month=Coalesce(
+                Sum("ads", filter=Q(date__gte=last_month, date__lt=current_month)), 0
             ),
         )
 
-        return Response(stats)
+        return Response({
+            "total_ads": totals["total_ads"],
+            "approved_ads": totals["approved_ads"],
+            "pending_ads": totals["total_ads"] - totals["approved_ads"],
+            "ads_last_7_days": totals["ads_last_7_days"],
+            "ads_current_month": totals["ads_current_month"],
+            "ads_last_month": totals["ads_last_month"],
+        })
+
+    @swagger_auto_schema(
+        method='get',
+        operation_summary="Advertisement statistics per category",
+        operation_description=(
+            "Ads created in a date range (inclusive, local dates), in total and per category. "
+            "Uncategorized ads are reported with a null category."
+        ),
+        query_serializer=DateRangeSerializer,
+        responses={200: openapi.Response("Totals and per-category counts for the range")}
+    )
+    @action(detail=False, methods=['get'])
+    def categories(self, request):
+        params = DateRangeSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start = params.validated_data.get("start")
+        end = params.validated_data.get("end", localdate())
+
+        rows = DailyAdStats.objects.filter(date__lte=end)
+        if start is not None:
+            rows = rows.filter(date__gte=start)
+        rows = (
+            rows.values("category_id", "category__name")
+            .annotate(ad_count=Sum("ads"), approved_count=Sum("approved_ads"))
+            .filter(ad_count__gt=0)
+            .order_by("-ad_count", "category_id")
+        )
+
+        categories = [
+            {
+                "category": row["category_id"],
+                "category_name": row["category__name"],
+                "ads": row["ad_count"],
+                "approved_ads": row["approved_count"],
+                "pending_ads": row["ad_count"] - row["approved_count"],
+            }
+            for row in rows
+        ]
+        total_ads = sum(row["ads"] for row in categories)
+        approved_ads = sum(row["approved_ads"] for row in categories)
+        return Response({
+            "start": start,
+            "end": end,
+            "total_ads": total_ads,
+            "approved_ads": approved_ads,
+            "pending_ads": total_ads - approved_ads,
+            "categories": categories,
+        })
+
+    def get_time_series_params(self, request):
+        params = TimeSeriesSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        data.setdefault("end", localdate())
+        return data
+
+    @swagger_auto_schema(
+        method='get',
+        operation_summary="Activity time-series",
+        operation_description=(
+            "Ads, rent requests, reviews or favorites per day, week or month in a date range "
+            "(inclusive, local dates). Buckets without activity are omitted. Requests are "
+            "counted on the day they were sent, accepted and closed; reviews on the day they "
+            "were posted; favorites on the day they were added or removed."
+        ),
+        query_serializer=TimeSeriesSerializer,
+        responses={200: openapi.Response("Buckets ordered by period")}
+    )
+    @action(detail=False, methods=['get'])
+    def timeseries(self, request):
+        params = self.get_time_series_params(request)
+        buckets = get_buckets(**params)
+        return Response({
+            "series": params["series"],
+            "interval": params["interval"],
+            "start": params.get("start"),
+            "end": params["end"],
+            "buckets": [format_bucket(params["series"], row) for row in buckets],
+        })
+
+    @swagger_auto_schema(
+        method='get',
+        operation_summary="Export an activity time-series as CSV",
+        operation_description="Same parameters and rows as the time-series, streamed as a CSV file.",
+        query_serializer=TimeSeriesSerializer,
+        responses={200: openapi.Response("CSV file", schema=openapi.Schema(type=openapi.TYPE_FILE))},
+    )
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        params = self.get_time_series_params(request)
+        series = params["series"]
+        columns = get_columns(series, params["by_category"])
+        writer = csv.DictWriter(Echo(), fieldnames=columns)
+
+        def rows():
+            yield writer.writeheader()
+            for row in get_buckets(**params).iterator():
+                yield writer.writerow(format_bucket(series, row))
+
+        filename = f"{series}-{params['interval']}-{params['end']:%Y%m%d}.csv"
+        return StreamingHttpResponse(
+            rows(),
+            content_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    @action(detail=False, methods=['get'])
+    def cache(self, request):
+        """
+        Retrieve hit/miss counters of the public API response cache.
+        They are only counted when `RENT_CACHE_STATS` is on.
+        """
+        return Response(get_cache_stats(["ads", "categories"]))
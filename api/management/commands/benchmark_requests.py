@@ -0,0 +1,81 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    """
+    Send requests through the full middleware stack and report latency
+    percentiles for the current database connection settings.
+
+    Compare connection handling by running it once per configuration, e.g.
+    `CONN_MAX_AGE=0`, `CONN_MAX_AGE=60` and `DATABASE_POOL=True`, and JWT
+    user caching with `--email` and `--jwt-user-cache-timeout 0`.
+    """
+    help = "Benchmark API request throughput and latency with the configured connection reuse and JWT user caching."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths", nargs="*", default=["/api/v1/ads/", "/api/v1/categories/"],
+            help="Paths to request, in turn."
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Requests per path.")
+        parser.add_argument("--warmup", type=int, default=10, help="Untimed requests per path first.")
+        parser.add_argument("--email", help="Authenticate as this user with a JWT access token.")
+        parser.add_argument(
+            "--jwt-user-cache-timeout", type=int,
+            help="Override JWT_USER_CACHE_TIMEOUT for this run (0 disables the cache)."
+        )
+        parser.add_argument("--host", default="localhost", help="Host header; must be in ALLOWED_HOSTS.")
+        parser.add_argument(
+            "--bypass-cache", action="store_true",
+            help="Add a unique query parameter to every request so cached responses are not reused."
+        )
+
+    def handle(self, *args, **options):
+        if options["jwt_user_cache_timeout"] is not None:
+            settings.JWT_USER_CACHE_TIMEOUT = options["jwt_user_cache_timeout"]
+        database = settings.DATABASES["default"]
+        pool = database.get("OPTIONS", {}).get("pool")
+        self.stdout.write(
+            f"CONN_MAX_AGE={database.get('CONN_MAX_AGE', 0)} "
+            f"CONN_HEALTH_CHECKS={database.get('CONN_HEALTH_CHECKS', False)} pool={pool or 'off'} "
+            f"JWT_USER_CACHE_TIMEOUT={settings.JWT_USER_CACHE_TIMEOUT}"
+        )
+
+        headers = {"HTTP_HOST": options["host"]}
+        if options["email"]:
+            try:
+                user = get_user_model().objects.get(email=options["email"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user with email {options['email']}.")
+            headers["HTTP_AUTHORIZATION"] = f"{settings.SIMPLE_JWT['AUTH_HEADER_TYPES'][0]} {AccessToken.for_user(user)}"
+        # The command's own queries must not hand the first request a warm connection.
+        connections.close_all()
+
+        client = Client()
+        for path in options["paths"]:
+            for _ in range(options["warmup"]):
+                client.get(path, **headers)
+            timings = []
+            statuses = set()
+            for index in range(options["requests"]):
+                params = {"bench": index} if options["bypass_cache"] else {}
+                started = time.perf_counter()
+                response = client.get(path, params, **headers)
+                timings.append((time.perf_counter() - started) * 1000)
+                statuses.add(response.status_code)
+
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            self.stdout.write(self.style.SUCCESS(
+                f"{path}: {len(timings) / sum(timings) * 1000:.0f} req/s "
+                f"p50={statistics.median(timings):.1f}ms p95={p95:.1f}ms "
+                f"max={timings[-1]:.1f}ms status={sorted(statuses)}"
+            ))
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+from shohor_bari.docs import SCHEMA_STATIC_PATH, generate_schema
+
+
+class Command(BaseCommand):
+    """
+    Write the OpenAPI schema to the api app's static files at build time,
+    so the docs pages never generate it in production. Run `collectstatic`
+    afterwards to publish it.
+    """
+    help = "Generate the OpenAPI schema as static JSON and YAML files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output-dir", default=settings.BASE_DIR / "api" / "static",
+            help="Static files directory to write into."
+        )
+
+    def handle(self, *args, **options):
+        schema = generate_schema()
+        path = Path(options["output_dir"]) / SCHEMA_STATIC_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for codec, target in [
+            (OpenAPICodecJson, path),
+            (OpenAPICodecYaml, path.with_suffix(".yaml")),
+        ]:
+            target.write_bytes(codec(validators=[]).encode(schema))
+            self.stdout.write(self.style.SUCCESS(f"Wrote {target}"))
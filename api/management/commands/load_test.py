@@ -0,0 +1,140 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    """
+    Load-test a running server with concurrent keep-alive clients and
+    report throughput and latency percentiles per path and concurrency.
+
+    Compare the WSGI and ASGI deployments by running the project under
+    both servers, e.g. `gunicorn shohor_bari.wsgi:app` and
+    `uvicorn shohor_bari.asgi:application`, and pointing the command at
+    `/api/v1/ads/` and `/api/v1/async/ads/` on each. The async path is
+    only routed, and only loaded by default, when `RENT_ASYNC_VIEWS` is on.
+    """
+    help = "Measure throughput and tail latency of a running server under concurrent load."
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="Base URL of the server, e.g. http://127.0.0.1:8000.")
+        default_paths = ["/api/v1/ads/"]
+        if settings.RENT_ASYNC_VIEWS:
+            default_paths.append("/api/v1/async/ads/")
+        parser.add_argument(
+            "paths", nargs="*", default=default_paths,
+            help=f"Paths to load, one after the other (default: {' '.join(default_paths)})."
+        )
+        parser.add_argument(
+            "--concurrency", type=int, nargs="+", default=[1, 10, 50],
+            help="Simultaneous connections; every value is run for every path."
+        )
+        parser.add_argument("--requests", type=int, default=500, help="Requests per path and concurrency.")
+        parser.add_argument("--email", help="Authenticate as this user with a JWT access token.")
+        parser.add_argument("--timeout", type=float, default=30, help="Seconds before a request counts as failed.")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("Only plain http:// URLs are supported.")
+        headers = {"Host": url.netloc, "Accept": "application/json", "Connection": "keep-alive"}
+        if options["email"]:
+            try:
+                user = get_user_model().objects.get(email=options["email"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user with email {options['email']}.")
+            headers["Authorization"] = f"{settings.SIMPLE_JWT['AUTH_HEADER_TYPES'][0]} {AccessToken.for_user(user)}"
+
+        for path in options["paths"]:
+            for concurrency in options["concurrency"]:
+                timings, errors, elapsed = asyncio.run(self.run(
+                    url.hostname, url.port or 80, path, headers,
+                    concurrency, options["requests"], options["timeout"],
+                ))
+                self.report(path, concurrency, timings, errors, elapsed)
+
+    async def run(self, host, port, path, headers, concurrency, total, timeout):
+        request = "".join(
+            [f"GET {path} HTTP/1.1\r\n"] + [f"{name}: {value}\r\n" for name, value in headers.items()] + ["\r\n"]
+        ).encode()
+        remaining = iter(range(total))
+        timings, errors = [], {}
+
+        async def client():
+            reader = writer = None
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(host, port)
+                    writer.write(request)
+                    status, keep_alive = await asyncio.wait_for(self.read_response(reader), timeout)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as exc:
+                    errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+                    if writer is not None:
+                        writer.close()
+                    reader = writer = None
+                    continue
+                timings.append((time.perf_counter() - started) * 1000)
+                if status >= 400:
+                    errors[status] = errors.get(status, 0) + 1
+                if not keep_alive:
+                    writer.close()
+                    reader = writer = None
+            if writer is not None:
+                writer.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return timings, errors, time.perf_counter() - started
+
+    async def read_response(self, reader):
+        """
+        Read one HTTP/1.1 response and return (status, keep-alive).
+        """
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        response_headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                response_headers[name.strip().lower()] = value.strip().lower()
+
+        if response_headers.get("transfer-encoding") == "chunked":
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in response_headers:
+            await reader.readexactly(int(response_headers["content-length"]))
+        elif status not in (204, 304):
+            await reader.read()
+            return status, False
+        return status, response_headers.get("connection") != "close"
+
+    def report(self, path, concurrency, timings, errors, elapsed):
+        if not timings:
+            self.stdout.write(self.style.ERROR(f"{path} c={concurrency}: every request failed {errors}"))
+            return
+        timings.sort()
+
+        def percentile(fraction):
+            return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+        line = (
+            f"{path} c={concurrency}: {len(timings) / elapsed:.0f} req/s "
+            f"p50={statistics.median(timings):.1f}ms p95={percentile(0.95):.1f}ms "
+            f"p99={percentile(0.99):.1f}ms max={timings[-1]:.1f}ms"
+        )
+        if errors:
+            self.stdout.write(self.style.WARNING(f"{line} errors={errors}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(line))
@@ -0,0 +1,89 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Cold start of the WSGI entrypoint up to the first response, run in a fresh
+# interpreter so nothing is imported yet.
+COLD_START_SCRIPT = """
+import io, sys, time
+started = time.perf_counter()
+from shohor_bari.wsgi import app
+loaded = time.perf_counter()
+environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": sys.argv[1], "SERVER_NAME": sys.argv[2],
+    "SERVER_PORT": "80", "HTTP_HOST": sys.argv[2], "wsgi.url_scheme": "http",
+    "wsgi.input": io.BytesIO(), "HTTP_ACCEPT": "application/json",
+}
+statuses = []
+b"".join(app(environ, lambda status, headers: statuses.append(status)))
+done = time.perf_counter()
+print(f"{(loaded - started) * 1000:.1f} {(done - started) * 1000:.1f} {statuses[0]}")
+"""
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+class Command(BaseCommand):
+    """
+    Report the slowest imports on a cold start of `shohor_bari.wsgi`,
+    measured with `python -X importtime` up to the first response.
+    """
+    help = "Profile import time and time to first response of the WSGI entrypoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/v1/", help="Path of the first request.")
+        parser.add_argument("--host", default="localhost", help="Host header; must be in ALLOWED_HOSTS.")
+        parser.add_argument("--limit", type=int, default=20, help="Rows per table.")
+        parser.add_argument("--runs", type=int, default=3, help="Cold starts to time; imports come from the first.")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "shohor_bari.settings")}
+        timings = []
+        for run in range(options["runs"]):
+            command = [sys.executable]
+            if run == 0:
+                command += ["-X", "importtime"]
+            command += ["-c", COLD_START_SCRIPT, options["path"], options["host"]]
+            result = subprocess.run(command, capture_output=True, text=True, env=env)
+            if result.returncode != 0:
+                raise CommandError(result.stderr.strip().splitlines()[-1])
+            setup, first_response, status = result.stdout.split(maxsplit=2)
+            if run == 0:
+                imports = self.parse(result.stderr)
+            else:
+                timings.append((float(setup), float(first_response), status.strip()))
+
+        for setup, first_response, status in timings:
+            self.stdout.write(
+                f"wsgi import {setup}ms, first response {first_response}ms ({status})"
+            )
+
+        packages = defaultdict(int)
+        for module, self_us, _, _ in imports:
+            packages[module.split(".")[0]] += self_us
+        self.stdout.write(self.style.MIGRATE_HEADING("\nSlowest packages (sum of own import time):"))
+        for package, total in sorted(packages.items(), key=lambda item: -item[1])[:options["limit"]]:
+            self.stdout.write(f"{total / 1000:9.1f}ms  {package}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nSlowest top-level imports (cumulative):"))
+        top_level = [row for row in imports if row[3] == 0]
+        for module, _, cumulative, _ in sorted(top_level, key=lambda row: -row[2])[:options["limit"]]:
+            self.stdout.write(f"{cumulative / 1000:9.1f}ms  {module}")
+
+    def parse(self, output):
+        """
+        Return (module, self µs, cumulative µs, nesting depth) rows from
+        `-X importtime` output.
+        """
+        rows = []
+        for line in output.splitlines():
+            match = IMPORT_TIME_LINE.match(line)
+            if match:
+                self_us, cumulative, indent, module = match.groups()
+                rows.append((module, int(self_us), int(cumulative), (len(indent) - 1) // 2))
+        return rows
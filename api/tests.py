@@ -1,3 +1,240 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import Http404
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import exceptions, permissions
+from rest_framework.test import APITestCase
+
+from api.management.commands.load_test import Command as LoadTestCommand
+from api.upload_handlers import StreamingImageUploadHandler
+from api.views import AsyncAPIView
+from rent.models import AdvertisementImage, Favorite, RentRequest, Review
+from rent.tests import create_ad
+from rent.views import AdvertisementImageViewSet, FavoriteViewSet, RentAdvertisementViewSet
+from users.views import UserViewSet
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class ListQueryCountTests(APITestCase):
+    """
+    Query counts of the list endpoints, measured with several rows per list
+    so an N+1 regression changes the count and fails the test.
+    """
+    rows = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.owner = User.objects.create_user("owner@example.com", "pw12345!")
+        cls.admin = User.objects.create_superuser("admin@example.com", "pw12345!")
+        cls.ad = create_ad(cls.owner)
+        for index in range(cls.rows):
+            user = User.objects.create_user(f"user{index}@example.com", "pw12345!")
+            ad = create_ad(cls.owner, title=f"Flat {index}")
+            AdvertisementImage.objects.create(advertisement=ad, image=f"ads/{ad.pk}/photo")
+            AdvertisementImage.objects.create(advertisement=cls.ad, image=f"ads/{cls.ad.pk}/photo{index}")
+            Favorite.objects.create(user=cls.owner, advertisement=ad)
+            RentRequest.objects.create(advertisement=cls.ad, sender=user, message="Is it free?")
+            Review.objects.create(advertisement=cls.ad, user=user, rating=4, comment="Nice.")
+
+    def setUp(self):
+        # Cached responses would skip the queries under test.
+        cache.clear()
+
+    def assertListQueries(self, num, url, user, **params):
+        self.client.force_authenticate(user)
+        with self.assertNumQueries(num):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_ads(self):
+        self.assertListQueries(3, reverse("ads-list"), self.owner)
+
+    def test_ads_expanded(self):
+        self.assertListQueries(3, reverse("ads-list"), self.owner, expand="category,owner")
+
+    def test_pending_ads(self):
+        self.assertListQueries(4, reverse("ads-pending"), self.admin)
+
+    def test_favorites(self):
+        self.assertListQueries(1, reverse("favorites-list"), self.owner)
+
+    def test_categories(self):
+        self.assertListQueries(1, reverse("categories-list"), self.owner)
+
+    def test_ad_reviews(self):
+        self.assertListQueries(2, reverse("ad-reviews-list", kwargs={"ad_pk": self.ad.pk}), self.owner)
+
+    def test_ad_images(self):
+        self.assertListQueries(2, reverse("ad-images-list", kwargs={"ad_pk": self.ad.pk}), self.owner)
+
+    def test_ad_requests(self):
+        self.assertListQueries(2, reverse("ad-requests-list", kwargs={"ad_pk": self.ad.pk}), self.owner)
+
+    def test_dashboard_stats(self):
+        self.assertListQueries(1, reverse("dashboard-stats-list"), self.admin)
+
+
+class RaisingView(AsyncAPIView):
+    permission_classes = [permissions.AllowAny]
+    error = None
+
+    async def get(self, request):
+        raise self.error
+
+
+class AsyncAPIViewTests(SimpleTestCase):
+    """
+    Errors of `AsyncAPIView` go through DRF's exception handler.
+    """
+
+    async def get(self, error):
+        return await RaisingView.as_view(error=error)(AsyncRequestFactory().get("/"))
+
+    async def test_django_404(self):
+        response = await self.get(Http404())
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content), {"detail": "Not found."})
+
+    async def test_throttled(self):
+        response = await self.get(exceptions.Throttled(wait=30))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+
+    async def test_not_authenticated(self):
+        response = await self.get(exceptions.NotAuthenticated())
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], 'JWT realm="api"')
+
+    async def test_other_errors_are_raised(self):
+        with self.assertRaises(ZeroDivisionError):
+            await self.get(ZeroDivisionError())
+
+
+class StreamingUploadTests(APITestCase):
+    """
+    `StreamingImageUploadHandler` guards the image endpoints only.
+    """
+
+    def test_handler_is_attached_to_image_endpoints_only(self):
+        for viewset, attached in [
+            (UserViewSet, True),
+            (RentAdvertisementViewSet, True),
+            (AdvertisementImageViewSet, True),
+            (FavoriteViewSet, False),
+        ]:
+            request = RequestFactory().post("/")
+            viewset(action_map={"post": "create"}).initialize_request(request)
+            with self.subTest(viewset=viewset.__name__):
+                self.assertEqual(isinstance(request.upload_handlers[0], StreamingImageUploadHandler), attached)
+
+    def test_profile_image_is_checked_while_streaming(self):
+        user = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        self.client.force_authenticate(user)
+        upload = SimpleUploadedFile("notes.jpg", b"not an image at all", content_type="image/jpeg")
+        response = self.client.patch(reverse("customuser-me"), {"profile_image": upload}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("notes.jpg is not a supported image", response.data["detail"])
+
+
+# Streams a 50 MB profile image from a file on disk through the profile
+# endpoint and prints the growth of the peak RSS, in KiB, while it is parsed.
+PEAK_RSS_SCRIPT = textwrap.dedent("""
+    import json, resource, sys, tempfile
+    import django
+    django.setup()
+    import PIL.Image
+    from django.contrib.auth import get_user_model
+    from django.core.handlers.wsgi import WSGIRequest
+    from rest_framework.test import force_authenticate
+    from users.validators import MAX_UPLOAD_SIZE
+    from users.views import UserViewSet
+
+    BOUNDARY = "upload-boundary"
+    view = UserViewSet.as_view({"patch": "me"})
+    user = get_user_model()(pk=1, email="owner@example.com", is_active=True)
+
+    def upload(size):
+        body = tempfile.TemporaryFile()
+        body.write((
+            f"--{BOUNDARY}\\r\\n"
+            'Content-Disposition: form-data; name="profile_image"; filename="big.jpg"\\r\\n'
+            "Content-Type: image/jpeg\\r\\n\\r\\n"
+        ).encode())
+        body.write(b"\\xff\\xd8\\xff\\xe0")
+        chunk = bytes(1024 * 1024)
+        remaining = size - 4
+        while remaining > 0:
+            body.write(chunk[:remaining])
+            remaining -= len(chunk)
+        body.write(f"\\r\\n--{BOUNDARY}--\\r\\n".encode())
+        length = body.tell()
+        body.seek(0)
+        request = WSGIRequest({
+            "REQUEST_METHOD": "PATCH",
+            "PATH_INFO": "/api/v1/auth/users/me/",
+            "SERVER_NAME": "testserver",
+            "SERVER_PORT": "80",
+            "wsgi.url_scheme": "http",
+            "wsgi.input": body,
+            "CONTENT_TYPE": f"multipart/form-data; boundary={BOUNDARY}",
+            "CONTENT_LENGTH": str(length),
+        })
+        force_authenticate(request, user=user)
+        return view(request).status_code
+
+    upload(1024)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    status = upload(MAX_UPLOAD_SIZE)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"status": status, "growth": after - before}))
+""")
+
+
+@skipUnless(resource is not None and sys.platform.startswith("linux"), "ru_maxrss is reported in KiB on Linux.")
+class UploadMemoryTests(SimpleTestCase):
+    """
+    A 50 MB upload is streamed, not held in memory.
+    """
+
+    def test_peak_rss_of_a_50_mb_upload(self):
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+        result = subprocess.run(
+            [sys.executable, "-c", PEAK_RSS_SCRIPT], env=env, capture_output=True, text=True, timeout=120,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        measured = json.loads(result.stdout.strip().splitlines()[-1])
+        # Pillow rejects the zero-filled body, after it was fully received.
+        self.assertEqual(measured["status"], 400)
+        self.assertLess(measured["growth"], 16 * 1024)
+
+
+class LoadTestCommandTests(SimpleTestCase):
+    """
+    Default paths of the `load_test` command.
+    """
+
+    def default_paths(self):
+        return LoadTestCommand().create_parser("manage.py", "load_test").parse_args(["http://127.0.0.1:8000"]).paths
+
+    @override_settings(RENT_ASYNC_VIEWS=False)
+    def test_async_path_needs_the_async_views(self):
+        self.assertEqual(self.default_paths(), ["/api/v1/ads/"])
+
+    @override_settings(RENT_ASYNC_VIEWS=True)
+    def test_async_path_is_loaded_when_routed(self):
+        self.assertEqual(self.default_paths(), ["/api/v1/ads/", "/api/v1/async/ads/"])
@@ -0,0 +1,71 @@
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+from users.validators import MAX_UPLOAD_SIZE, MAX_UPLOAD_SIZE_MB, sniff_image_format
+
+
+# Bytes needed to recognise every signature in users.validators.
+SNIFF_LENGTH = 12
+
+
+class UploadRejected(MultiPartParserError):
+    """
+    Raised while parsing when an uploaded file is refused.
+    DRF's multipart parser turns it into a 400 response.
+    """
+
+
+class StreamingImageUploadHandler(FileUploadHandler):
+    """
+    Validate uploaded files chunk by chunk, before they are buffered in
+    memory or spooled to disk by the handlers after it.
+
+    Used by the image upload endpoints (profile pictures and ad photos,
+    see `StreamingImageUploadMixin`): a file whose first bytes are not a
+    JPEG, PNG, GIF or WebP signature is rejected, as is any file that grows
+    past `MAX_UPLOAD_SIZE`. Chunks are passed through untouched, so memory
+    use stays at one chunk whatever the file size.
+    """
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        if content_length is not None and content_length > MAX_UPLOAD_SIZE:
+            self.reject("File size exceeds {limit} MB limit.")
+        self.received = 0
+        self.header = b""
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > MAX_UPLOAD_SIZE:
+            self.reject("File size exceeds {limit} MB limit.")
+        if self.header is not None:
+            self.header += raw_data[:SNIFF_LENGTH - len(self.header)]
+            if len(self.header) >= SNIFF_LENGTH:
+                self.check_header()
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.header is not None:
+            # Files shorter than SNIFF_LENGTH.
+            self.check_header()
+        return None
+
+    def check_header(self):
+        if sniff_image_format(self.header) is None:
+            self.reject("{name} is not a supported image (JPEG, PNG, GIF or WebP).")
+        self.header = None
+
+    def reject(self, message):
+        raise UploadRejected(message.format(name=self.file_name, limit=MAX_UPLOAD_SIZE_MB))
+
+
+class StreamingImageUploadMixin:
+    """
+    View mixin that puts `StreamingImageUploadHandler` in front of the
+    request's upload handlers, so multipart uploads to the view are checked
+    while they stream in. Other views keep Django's default handlers.
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers.insert(0, StreamingImageUploadHandler(request))
+        return super().initialize_request(request, *args, **kwargs)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework_nested import routers
 
@@ -10,6 +11,10 @@ from rent.views import (
     AdvertisementImageViewSet
 )
 from admin_app.views import DashboardStatsViewSet
+from notifications.streams import AdRequestStreamView, ModerationStreamView
+from notifications.views import NotificationViewSet, StreamTokenView
+from rent.async_views import AdvertisementDetailView, AdvertisementListView, CategoryListView, ReviewListView
+from users.views import UserViewSet
 
 # Main router
 router = routers.DefaultRouter()
@@ -17,6 +22,11 @@ router.register("ads", RentAdvertisementViewSet, basename="ads")
 router.register("favorites", FavoriteViewSet, basename="favorites")
 router.register("categories", CategoryViewSet, basename="categories")
 router.register("dashboard/stats", DashboardStatsViewSet, basename="dashboard-stats")
+router.register("notifications", NotificationViewSet, basename="notifications")
+
+# djoser's user endpoints, with the project's UserViewSet
+auth_router = routers.DefaultRouter()
+auth_router.register("users", UserViewSet)
 
 # Nested routes for ads
 ads_router = routers.NestedSimpleRouter(router, "ads", lookup="ad")
@@ -27,6 +37,19 @@ ads_router.register("images", AdvertisementImageViewSet, basename="ad-images")
 urlpatterns = [
     path('', include(router.urls)),
     path('', include(ads_router.urls)),
-    path('auth/', include('djoser.urls')),
+    path('auth/', include(auth_router.urls)),
     path('auth/', include('djoser.urls.jwt')),
+    # Server-Sent Events, for ASGI deployments.
+    path('stream/token/', StreamTokenView.as_view(), name='stream-token'),
+    path('stream/ads/<int:ad_pk>/requests/', AdRequestStreamView.as_view(), name='stream-ad-requests'),
+    path('stream/moderation/', ModerationStreamView.as_view(), name='stream-moderation'),
 ]
+
+if settings.RENT_ASYNC_VIEWS:
+    # Async versions of the read-heavy endpoints, for ASGI deployments.
+    urlpatterns += [
+        path('async/ads/', AdvertisementListView.as_view(), name='async-ads-list'),
+        path('async/ads/<pk>/', AdvertisementDetailView.as_view(), name='async-ads-detail'),
+        path('async/ads/<ad_pk>/reviews/', ReviewListView.as_view(), name='async-ad-reviews-list'),
+        path('async/categories/', CategoryListView.as_view(), name='async-categories-list'),
+    ]
@@ -1,3 +1,92 @@
-from django.shortcuts import render
+from django.contrib.auth.models import AnonymousUser
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-# Create your views here.
+from users.authentication import CachedJWTAuthentication
+
+
+class AsyncAPIView(View):
+    """
+    Base for async views that answer like DRF's `APIView`, which only runs
+    sync: JWT authentication is awaited, `permission_classes` are checked
+    the same way, and errors go through DRF's exception handler, so status
+    codes, bodies and the 401 challenge match the sync endpoints.
+
+    Handlers receive a DRF `Request` with `user` and `auth` already set and
+    return a `Response` or data passed through `render()`.
+    """
+    authentication_class = CachedJWTAuthentication
+    permission_classes = ()
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.authenticator = self.authentication_class()
+        self.args, self.kwargs = args, kwargs
+        self.request = request
+        try:
+            self.request = await self.initialize_request(request)
+            self.initial(self.request)
+            return await super().dispatch(self.request, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(exc)
+
+    async def initialize_request(self, request):
+        result = await self.authenticate(request)
+        request = Request(request)
+        request.user, request.auth = result if result is not None else (AnonymousUser(), None)
+        return request
+
+    async def authenticate(self, request):
+        """
+        Return a (user, auth) pair, or None for an anonymous request.
+        """
+        return await self.authenticator.aauthenticate(request)
+
+    def initial(self, request):
+        """
+        Checks run before the handler; permissions by default.
+        """
+        self.check_permissions(request)
+
+    def get_permissions(self):
+        return [permission() for permission in self.permission_classes]
+
+    def check_permissions(self, request, obj=None, view=None):
+        view = view or self
+        for permission in self.get_permissions():
+            if obj is None:
+                allowed = permission.has_permission(request, view)
+            else:
+                allowed = permission.has_object_permission(request, view, obj)
+            if not allowed:
+                if not request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(
+                    getattr(permission, "message", None), getattr(permission, "code", None)
+                )
+
+    def handle_exception(self, exc):
+        """
+        Like `APIView.handle_exception`: unauthenticated requests get a 401
+        with the authenticator's challenge, the rest is up to
+        `EXCEPTION_HANDLER`. Unhandled exceptions are re-raised.
+        """
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            exc.auth_header = self.authenticator.authenticate_header(self.request)
+        context = {"view": self, "args": self.args, "kwargs": self.kwargs, "request": self.request}
+        response = api_settings.EXCEPTION_HANDLER(exc, context)
+        if response is None:
+            raise exc
+        return self.finalize_response(response)
+
+    def finalize_response(self, response):
+        response.accepted_renderer = JSONRenderer()
+        response.accepted_media_type = JSONRenderer.media_type
+        response.renderer_context = {"view": self, "request": self.request, "response": response}
+        return response.render()
+
+    def render(self, data, status=200):
+        return self.finalize_response(Response(data, status=status))
@@ -0,0 +1,36 @@
+from django.contrib import admin
+
+from notifications.models import Event, Notification, UnreadCounter
+
+
+@admin.register(Event)
+class EventAdmin(admin.ModelAdmin):
+    """Admin configuration for the notification outbox."""
+    list_display = ('kind', 'created_at', 'dispatched_at', 'attempts', 'last_error')
+    list_filter = ('kind',)
+    ordering = ('-id',)
+    readonly_fields = ('last_error',)
+    actions = ('retry',)
+
+    @admin.action(description='Retry selected pending events')
+    def retry(self, request, queryset):
+        count = queryset.filter(dispatched_at__isnull=True).update(attempts=0, last_error='')
+        self.message_user(request, f'{count} events queued for dispatch again.')
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    """Admin configuration for in-app notifications."""
+    list_display = ('title', 'recipient', 'kind', 'read_at', 'created_at')
+    list_filter = ('kind',)
+    search_fields = ('title', 'recipient__email')
+    raw_id_fields = ('recipient',)
+    ordering = ('-created_at',)
+
+
+@admin.register(UnreadCounter)
+class UnreadCounterAdmin(admin.ModelAdmin):
+    """Admin configuration for unread notification counters (rebuilt with `dispatch_notifications --rebuild-counters`)."""
+    list_display = ('user', 'unread')
+    search_fields = ('user__email',)
+    raw_id_fields = ('user',)
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+import redis
+import redis.asyncio
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_one_of_several_workers():
+    """
+    Best guess whether this process is one of several server workers:
+    WEB_CONCURRENCY (read by uvicorn and gunicorn as the worker count) is
+    above 1, or the process was spawned by `uvicorn --workers`.
+    """
+    try:
+        if int(os.environ.get("WEB_CONCURRENCY", 1)) > 1:
+            return True
+    except ValueError:
+        pass
+    return multiprocessing.parent_process() is not None
+
+
+class InMemoryBroker:
+    """
+    Publish/subscribe inside the current process.
+
+    Enough for a single ASGI worker and for local development. With several
+    workers or servers, a message only reaches subscribers connected to the
+    process that published it; use `RedisBroker` there. A warning is logged
+    when the process looks like one of several workers.
+    """
+
+    def __init__(self, queue_size=None):
+        if is_one_of_several_workers():
+            logger.warning(
+                "InMemoryBroker is used by one of several worker processes: event streams only "
+                "get the messages published by their own worker. Set "
+                "EVENT_STREAM_BROKER=notifications.broker.RedisBroker."
+            )
+        self.queue_size = queue_size or settings.EVENT_STREAM_QUEUE_SIZE
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, channel, message):
+        # Called from sync code (request threads); subscribers live on an
+        # event loop and are handed the message thread-safely.
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    def subscribe(self, channels):
+        return InMemorySubscription(self, channels)
+
+    def _add(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+
+    def _remove(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].discard(subscription)
+                if not self._subscriptions[channel]:
+                    del self._subscriptions[channel]
+
+
+class InMemorySubscription:
+    """
+    Async context manager yielding messages published to `channels` with
+    `get()`. A subscriber that falls `queue_size` messages behind is cut
+    off (`get()` raises `SubscriptionOverflow`) instead of buffering
+    without bound.
+    """
+
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = list(channels)
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.broker.queue_size)
+        self.overflowed = False
+        self.broker._add(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.broker._remove(self)
+
+    def put(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # The subscriber's event loop is closed.
+            self.broker._remove(self)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """
+        Return the next message, or None if none arrives within `timeout` seconds.
+        """
+        if self.overflowed:
+            raise SubscriptionOverflow()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class RedisBroker:
+    """
+    Publish/subscribe through Redis (`REDIS_URL`), so every process and
+    server sees every message. Messages are sent as JSON.
+    """
+
+    def __init__(self, url=None):
+        self.url = url or settings.REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+
+    def publish(self, channel, message):
+        self.client.publish(channel, json.dumps(message, cls=DjangoJSONEncoder))
+
+    def subscribe(self, channels):
+        return RedisSubscription(self.url, channels)
+
+
+class RedisSubscription:
+    def __init__(self, url, channels):
+        self.url = url
+        self.channels = list(channels)
+
+    async def __aenter__(self):
+        self.client = redis.asyncio.Redis.from_url(self.url)
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await self.pubsub.subscribe(*self.channels)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message["data"])
+
+
+class SubscriptionOverflow(Exception):
+    """
+    The subscriber did not keep up with the messages published to it.
+    """
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """
+    Return the process-wide broker configured by `EVENT_STREAM_BROKER`.
+    """
+    return import_string(settings.EVENT_STREAM_BROKER)()
+
+
+def publish_on_commit(channel, message):
+    """
+    Publish `message` once the current transaction commits, so subscribers
+    never hear about changes that were rolled back. Broker errors are
+    logged: live updates are best-effort and must not fail the request.
+    """
+    def publish():
+        try:
+            get_broker().publish(channel, message)
+        except Exception:
+            logger.exception("Could not publish to %s", channel)
+
+    transaction.on_commit(publish)
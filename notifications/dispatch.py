@@ -0,0 +1,188 @@
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from notifications.models import Event, Notification
+from notifications.services import add_unread
+from rent.models import RentAdvertisement
+
+
+logger = logging.getLogger(__name__)
+
+
+def request_created(payload, users, ads):
+    ad = ads.get(payload["advertisement_id"])
+    sender = users.get(payload["sender_id"])
+    if ad is None or sender is None:
+        return []
+    return [Notification(
+        recipient_id=ad.owner_id,
+        kind="request_received",
+        title=f"New rent request for {ad.title}",
+        body=f'{sender.get_full_name() or "A user"} sent a rent request for "{ad.title}".',
+        data={"advertisement_id": ad.pk, "request_id": payload["request_id"]},
+    )]
+
+
+def request_accepted(payload, users, ads):
+    ad = ads.get(payload["advertisement_id"])
+    if ad is None:
+        return []
+    notifications = [Notification(
+        recipient_id=payload["sender_id"],
+        kind="request_accepted",
+        title=f"Your request for {ad.title} was accepted",
+        body=f'The owner of "{ad.title}" accepted your rent request.',
+        data={"advertisement_id": ad.pk, "request_id": payload["request_id"]},
+    )]
+    for request_id, sender_id in payload["closed"]:
+        notifications.append(Notification(
+            recipient_id=sender_id,
+            kind="request_closed",
+            title=f"Your request for {ad.title} was closed",
+            body=f'The owner of "{ad.title}" accepted another rent request.',
+            data={"advertisement_id": ad.pk, "request_id": request_id},
+        ))
+    return notifications
+
+
+# Event kind -> function(payload, users, ads) returning unsaved notifications.
+HANDLERS = {
+    "rent_request.created": request_created,
+    "rent_request.accepted": request_accepted,
+}
+
+
+def get_user_ids(payload):
+    return {payload["sender_id"], *(sender_id for _, sender_id in payload.get("closed", []))}
+
+
+def build_email(notification, user):
+    return EmailMessage(subject=notification.title, body=notification.body, to=[user.email])
+
+
+def dispatch_events(batch_size):
+    """
+    Deliver up to `batch_size` pending events, oldest first.
+
+    The inbox side of the batch is written in one transaction with a fixed
+    number of queries: users and ads are loaded in bulk, notifications are
+    inserted with one `bulk_create` and counters are bumped per distinct
+    increment. Events are locked with SKIP LOCKED, so several dispatchers
+    can run at once.
+
+    An event whose handler fails is left pending with its error recorded,
+    and skipped after `NOTIFICATION_MAX_ATTEMPTS` tries. Email is sent after
+    the inbox commits, through one connection; an event whose email cannot
+    be sent keeps its inbox notifications and gets the error recorded.
+    Returns the number of events dispatched and failed.
+    """
+    with transaction.atomic():
+        events = list(
+            Event.objects.select_for_update(skip_locked=True)
+            .filter(dispatched_at__isnull=True, attempts__lt=settings.NOTIFICATION_MAX_ATTEMPTS)
+            .order_by("id")[:batch_size]
+        )
+        if not events:
+            return 0, 0
+
+        ads = RentAdvertisement.objects.only("id", "title", "owner").in_bulk(
+            {event.payload.get("advertisement_id") for event in events}
+        )
+        user_ids = {ad.owner_id for ad in ads.values()}
+        for event in events:
+            try:
+                user_ids |= get_user_ids(event.payload)
+            except (KeyError, TypeError, ValueError):
+                pass
+        users = get_user_model().objects.only(
+            "id", "email", "first_name", "last_name", "is_active"
+        ).in_bulk(user_ids)
+
+        dispatched, failed, notifications, emails = [], [], [], []
+        for event in events:
+            try:
+                built = HANDLERS[event.kind](event.payload, users, ads)
+            except Exception as exc:
+                logger.exception("Could not dispatch notification event %s", event.pk)
+                event.attempts += 1
+                event.last_error = f"{type(exc).__name__}: {exc}"
+                failed.append(event)
+                continue
+            # Users deleted since the event was written are skipped.
+            built = [notification for notification in built if notification.recipient_id in users]
+            notifications.extend(built)
+            dispatched.append(event)
+            if settings.NOTIFICATION_EMAIL:
+                messages = []
+                for notification in built:
+                    recipient = users[notification.recipient_id]
+                    if recipient.is_active and recipient.email:
+                        messages.append(build_email(notification, recipient))
+                if messages:
+                    emails.append((event, messages))
+
+        Notification.objects.bulk_create(notifications)
+        add_unread(Counter(notification.recipient_id for notification in notifications))
+        Event.objects.filter(id__in=[event.pk for event in dispatched]).update(dispatched_at=timezone.now())
+        Event.objects.bulk_update(failed, ["attempts", "last_error"])
+
+    if emails:
+        send_event_emails(emails)
+    return len(dispatched), len(failed)
+
+
+def send_event_emails(emails):
+    """
+    Send the email of dispatched events over one connection; `emails` is a
+    list of (event, messages) pairs. A failure is recorded on its event and
+    does not stop the others; the inbox already has the notifications, so
+    the email is not retried.
+    """
+    undelivered = []
+    connection = get_connection(fail_silently=False)
+    try:
+        for event, messages in emails:
+            try:
+                connection.send_messages(messages)
+            except Exception as exc:
+                logger.exception("Could not email notification event %s", event.pk)
+                event.attempts += 1
+                event.last_error = f"Email: {type(exc).__name__}: {exc}"
+                undelivered.append(event)
+                # Reconnect for the next event.
+                connection.close()
+    finally:
+        connection.close()
+    Event.objects.bulk_update(undelivered, ["attempts", "last_error"])
+
+
+def dispatch_on_commit():
+    """
+    Dispatch pending events once the current transaction commits, when
+    `NOTIFICATION_DISPATCH_INLINE` is on. Failures are logged and leave
+    the events to the next dispatch.
+    """
+    if settings.NOTIFICATION_DISPATCH_INLINE:
+        transaction.on_commit(_dispatch_inline)
+
+
+def _dispatch_inline():
+    try:
+        dispatch_events(settings.NOTIFICATION_BATCH_SIZE)
+    except Exception:
+        logger.exception("Inline notification dispatch failed")
+
+
+def purge_dispatched_events(days):
+    """
+    Delete events dispatched more than `days` days ago; returns how many.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    return Event.objects.filter(dispatched_at__lt=cutoff).delete()[0]
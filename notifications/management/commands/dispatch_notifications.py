@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.dispatch import dispatch_events, purge_dispatched_events
+from notifications.models import Event
+from notifications.services import rebuild_unread_counters
+
+
+class Command(BaseCommand):
+    """
+    Deliver pending notification events to in-app inboxes and email, in
+    batches, until the outbox is empty.
+    """
+    help = "Dispatch rent request notifications from the event outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.NOTIFICATION_BATCH_SIZE,
+            help="Events locked and fanned out per transaction."
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep running, polling the outbox every --interval seconds when it is empty."
+        )
+        parser.add_argument("--interval", type=float, default=2, help="Seconds between polls with --loop.")
+        parser.add_argument(
+            "--rebuild-counters", action="store_true",
+            help="Recompute every unread counter from the inboxes and exit."
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild_counters"]:
+            count = rebuild_unread_counters()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt unread counters for {count} users."))
+            return
+
+        total_dispatched = total_failed = 0
+        last_purge = None
+        try:
+            while True:
+                dispatched, failed = dispatch_events(options["batch_size"])
+                total_dispatched += dispatched
+                total_failed += failed
+                if dispatched or failed:
+                    continue
+                if last_purge is None or time.monotonic() - last_purge > 3600:
+                    purge_dispatched_events(settings.NOTIFICATION_EVENT_RETENTION_DAYS)
+                    last_purge = time.monotonic()
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Dispatched {total_dispatched} events, {total_failed} failed attempts. "
+            f"{Event.objects.filter(dispatched_at__isnull=True).count()} pending."
+        ))
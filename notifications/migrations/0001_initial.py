@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0002_email_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(help_text='Owner of the inbox.', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_notifications', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.PositiveIntegerField(default=0, help_text='Unread notifications.')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('rent_request.created', 'Rent request created'), ('rent_request.accepted', 'Rent request accepted')], help_text='What happened.', max_length=50)),
+                ('payload', models.JSONField(default=dict, help_text='Ids of the objects involved; the dispatcher loads them in bulk.')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the event was written.')),
+                ('dispatched_at', models.DateTimeField(blank=True, help_text='When the event was delivered; empty while it is pending.', null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0, help_text='Failed dispatch attempts so far.')),
+                ('last_error', models.TextField(blank=True, help_text='Error of the last failed attempt.')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('dispatched_at__isnull', True)), fields=['id'], name='notifications_event_due_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('request_received', 'Request received'), ('request_accepted', 'Request accepted'), ('request_closed', 'Request closed')], help_text='Type of the notification.', max_length=30)),
+                ('title', models.CharField(help_text='One-line summary.', max_length=255)),
+                ('body', models.TextField(blank=True, help_text='Full text of the notification.')),
+                ('data', models.JSONField(blank=True, default=dict, help_text='Ids of the objects involved, e.g. advertisement_id and request_id.')),
+                ('read_at', models.DateTimeField(blank=True, help_text='When the recipient read it; empty if unread.', null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the notification was delivered.')),
+                ('recipient', models.ForeignKey(help_text='User the notification is for.', on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['recipient', '-created_at', '-id'], name='notifications_inbox_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Event(models.Model):
+    """
+    Outbox row describing something users should be told about.
+
+    Written in the same transaction as the change it describes (see
+    `notifications.signals`), so an event exists if and only if the change
+    committed. `manage.py dispatch_notifications` fans it out to inboxes
+    and email and sets `dispatched_at`.
+    """
+    KIND_CHOICES = (
+        ("rent_request.created", "Rent request created"),
+        ("rent_request.accepted", "Rent request accepted"),
+    )
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES, help_text="What happened.")
+    payload = models.JSONField(
+        default=dict,
+        help_text="Ids of the objects involved; the dispatcher loads them in bulk."
+    )
+    created_at = models.DateTimeField(default=timezone.now, help_text="When the event was written.")
+    dispatched_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the event was delivered; empty while it is pending."
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Failed dispatch attempts so far.")
+    last_error = models.TextField(blank=True, help_text="Error of the last failed attempt.")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(dispatched_at__isnull=True),
+                name="notifications_event_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk}"
+
+
+class Notification(models.Model):
+    """
+    In-app notification shown in a user's inbox.
+    """
+    KIND_CHOICES = (
+        ("request_received", "Request received"),
+        ("request_accepted", "Request accepted"),
+        ("request_closed", "Request closed"),
+    )
+
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="notifications",
+        help_text="User the notification is for."
+    )
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES, help_text="Type of the notification.")
+    title = models.CharField(max_length=255, help_text="One-line summary.")
+    body = models.TextField(blank=True, help_text="Full text of the notification.")
+    data = models.JSONField(
+        default=dict, blank=True,
+        help_text="Ids of the objects involved, e.g. advertisement_id and request_id."
+    )
+    read_at = models.DateTimeField(null=True, blank=True, help_text="When the recipient read it; empty if unread.")
+    created_at = models.DateTimeField(default=timezone.now, help_text="When the notification was delivered.")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["recipient", "-created_at", "-id"], name="notifications_inbox_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.title} -> {self.recipient_id}"
+
+
+class UnreadCounter(models.Model):
+    """
+    Number of unread notifications of a user, kept in step with the inbox
+    so the unread count is a primary-key lookup instead of a COUNT query.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="unread_notifications",
+        help_text="Owner of the inbox."
+    )
+    unread = models.PositiveIntegerField(default=0, help_text="Unread notifications.")
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread}"
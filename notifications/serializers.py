@@ -0,0 +1,29 @@
+from rest_framework import serializers
+
+from notifications.models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the notifications in a user's inbox.
+    """
+
+    class Meta:
+        model = Notification
+        fields = ["id", "kind", "title", "body", "data", "read_at", "created_at"]
+        read_only_fields = fields
+
+
+class UnreadCountSerializer(serializers.Serializer):
+    """
+    Number of unread notifications of the current user.
+    """
+    unread = serializers.IntegerField(help_text="Unread notifications.")
+
+
+class StreamTokenSerializer(serializers.Serializer):
+    """
+    Token for the `token` query parameter of the event streams.
+    """
+    token = serializers.CharField(help_text="Stream token; only opens event streams.")
+    expires_in = serializers.IntegerField(help_text="Seconds until the token expires.")
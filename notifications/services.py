@@ -0,0 +1,64 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from notifications.models import Notification, UnreadCounter
+
+
+def add_unread(counts):
+    """
+    Add new notifications to the unread counters; `counts` maps user ids to
+    the number of notifications delivered to them.
+
+    Missing counters are created first, then one UPDATE is issued per
+    distinct increment, so a batch costs a handful of queries however many
+    users it reaches. Call it in the transaction that creates the
+    notifications.
+    """
+    if not counts:
+        return
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=user_id) for user_id in counts], ignore_conflicts=True
+    )
+    by_delta = defaultdict(list)
+    for user_id, count in counts.items():
+        by_delta[count].append(user_id)
+    for delta, user_ids in by_delta.items():
+        UnreadCounter.objects.filter(user_id__in=user_ids).update(unread=F("unread") + delta)
+
+
+def get_unread_count(user):
+    return UnreadCounter.objects.filter(user=user).values_list("unread", flat=True).first() or 0
+
+
+def mark_read(user, notifications):
+    """
+    Mark the unread notifications of `user` in the `notifications` queryset
+    as read and lower the counter by as many. Returns how many changed.
+    """
+    with transaction.atomic():
+        count = notifications.filter(recipient=user, read_at__isnull=True).update(read_at=timezone.now())
+        if count:
+            UnreadCounter.objects.filter(user=user).update(unread=Greatest(F("unread") - count, 0))
+    return count
+
+
+def rebuild_unread_counters():
+    """
+    Recompute every counter from the inbox, e.g. after notifications were
+    deleted from the admin. Returns the number of counters written.
+    """
+    with transaction.atomic():
+        counts = dict(
+            Notification.objects.filter(read_at__isnull=True)
+            .order_by().values_list("recipient").annotate(count=Count("id"))
+        )
+        UnreadCounter.objects.exclude(user_id__in=counts).update(unread=0)
+        UnreadCounter.objects.bulk_create(
+            [UnreadCounter(user_id=user_id, unread=count) for user_id, count in counts.items()],
+            update_conflicts=True, unique_fields=["user"], update_fields=["unread"],
+        )
+    return len(counts)
@@ -0,0 +1,78 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from notifications.broker import publish_on_commit
+from notifications.dispatch import dispatch_on_commit
+from notifications.models import Event
+from notifications.streams import MODERATION_CHANNEL, ad_requests_channel
+from rent.models import RentAdvertisement, RentRequest
+from rent.signals import advertisements_approval_changed, rent_request_accepted
+
+
+# The outbox receivers run inside the transaction that changes the
+# request, so the event commits or rolls back with it. Live updates for
+# the event streams are published after the commit, and so is the inline
+# dispatch when NOTIFICATION_DISPATCH_INLINE is on.
+
+@receiver(post_save, sender=RentRequest)
+def record_request_created(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    Event.objects.create(kind="rent_request.created", payload={
+        "request_id": instance.pk,
+        "advertisement_id": instance.advertisement_id,
+        "sender_id": instance.sender_id,
+    })
+    dispatch_on_commit()
+    publish_on_commit(ad_requests_channel(instance.advertisement_id), {
+        "type": "rent_request.created",
+        "request": {
+            "id": instance.pk,
+            "advertisement_id": instance.advertisement_id,
+            "sender_id": instance.sender_id,
+            "status": instance.status,
+            "message": instance.message,
+            "created_at": instance.created_at,
+        },
+    })
+
+
+@receiver(rent_request_accepted)
+def record_request_accepted(sender, rent_request, closed_requests, **kwargs):
+    Event.objects.create(kind="rent_request.accepted", payload={
+        "request_id": rent_request.pk,
+        "advertisement_id": rent_request.advertisement_id,
+        "sender_id": rent_request.sender_id,
+        "closed": [[request.pk, request.sender_id] for request in closed_requests],
+    })
+    dispatch_on_commit()
+    publish_on_commit(ad_requests_channel(rent_request.advertisement_id), {
+        "type": "rent_request.accepted",
+        "advertisement_id": rent_request.advertisement_id,
+        "request_id": rent_request.pk,
+        "closed_request_ids": [request.pk for request in closed_requests],
+    })
+
+
+@receiver(post_save, sender=RentAdvertisement)
+def publish_pending_advertisement(sender, instance, created, raw=False, **kwargs):
+    if not created or raw or instance.approved:
+        return
+    publish_on_commit(MODERATION_CHANNEL, {
+        "type": "advertisement.pending",
+        "advertisement": {
+            "id": instance.pk,
+            "title": instance.title,
+            "owner_id": instance.owner_id,
+            "created_at": instance.created_at,
+        },
+    })
+
+
+@receiver(advertisements_approval_changed)
+def publish_moderated_advertisements(sender, ad_ids, approved, **kwargs):
+    publish_on_commit(MODERATION_CHANNEL, {
+        "type": "advertisement.moderated",
+        "advertisement_ids": list(ad_ids),
+        "approved": approved,
+    })
@@ -0,0 +1,131 @@
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import exceptions, permissions
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import Token
+
+from api.views import AsyncAPIView
+from notifications.broker import SubscriptionOverflow, get_broker
+from rent.models import RentAdvertisement
+
+
+MODERATION_CHANNEL = "moderation"
+
+
+def ad_requests_channel(ad_id):
+    return f"ads:{ad_id}:requests"
+
+
+class StreamToken(Token):
+    """
+    Short-lived token that only opens event streams. `EventSource` has to
+    send it in the URL, where it ends up in access logs, so the access
+    token is never accepted there. Lives `EVENT_STREAM_TOKEN_LIFETIME`
+    seconds.
+    """
+    token_type = "stream"
+
+    @property
+    def lifetime(self):
+        return timedelta(seconds=settings.EVENT_STREAM_TOKEN_LIFETIME)
+
+
+def format_event(message):
+    data = json.dumps(message, cls=DjangoJSONEncoder)
+    return f"event: {message['type']}\ndata: {data}\n\n"
+
+
+class EventStreamView(AsyncAPIView):
+    """
+    Base for Server-Sent Events endpoints, served under `/api/v1/stream/`
+    when the project runs on an ASGI server.
+
+    Messages published to the view's channels (see `notifications.broker`)
+    are pushed as `event: <type>` / `data: <json>` frames, with a comment
+    line every `EVENT_STREAM_HEARTBEAT` seconds to keep proxies from
+    closing an idle connection. Streams end after
+    `EVENT_STREAM_MAX_SECONDS`, so access is checked again when the client
+    reconnects. Nothing is replayed: clients load the current state once
+    the stream is open and apply the events on top of it.
+
+    Browsers' `EventSource` cannot send headers, so besides the usual
+    `Authorization: JWT <token>` a `StreamToken` from
+    `POST /api/v1/stream/token/` is accepted in the `token` query
+    parameter. Clients fetch a new one before reconnecting.
+    """
+    http_method_names = ["get"]
+    permission_classes = [permissions.IsAuthenticated]
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request._request, ASGIRequest):
+            return self.render({"detail": "Event streams are only served over ASGI."}, status=501)
+        channels = await self.get_channels(request, request.user, **kwargs)
+        response = StreamingHttpResponse(self.stream(channels), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Stop nginx from buffering the stream.
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def authenticate(self, request):
+        token = request.GET.get("token")
+        if not token:
+            return await super().authenticate(request)
+        try:
+            validated_token = StreamToken(token)
+        except TokenError as exc:
+            raise InvalidToken({"detail": "Given token not valid for event streams.", "reason": str(exc)})
+        return await self.authenticator.aget_user(validated_token), validated_token
+
+    async def get_channels(self, request, user, **kwargs):
+        """
+        Return the channels to subscribe to, or raise an API exception if
+        `user` may not listen.
+        """
+        raise NotImplementedError
+
+    async def stream(self, channels):
+        heartbeat = settings.EVENT_STREAM_HEARTBEAT
+        deadline = time.monotonic() + settings.EVENT_STREAM_MAX_SECONDS
+        async with get_broker().subscribe(channels) as subscription:
+            # Sent once subscribed: from here on no event is missed.
+            yield f"retry: {settings.EVENT_STREAM_RETRY_MS}\n\n"
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    message = await subscription.get(timeout=min(heartbeat, remaining))
+                except SubscriptionOverflow:
+                    # The client reconnects and reloads the state.
+                    break
+                yield ": ping\n\n" if message is None else format_event(message)
+
+
+class AdRequestStreamView(EventStreamView):
+    """
+    Live rent requests of one advertisement, for its owner (or staff):
+    `rent_request.created` and `rent_request.accepted` events.
+    """
+
+    async def get_channels(self, request, user, ad_pk):
+        owner_id = await RentAdvertisement.objects.filter(pk=ad_pk).values_list("owner_id", flat=True).afirst()
+        if owner_id is None:
+            raise exceptions.NotFound("Advertisement not found.")
+        if owner_id != user.pk and not user.is_staff:
+            raise exceptions.PermissionDenied()
+        return [ad_requests_channel(ad_pk)]
+
+
+class ModerationStreamView(EventStreamView):
+    """
+    Live moderation queue, for staff: `advertisement.pending` when an ad is
+    submitted and `advertisement.moderated` when ads are approved or rejected.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    async def get_channels(self, request, user, **kwargs):
+        return [MODERATION_CHANNEL]
@@ -0,0 +1,324 @@
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from notifications.broker import InMemoryBroker, get_broker
+from notifications.dispatch import dispatch_events
+from notifications.models import Event, Notification, UnreadCounter
+from notifications.services import add_unread, get_unread_count, mark_read, rebuild_unread_counters
+from notifications.streams import AdRequestStreamView, StreamToken, ad_requests_channel
+from users.authentication import CachedJWTAuthentication
+from rent.models import RentRequest
+from rent.services import accept_rent_request
+from rent.tests import create_ad
+
+
+class OutboxTests(TestCase):
+    """
+    Events are written in the transaction that changes the rent request.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw12345!")
+        self.tenant = User.objects.create_user("tenant@example.com", "pw12345!")
+        self.ad = create_ad(self.owner)
+
+    def test_event_commits_with_the_request(self):
+        request = RentRequest.objects.create(advertisement=self.ad, sender=self.tenant, status="pending")
+        event = Event.objects.get()
+        self.assertEqual(event.kind, "rent_request.created")
+        self.assertEqual(event.payload["request_id"], request.pk)
+
+    def test_event_rolls_back_with_the_request(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            RentRequest.objects.create(advertisement=self.ad, sender=self.tenant, status="pending")
+            raise RuntimeError
+        self.assertFalse(Event.objects.exists())
+
+    def test_accepting_records_the_closed_requests(self):
+        accepted = RentRequest.objects.create(advertisement=self.ad, sender=self.tenant, status="pending")
+        other = get_user_model().objects.create_user("other@example.com", "pw12345!")
+        closed = RentRequest.objects.create(advertisement=self.ad, sender=other, status="pending")
+        accept_rent_request(accepted)
+        event = Event.objects.get(kind="rent_request.accepted")
+        self.assertEqual(event.payload["closed"], [[closed.pk, other.pk]])
+
+    def test_dispatch_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            RentRequest.objects.create(advertisement=self.ad, sender=self.tenant, status="pending")
+        self.assertTrue(Notification.objects.filter(recipient=self.owner).exists())
+        self.assertIsNotNone(Event.objects.get().dispatched_at)
+        # Email is left to the worker; inline dispatch does not wait on SMTP.
+        self.assertFalse(settings.NOTIFICATION_EMAIL)
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(NOTIFICATION_DISPATCH_INLINE=False)
+    def test_dispatch_is_left_to_the_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            RentRequest.objects.create(advertisement=self.ad, sender=self.tenant, status="pending")
+        self.assertFalse(Notification.objects.exists())
+        self.assertIsNone(Event.objects.get().dispatched_at)
+
+
+@override_settings(NOTIFICATION_DISPATCH_INLINE=False, NOTIFICATION_EMAIL=True)
+class DispatchTests(TestCase):
+    """
+    `dispatch_events` fans events out to inboxes, counters and email.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw12345!")
+        self.other_owner = User.objects.create_user("other-owner@example.com", "pw12345!")
+        self.tenant = User.objects.create_user("tenant@example.com", "pw12345!")
+        self.ad = create_ad(self.owner)
+        self.other_ad = create_ad(self.other_owner)
+
+    def create_event(self, ad):
+        request = RentRequest.objects.create(advertisement=ad, sender=self.tenant, status="pending")
+        return Event.objects.get(payload__request_id=request.pk)
+
+    def test_events_are_delivered_to_inbox_and_email(self):
+        self.create_event(self.ad)
+        self.create_event(self.other_ad)
+        self.assertEqual(dispatch_events(10), (2, 0))
+        self.assertEqual(get_unread_count(self.owner), 1)
+        self.assertEqual(get_unread_count(self.other_owner), 1)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [
+            "other-owner@example.com", "owner@example.com",
+        ])
+        self.assertFalse(Event.objects.filter(dispatched_at__isnull=True).exists())
+
+    def test_failing_handler_is_recorded_and_retried(self):
+        broken = self.create_event(self.ad)
+        Event.objects.filter(pk=broken.pk).update(payload={"advertisement_id": self.ad.pk})
+        self.create_event(self.other_ad)
+        with self.assertLogs("notifications.dispatch", "ERROR"):
+            self.assertEqual(dispatch_events(10), (1, 1))
+        broken.refresh_from_db()
+        self.assertIsNone(broken.dispatched_at)
+        self.assertEqual(broken.attempts, 1)
+        self.assertIn("KeyError", broken.last_error)
+        self.assertEqual(get_unread_count(self.other_owner), 1)
+
+    def test_email_failure_keeps_the_inbox(self):
+        failing = self.create_event(self.ad)
+        delivered = self.create_event(self.other_ad)
+        sent = []
+
+        def send_messages(messages):
+            if messages[0].to == ["owner@example.com"]:
+                raise ConnectionRefusedError("SMTP server down")
+            sent.extend(messages)
+            return len(messages)
+
+        connection = mock.Mock(send_messages=mock.Mock(side_effect=send_messages))
+        with mock.patch("notifications.dispatch.get_connection", return_value=connection), \
+                self.assertLogs("notifications.dispatch", "ERROR"):
+            self.assertEqual(dispatch_events(10), (2, 0))
+
+        failing.refresh_from_db()
+        self.assertIsNotNone(failing.dispatched_at)
+        self.assertEqual(failing.attempts, 1)
+        self.assertIn("SMTP server down", failing.last_error)
+        delivered.refresh_from_db()
+        self.assertEqual(delivered.attempts, 0)
+        self.assertEqual([message.to for message in sent], [["other-owner@example.com"]])
+        self.assertEqual(get_unread_count(self.owner), 1)
+        self.assertEqual(get_unread_count(self.other_owner), 1)
+
+    @override_settings(NOTIFICATION_EMAIL=False)
+    def test_inbox_only(self):
+        self.create_event(self.ad)
+        self.assertEqual(dispatch_events(10), (1, 0))
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(get_unread_count(self.owner), 1)
+
+
+class UnreadCounterTests(TestCase):
+    """
+    Counter arithmetic of `add_unread`, `mark_read` and `rebuild_unread_counters`.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.users = [User.objects.create_user(f"user{index}@example.com", "pw12345!") for index in range(3)]
+
+    def notify(self, user, count):
+        Notification.objects.bulk_create([
+            Notification(recipient=user, kind="request_received", title="New rent request")
+            for _ in range(count)
+        ])
+        add_unread({user.pk: count})
+
+    def test_add_unread_groups_users_by_increment(self):
+        first, second, third = self.users
+        add_unread({first.pk: 2, second.pk: 2, third.pk: 1})
+        add_unread({first.pk: 1})
+        self.assertEqual([get_unread_count(user) for user in self.users], [3, 2, 1])
+
+    def test_add_unread_with_no_counts(self):
+        add_unread({})
+        self.assertFalse(UnreadCounter.objects.exists())
+
+    def test_mark_read_lowers_by_the_notifications_changed(self):
+        user, other, _ = self.users
+        self.notify(user, 3)
+        self.notify(other, 1)
+        first = Notification.objects.filter(recipient=user).order_by("id")[:1]
+        self.assertEqual(mark_read(user, Notification.objects.filter(pk__in=first)), 1)
+        # Already read, and someone else's notification.
+        self.assertEqual(mark_read(user, Notification.objects.filter(pk__in=first)), 0)
+        self.assertEqual(mark_read(user, Notification.objects.filter(recipient=other)), 0)
+        self.assertEqual(get_unread_count(user), 2)
+        self.assertEqual(mark_read(user, Notification.objects.all()), 2)
+        self.assertEqual(get_unread_count(user), 0)
+        self.assertEqual(get_unread_count(other), 1)
+
+    def test_mark_read_never_goes_below_zero(self):
+        user = self.users[0]
+        self.notify(user, 2)
+        UnreadCounter.objects.filter(user=user).update(unread=1)
+        mark_read(user, Notification.objects.all())
+        self.assertEqual(get_unread_count(user), 0)
+
+    def test_rebuild_counts_the_inbox(self):
+        first, second, third = self.users
+        self.notify(first, 2)
+        self.notify(third, 1)
+        UnreadCounter.objects.filter(user=first).update(unread=7)
+        UnreadCounter.objects.create(user=second, unread=4)
+        Notification.objects.filter(recipient=third).delete()
+        self.assertEqual(rebuild_unread_counters(), 1)
+        self.assertEqual([get_unread_count(user) for user in self.users], [2, 0, 0])
+
+
+@override_settings(
+    EVENT_STREAM_BROKER="notifications.broker.InMemoryBroker",
+    EVENT_STREAM_HEARTBEAT=0.05,
+    EVENT_STREAM_QUEUE_SIZE=2,
+)
+class EventStreamTests(TestCase):
+    """
+    `EventStreamView.stream` over `InMemoryBroker`, fed by the rent request
+    signals.
+    """
+
+    def setUp(self):
+        get_broker.cache_clear()
+        self.addCleanup(get_broker.cache_clear)
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw12345!")
+        self.tenants = [User.objects.create_user(f"tenant{index}@example.com", "pw12345!") for index in range(3)]
+        self.ad = create_ad(self.owner)
+
+    def open_stream(self):
+        return AdRequestStreamView().stream([ad_requests_channel(self.ad.pk)])
+
+    @sync_to_async
+    def send_requests(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            for tenant in self.tenants[:count]:
+                RentRequest.objects.create(advertisement=self.ad, sender=tenant, status="pending")
+
+    @sync_to_async
+    def send_rolled_back_request(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                RentRequest.objects.create(advertisement=self.ad, sender=self.tenants[0], status="pending")
+                raise RuntimeError
+
+    async def test_committed_request_is_streamed(self):
+        stream = self.open_stream()
+        self.assertTrue((await anext(stream)).startswith("retry: "))
+        await self.send_requests(1)
+        frame = await anext(stream)
+        await stream.aclose()
+        self.assertTrue(frame.startswith("event: rent_request.created\n"))
+        self.assertIn(f'"advertisement_id": {self.ad.pk}', frame)
+
+    async def test_rolled_back_request_is_not_streamed(self):
+        stream = self.open_stream()
+        await anext(stream)
+        await self.send_rolled_back_request()
+        frame = await anext(stream)
+        await stream.aclose()
+        self.assertEqual(frame, ": ping\n\n")
+
+    async def test_slow_subscriber_is_disconnected(self):
+        stream = self.open_stream()
+        await anext(stream)
+        await self.send_requests(3)
+        # One more message than the queue holds: the stream ends so the
+        # client reconnects and reloads, instead of silently missing one.
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+
+
+class StreamTokenTests(APITestCase):
+    """
+    Only stream tokens are accepted in the `token` query parameter.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        self.view = AdRequestStreamView()
+        self.view.authenticator = CachedJWTAuthentication()
+
+    async def authenticate(self, token):
+        return await self.view.authenticate(RequestFactory().get("/", {"token": str(token)}))
+
+    def test_endpoint_issues_a_stream_token(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse("stream-token"))
+        self.assertEqual(response.status_code, 200)
+        token = StreamToken(response.data["token"])
+        self.assertEqual(token["user_id"], str(self.user.pk))
+        self.assertEqual(response.data["expires_in"], 60)
+
+    def test_endpoint_requires_authentication(self):
+        self.assertEqual(self.client.post(reverse("stream-token")).status_code, 401)
+
+    async def test_stream_token_is_accepted(self):
+        token = await sync_to_async(StreamToken.for_user)(self.user)
+        user, _ = await self.authenticate(token)
+        self.assertEqual(user.pk, self.user.pk)
+
+    async def test_access_token_is_rejected(self):
+        token = await sync_to_async(AccessToken.for_user)(self.user)
+        with self.assertRaises(InvalidToken):
+            await self.authenticate(token)
+
+    async def test_expired_stream_token_is_rejected(self):
+        token = await sync_to_async(StreamToken.for_user)(self.user)
+        token.set_exp(lifetime=-timedelta(seconds=1))
+        with self.assertRaises(InvalidToken):
+            await self.authenticate(token)
+
+
+class InMemoryBrokerTests(TestCase):
+    """
+    `InMemoryBroker` warns when it cannot reach the other workers.
+    """
+
+    def test_warns_with_several_workers(self):
+        with mock.patch.dict("os.environ", {"WEB_CONCURRENCY": "4"}), \
+                self.assertLogs("notifications.broker", "WARNING") as logs:
+            InMemoryBroker()
+        self.assertIn("RedisBroker", logs.output[0])
+
+    def test_single_worker_is_quiet(self):
+        with mock.patch.dict("os.environ", {"WEB_CONCURRENCY": "1"}), \
+                self.assertNoLogs("notifications.broker", "WARNING"):
+            InMemoryBroker()
@@ -0,0 +1,92 @@
+from django.conf import settings
+from rest_framework import mixins, permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_yasg.utils import no_body, swagger_auto_schema
+from drf_yasg import openapi
+
+from notifications.models import Notification
+from notifications.serializers import NotificationSerializer, StreamTokenSerializer, UnreadCountSerializer
+from notifications.services import get_unread_count, mark_read
+from notifications.streams import StreamToken
+from rent.paginations import KeysetPagination
+from rent.serializers import EmptySerializer
+
+
+class NotificationViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    API endpoint for the current user's notification inbox, newest first.
+    Filter with `?unread=true`; pages are keyset-paginated.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = "-created_at"
+
+    def get_serializer_class(self):
+        if self.action in ["read", "read_all"]:
+            return EmptySerializer
+        return NotificationSerializer
+
+    def get_queryset(self):
+        # Prevent error when generating Swagger schema
+        if getattr(self, 'swagger_fake_view', False):
+            return Notification.objects.none()
+
+        queryset = Notification.objects.filter(recipient=self.request.user)
+        if self.action == "list" and self.request.query_params.get("unread", "").lower() in ("true", "1"):
+            queryset = queryset.filter(read_at__isnull=True)
+        return queryset
+
+    @swagger_auto_schema(
+        method='get',
+        operation_summary="Unread notification count",
+        operation_description="Number of unread notifications, read from a per-user counter.",
+        responses={200: UnreadCountSerializer}
+    )
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        return Response({"unread": get_unread_count(request.user)})
+
+    @swagger_auto_schema(
+        method='post',
+        operation_summary="Mark a notification as read",
+        responses={200: UnreadCountSerializer}
+    )
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        notification = self.get_object()
+        mark_read(request.user, Notification.objects.filter(pk=notification.pk))
+        return Response({"unread": get_unread_count(request.user)})
+
+    @swagger_auto_schema(
+        method='post',
+        operation_summary="Mark all notifications as read",
+        responses={200: openapi.Response("Number of notifications marked as read")}
+    )
+    @action(detail=False, methods=['post'], url_path='read-all')
+    def read_all(self, request):
+        return Response({"marked": mark_read(request.user, Notification.objects.all())})
+
+
+class StreamTokenView(APIView):
+    """
+    API endpoint issuing a short-lived token for the event streams under
+    `/api/v1/stream/`, to pass as `?token=` where headers cannot be sent.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Issue an event stream token",
+        operation_description=(
+            "Returns a token that only opens event streams and expires after a minute by default. "
+            "Fetch a new one before every (re)connection."
+        ),
+        request_body=no_body,
+        responses={200: StreamTokenSerializer}
+    )
+    def post(self, request):
+        return Response({
+            "token": str(StreamToken.for_user(request.user)),
+            "expires_in": settings.EVENT_STREAM_TOKEN_LIFETIME,
+        })
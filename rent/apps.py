@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rent'
+
+    def ready(self):
+        import rent.checks  # noqa: F401
+        import rent.signals  # noqa: F401
@@ -0,0 +1,180 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from rest_framework import exceptions
+
+from api.views import AsyncAPIView
+from rent.cache import _arecord, aget_generation, build_cache_key, get_cache_namespace, get_cache_scope
+from rent.conditional import build_collection_validators, build_validators, set_validator_headers
+from rent.views import CategoryViewSet, RentAdvertisementViewSet, ReviewViewSet
+
+
+class AsyncReadView(AsyncAPIView):
+    """
+    Base for async, read-only versions of API endpoints, served under
+    `/api/v1/async/` when the project runs on an ASGI server and
+    `RENT_ASYNC_VIEWS` is on.
+
+    The wrapped viewset still supplies permissions, the queryset (filters,
+    ordering and column trimming included), pagination and serializers,
+    so responses match the sync endpoint. Database and cache access is
+    awaited instead of holding a worker thread for the whole request.
+    Authentication, errors, response caching and conditional GET behave
+    like on the sync endpoint.
+    """
+    http_method_names = ["get", "head", "options"]
+    viewset_class = None
+    action = None
+
+    def initial(self, request):
+        self.viewset = self.viewset_class(
+            request=request, args=self.args, kwargs=self.kwargs, action=self.action, format_kwarg=None
+        )
+        super().initial(request)
+
+    def get_permissions(self):
+        return self.viewset.get_permissions()
+
+    def check_permissions(self, request, obj=None, view=None):
+        super().check_permissions(request, obj, view or self.viewset)
+
+    async def get(self, request, *args, **kwargs):
+        return await self.get_response(request)
+
+    async def get_response(self, request):
+        etag, last_modified = await self.get_validators(request)
+        if etag is not None:
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return set_validator_headers(not_modified, etag, last_modified)
+
+        response = await self.get_cached_response(request)
+        if etag is not None and response.status_code == 200:
+            set_validator_headers(response, etag, last_modified)
+        return response
+
+    async def get_cached_response(self, request):
+        namespace = get_cache_namespace(self.viewset)
+        if namespace is None:
+            return self.render(await self.get_data(request))
+
+        generation = await aget_generation(namespace)
+        key = build_cache_key(namespace, generation, request, get_cache_scope(request.user))
+        data = await cache.aget(key)
+        if data is not None:
+            await _arecord(namespace, "hits")
+            response = self.render(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        await _arecord(namespace, "misses")
+        data = await self.get_data(request)
+        timeout = self.viewset.cache_timeout or settings.RENT_CACHE_TIMEOUT
+        await cache.aset(key, data, timeout=timeout)
+        response = self.render(data)
+        response["X-Cache"] = "MISS"
+        return response
+
+    async def get_queryset(self):
+        if not self.viewset.filter_backends:
+            return self.viewset.get_queryset()
+        # django-filter validates choice filters such as `category` with a
+        # query, so the queryset is built in a thread. It is still
+        # evaluated with the async ORM.
+        return await sync_to_async(
+            lambda: self.viewset.filter_queryset(self.viewset.get_queryset())
+        )()
+
+    async def get_validators(self, request):
+        """
+        Return the (ETag, Last-Modified) pair of the response, like
+        `ConditionalGetMixin`, or (None, None) when there is none.
+        """
+        raise NotImplementedError
+
+    async def get_data(self, request):
+        """
+        Return the serialized response body; errors are raised as API exceptions.
+        """
+        raise NotImplementedError
+
+
+class AsyncListView(AsyncReadView):
+    """
+    Async `list`: paginated with the viewset's paginator when it has one.
+    """
+    action = "list"
+
+    async def get_validators(self, request):
+        namespace = get_cache_namespace(self.viewset)
+        if namespace:
+            return build_validators(request, await aget_generation(namespace), None)
+        state = await (await self.get_queryset()).order_by().aaggregate(
+            count=Count("pk"), last_modified=Max("updated_at")
+        )
+        return build_collection_validators(request, state["count"], state["last_modified"])
+
+    async def get_data(self, request):
+        queryset = await self.get_queryset()
+        paginator = self.viewset.paginator
+        if paginator is not None:
+            page = await paginator.apaginate_queryset(queryset, request, view=self.viewset)
+            if page is not None:
+                serializer = self.viewset.get_serializer(page, many=True)
+                return paginator.get_paginated_response(serializer.data).data
+        objects = [obj async for obj in queryset]
+        return self.viewset.get_serializer(objects, many=True).data
+
+
+class AsyncDetailView(AsyncReadView):
+    """
+    Async `retrieve`, looked up like `GenericAPIView.get_object`.
+    """
+    action = "retrieve"
+
+    def get_lookup(self):
+        lookup_url_kwarg = self.viewset.lookup_url_kwarg or self.viewset.lookup_field
+        return {self.viewset.lookup_field: self.viewset.kwargs[lookup_url_kwarg]}
+
+    async def get_validators(self, request):
+        try:
+            last_modified = await (
+                self.viewset.get_queryset().filter(**self.get_lookup())
+                .order_by().values_list("updated_at", flat=True).afirst()
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookups are answered with 404 by get_data().
+            last_modified = None
+        if last_modified is None:
+            return None, None
+        return build_validators(request, 1, last_modified)
+
+    async def get_data(self, request):
+        queryset = await self.get_queryset()
+        try:
+            obj = await queryset.aget(**self.get_lookup())
+        except ObjectDoesNotExist:
+            raise exceptions.NotFound(f"No {queryset.model._meta.object_name} matches the given query.")
+        except (TypeError, ValueError, ValidationError):
+            raise exceptions.NotFound()
+        self.check_permissions(request, obj)
+        return self.viewset.get_serializer(obj).data
+
+
+class AdvertisementListView(AsyncListView):
+    viewset_class = RentAdvertisementViewSet
+
+
+class AdvertisementDetailView(AsyncDetailView):
+    viewset_class = RentAdvertisementViewSet
+
+
+class CategoryListView(AsyncListView):
+    viewset_class = CategoryViewSet
+
+
+class ReviewListView(AsyncListView):
+    viewset_class = ReviewViewSet
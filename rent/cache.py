@@ -0,0 +1,183 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+
+CACHE_PREFIX = "rent:response"
+STATS_PREFIX = "rent:cache-stats"
+
+
+def get_cache_namespace(view):
+    """
+    Return the response cache namespace of a view, or None when it has none
+    or response caching is off (`RENT_RESPONSE_CACHE`).
+    """
+    if not settings.RENT_RESPONSE_CACHE:
+        return None
+    return getattr(view, "cache_namespace", None)
+
+
+def _generation_key(namespace):
+    return f"{CACHE_PREFIX}:generation:{namespace}"
+
+
+def get_generation(namespace):
+    """
+    Return the current generation of a cache namespace.
+    Cached responses are keyed on it, so bumping it invalidates them all at once.
+    """
+    key = _generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        # Seed from the clock so an evicted counter never revives old entries.
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+async def aget_generation(namespace):
+    """
+    Async version of `get_generation`.
+    """
+    key = _generation_key(namespace)
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        generation = await cache.aget(key)
+    return generation
+
+
+def invalidate(*namespaces):
+    """
+    Invalidate every cached response in the given namespaces.
+    """
+    for namespace in namespaces:
+        try:
+            cache.incr(_generation_key(namespace))
+        except ValueError:
+            cache.set(_generation_key(namespace), time.time_ns(), timeout=None)
+
+
+def invalidate_on_commit(*namespaces):
+    """
+    Invalidate once the current transaction commits, so a concurrent read
+    cannot re-cache data that is about to change.
+    """
+    transaction.on_commit(lambda: invalidate(*namespaces))
+
+
+def _record(namespace, outcome):
+    if not settings.RENT_CACHE_STATS:
+        return
+    key = f"{STATS_PREFIX}:{namespace}:{outcome}"
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+async def _arecord(namespace, outcome):
+    if not settings.RENT_CACHE_STATS:
+        return
+    key = f"{STATS_PREFIX}:{namespace}:{outcome}"
+    if not await cache.aadd(key, 1, timeout=None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, timeout=None)
+
+
+def get_cache_stats(namespaces):
+    """
+    Return hit/miss counters for the given namespaces; they are only kept
+    when `RENT_CACHE_STATS` is on.
+    """
+    keys = {
+        (namespace, outcome): f"{STATS_PREFIX}:{namespace}:{outcome}"
+        for namespace in namespaces
+        for outcome in ("hits", "misses")
+    }
+    values = cache.get_many(list(keys.values()))
+    return {
+        namespace: {
+            outcome: values.get(keys[(namespace, outcome)], 0)
+            for outcome in ("hits", "misses")
+        }
+        for namespace in namespaces
+    }
+
+
+def get_cache_scope(user):
+    """
+    Return the part of the cache key shared by callers with the same access:
+    anonymous, authenticated or staff.
+    """
+    if user.is_staff:
+        return "staff"
+    return "auth" if user.is_authenticated else "anon"
+
+
+def build_cache_key(namespace, generation, request, scope):
+    """
+    Build a response cache key from the request path, the sorted query
+    parameters, the caller's scope and the namespace generation.
+    """
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    raw = f"{request.path}?{params}"
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f"{CACHE_PREFIX}:{namespace}:{generation}:{scope}:{digest}"
+
+
+class CachedResponseMixin:
+    """
+    Cache `list` and `retrieve` responses of a viewset.
+
+    Keys are built from the request path, the sorted query parameters, the
+    caller's auth scope and the namespace generation. Model signals bump the
+    generation of `cache_namespace` to invalidate. Responses carry an
+    `X-Cache: HIT|MISS` header. With `RENT_RESPONSE_CACHE` off the
+    responses are built every time.
+    """
+    cache_namespace = None
+    cache_timeout = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_scope(self):
+        return get_cache_scope(self.request.user)
+
+    def get_cache_key(self):
+        generation = get_generation(self.cache_namespace)
+        return build_cache_key(self.cache_namespace, generation, self.request, self.get_cache_scope())
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if get_cache_namespace(self) is None:
+            return handler(request, *args, **kwargs)
+        key = self.get_cache_key()
+        data = cache.get(key)
+        if data is not None:
+            _record(self.cache_namespace, "hits")
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        _record(self.cache_namespace, "misses")
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = self.cache_timeout or settings.RENT_CACHE_TIMEOUT
+            cache.set(key, response.data, timeout=timeout)
+        response["X-Cache"] = "MISS"
+        return response
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register(deploy=True)
+def check_response_cache(app_configs, **kwargs):
+    """
+    Cached responses and generation ETags need a cache shared by every
+    worker process, or invalidations only reach the worker that made them.
+    """
+    if settings.RENT_RESPONSE_CACHE and isinstance(caches["default"], LocMemCache):
+        return [Error(
+            "RENT_RESPONSE_CACHE is on but the default cache is process-local memory.",
+            hint="Set REDIS_URL, or turn RENT_RESPONSE_CACHE off.",
+            id="rent.E001",
+        )]
+    return []
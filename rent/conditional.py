@@ -0,0 +1,96 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from rent.cache import get_cache_namespace, get_generation
+
+
+def build_validators(request, version, last_modified):
+    """
+    Build an (ETag, Last-Modified timestamp) pair from a version token (a row
+    count or a cache generation) and the newest `updated_at` behind a response.
+    The query string is part of the ETag because it shapes the representation.
+    """
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    stamp = last_modified.isoformat() if last_modified else ""
+    raw = f"{request.path}?{params}:{version}:{stamp}"
+    etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+    return etag, int(last_modified.timestamp()) if last_modified else None
+
+
+def build_collection_validators(request, count, last_modified):
+    """
+    Build validators for a list from its row count and newest `updated_at`.
+    Only the ETag is returned: deleting a row or moving it out of the filter
+    leaves MAX(updated_at) as it was, so If-Modified-Since would answer 304
+    for a list that changed. The count in the ETag catches those.
+    """
+    etag, _ = build_validators(request, count, last_modified)
+    return etag, None
+
+
+def get_queryset_validators(request, queryset):
+    """
+    Compute validators for a queryset with a single COUNT/MAX(updated_at)
+    aggregate, without loading or serializing any row.
+    """
+    state = queryset.order_by().aggregate(count=Count("pk"), last_modified=Max("updated_at"))
+    return build_collection_validators(request, state["count"], state["last_modified"])
+
+
+def set_validator_headers(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for `list` and `retrieve`.
+
+    Detail validators (ETag and Last-Modified) come from the object's
+    `updated_at`. Lists only get an ETag, from the view's cache namespace
+    generation when response caching is on (no query at all), otherwise from
+    COUNT/MAX(updated_at) of the filtered queryset. A matching If-None-Match
+    or If-Modified-Since is answered with 304 before anything is serialized.
+    """
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.get_list_validators(request)
+        return self.get_conditional(super().list, etag, last_modified, request, *args, **kwargs)
+
+    def get_list_validators(self, request):
+        namespace = get_cache_namespace(self)
+        if namespace:
+            return build_validators(request, get_generation(namespace), None)
+        return get_queryset_validators(request, self.filter_queryset(self.get_queryset()))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.get_queryset().filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+            last_modified = queryset.order_by().values_list("updated_at", flat=True).first()
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookups are left to get_object(), which answers 404.
+            last_modified = None
+        if last_modified is None:
+            return super().retrieve(request, *args, **kwargs)
+        etag, last_modified = build_validators(request, 1, last_modified)
+        return self.get_conditional(super().retrieve, etag, last_modified, request, *args, **kwargs)
+
+    def get_conditional(self, handler, etag, last_modified, request, *args, **kwargs):
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return set_validator_headers(not_modified, etag, last_modified)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validator_headers(response, etag, last_modified)
+        return response
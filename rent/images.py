@@ -0,0 +1,52 @@
+"""
+Image derivative generation.
+
+This module only depends on Pillow so it can run in worker processes
+without setting up Django.
+"""
+from pathlib import Path
+
+from PIL import Image, ImageOps, features
+
+
+# Pillow plugin feature required to encode each derivative format.
+FORMAT_FEATURES = {
+    "webp": "webp",
+    "avif": "avif",
+}
+
+
+def supported_formats(formats):
+    """
+    Return the formats this Pillow build can encode.
+    """
+    return [fmt for fmt in formats if features.check(FORMAT_FEATURES.get(fmt, fmt))]
+
+
+def build_variants(source_path, variants, formats, quality=80):
+    """
+    Encode every variant of the image at `source_path` in every format.
+
+    `variants` maps a variant name to {"size": (width, height), "crop": bool}.
+    Cropped variants are filled to exactly `size`; the others are scaled to
+    fit inside it. Files are written next to the source as
+    `<stem>_<variant>.<format>`. Returns a dict of `<variant>_<format>` to path.
+    """
+    source = Path(source_path)
+    outputs = {}
+    with Image.open(source) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ("RGB", "RGBA"):
+            original = original.convert("RGBA" if "A" in original.getbands() else "RGB")
+        for variant, spec in variants.items():
+            size = tuple(spec["size"])
+            if spec.get("crop"):
+                resized = ImageOps.fit(original, size, Image.Resampling.LANCZOS)
+            else:
+                resized = original.copy()
+                resized.thumbnail(size, Image.Resampling.LANCZOS)
+            for fmt in supported_formats(formats):
+                path = source.with_name(f"{source.stem}_{variant}.{fmt}")
+                resized.save(path, format=fmt.upper(), quality=quality)
+                outputs[f"{variant}_{fmt}"] = str(path)
+    return outputs
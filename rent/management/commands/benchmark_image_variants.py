@@ -0,0 +1,72 @@
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from rent.images import build_variants, supported_formats
+
+
+class Command(BaseCommand):
+    """
+    Generate random photos and report derivative encoding throughput
+    for different process pool sizes.
+    """
+    help = "Benchmark thumbnail/WebP/AVIF variant generation throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=40, help="Source images to encode.")
+        parser.add_argument(
+            "--size", type=int, nargs=2, default=[3000, 2000], metavar=("WIDTH", "HEIGHT"),
+            help="Dimensions of the generated source images."
+        )
+        parser.add_argument(
+            "--processes", type=int, nargs="+", default=[0, 1, 2, 4],
+            help="Pool sizes to benchmark; 0 encodes in this process."
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for generated images.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        formats = settings.RENT_IMAGE_VARIANT_FORMATS
+        self.stdout.write(f"Encoding formats: {', '.join(supported_formats(formats)) or 'none'}")
+        directory = Path(tempfile.mkdtemp(prefix="variant-benchmark-"))
+        try:
+            sources = [
+                self.make_image(directory / f"source-{index}.jpg", options["size"], rng)
+                for index in range(options["images"])
+            ]
+            for processes in options["processes"]:
+                elapsed = self.run(sources, processes, formats)
+                self.stdout.write(self.style.SUCCESS(
+                    f"{processes} processes: {len(sources) / elapsed:.2f} images/s "
+                    f"({elapsed:.1f}s for {len(sources)} images)"
+                ))
+        finally:
+            shutil.rmtree(directory)
+
+    def run(self, sources, processes, formats):
+        args = (settings.RENT_IMAGE_VARIANTS, formats)
+        started = time.perf_counter()
+        if processes == 0:
+            for source in sources:
+                build_variants(source, *args)
+        else:
+            with ProcessPoolExecutor(max_workers=processes, mp_context=get_context("spawn")) as pool:
+                futures = [pool.submit(build_variants, source, *args) for source in sources]
+                for future in futures:
+                    future.result()
+        return time.perf_counter() - started
+
+    def make_image(self, path, size, rng):
+        # Noise over a gradient compresses roughly like a real photo.
+        gradient = Image.linear_gradient("L").resize(size).convert("RGB")
+        noise = Image.effect_noise(size, rng.randint(20, 60)).convert("RGB")
+        Image.blend(gradient, noise, 0.5).save(path, "JPEG", quality=90)
+        return str(path)
@@ -0,0 +1,88 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from rent.models import RentAdvertisement
+from rent.search import get_search_backend
+
+
+WORDS = (
+    "apartment flat house family bachelor sublet furnished balcony rooftop garage "
+    "lift generator gas dhanmondi gulshan banani uttara mirpur mohammadpur bashundhara "
+    "spacious quiet bright corner south facing near school market hospital university"
+).split()
+
+
+class Command(BaseCommand):
+    """
+    Seed advertisements and report search latency percentiles.
+    Intended for a disposable development database only.
+    """
+    help = "Benchmark advertisement full-text search latency at different table sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[100_000, 1_000_000],
+            help="Advertisement counts to benchmark at."
+        )
+        parser.add_argument("--queries", type=int, default=200, help="Search queries per size.")
+        parser.add_argument("--batch-size", type=int, default=5_000, help="Rows per bulk insert.")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for generated data.")
+        parser.add_argument(
+            "--cleanup", action="store_true",
+            help="Delete the generated advertisements when done."
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        backend = get_search_backend()
+        owner, _ = get_user_model().objects.get_or_create(
+            email="search-benchmark@example.com",
+            defaults={"username": "search-benchmark@example.com"},
+        )
+        seeded = RentAdvertisement.objects.filter(owner=owner)
+
+        for size in sorted(options["sizes"]):
+            missing = size - seeded.count()
+            if missing > 0:
+                self.stdout.write(f"Seeding {missing} advertisements...")
+                self.seed(owner, missing, options["batch_size"], rng)
+                backend.rebuild()
+
+            timings = []
+            for _ in range(options["queries"]):
+                term = " ".join(rng.sample(WORDS, rng.randint(1, 2)))
+                started = time.perf_counter()
+                results = backend.search(seeded.defer("search_vector"), term)
+                list(results.order_by("-search_rank", "-created_at")[:10])
+                timings.append((time.perf_counter() - started) * 1000)
+
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            self.stdout.write(self.style.SUCCESS(
+                f"{size} ads: p50={statistics.median(timings):.1f}ms "
+                f"p95={p95:.1f}ms max={timings[-1]:.1f}ms"
+            ))
+
+        if options["cleanup"]:
+            seeded.delete()
+            owner.delete()
+            backend.rebuild()
+
+    def seed(self, owner, count, batch_size, rng):
+        while count > 0:
+            batch = min(batch_size, count)
+            RentAdvertisement.objects.bulk_create([
+                RentAdvertisement(
+                    owner=owner,
+                    title=" ".join(rng.choices(WORDS, k=5)).title(),
+                    description=" ".join(rng.choices(WORDS, k=40)),
+                    price=rng.randint(5_000, 100_000),
+                    approved=True,
+                )
+                for _ in range(batch)
+            ])
+            count -= batch
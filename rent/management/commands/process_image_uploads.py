@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from rent.models import AdvertisementImage
+from rent.uploads import process_image
+
+
+class Command(BaseCommand):
+    """
+    Push staged images that are still waiting, e.g. after a worker restart.
+    """
+    help = "Upload staged advertisement images that are still processing."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retry-failed", action="store_true",
+            help="Also retry images whose upload failed."
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            AdvertisementImage.objects.filter(status=AdvertisementImage.STATUS_FAILED).exclude(
+                staged_path=""
+            ).update(status=AdvertisementImage.STATUS_PROCESSING, attempts=0)
+
+        image_ids = list(
+            AdvertisementImage.objects.filter(status=AdvertisementImage.STATUS_PROCESSING)
+            .values_list("id", flat=True)
+        )
+        for image_id in image_ids:
+            process_image(image_id)
+
+        summary = AdvertisementImage.objects.filter(id__in=image_ids)
+        ready = summary.filter(status=AdvertisementImage.STATUS_READY).count()
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(image_ids)} images, {ready} ready."))
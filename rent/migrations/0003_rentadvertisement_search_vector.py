@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:51
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+FTS_TABLE = 'rent_rentadvertisement_fts'
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Build the backend-specific search index and fill it for existing ads.
+    The GIN index is created here rather than in Meta.indexes because it
+    only exists on PostgreSQL; SQLite gets an FTS5 table instead.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS rent_ad_search_vector_gin "
+            "ON rent_rentadvertisement USING GIN (search_vector)"
+        )
+        schema_editor.execute(
+            "UPDATE rent_rentadvertisement SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(title, description)"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description) "
+            "SELECT id, title, description FROM rent_rentadvertisement"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS rent_ad_search_vector_gin")
+    elif vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rentadvertisement',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Weighted full-text search vector built from the title and description.', null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0003_rentadvertisement_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rentadvertisement',
+            index=models.Index(fields=['approved', '-created_at'], name='rent_ad_approved_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentadvertisement',
+            index=models.Index(fields=['approved', 'price'], name='rent_ad_approved_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentadvertisement',
+            index=models.Index(fields=['category', 'approved', 'price'], name='rent_ad_cat_appr_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentadvertisement',
+            index=models.Index(fields=['category', 'approved', '-created_at'], name='rent_ad_cat_appr_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentadvertisement',
+            index=models.Index(condition=models.Q(('approved', False)), fields=['created_at'], name='rent_ad_pending_created_idx'),
+        ),
+    ]
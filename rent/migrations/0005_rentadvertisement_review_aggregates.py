@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:54
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_review_aggregates(apps, schema_editor):
+    RentAdvertisement = apps.get_model('rent', 'RentAdvertisement')
+    Review = apps.get_model('rent', 'Review')
+    reviews = Review.objects.filter(advertisement=OuterRef('pk')).values('advertisement')
+    RentAdvertisement.objects.update(
+        review_count=Coalesce(Subquery(reviews.annotate(count=Count('id')).values('count')), 0),
+        rating_avg=Coalesce(
+            Subquery(reviews.annotate(avg=Avg('rating')).values('avg')),
+            0,
+            output_field=models.DecimalField(max_digits=3, decimal_places=2),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0004_rentadvertisement_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rentadvertisement',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Average review rating, maintained when reviews change.', max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='rentadvertisement',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of reviews, maintained when reviews change.'),
+        ),
+        migrations.RunPython(backfill_review_aggregates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='rentadvertisement',
+            index=models.Index(fields=['approved', '-rating_avg'], name='rent_ad_approved_rating_idx'),
+        ),
+    ]
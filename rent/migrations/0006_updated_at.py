@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0005_rentadvertisement_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advertisementimage',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Timestamp when the image was last modified.'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Timestamp when the category was last modified.'),
+        ),
+        migrations.AddField(
+            model_name='rentadvertisement',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Timestamp when the advertisement, its images or its reviews last changed.'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Timestamp when the review was last modified.'),
+        ),
+    ]
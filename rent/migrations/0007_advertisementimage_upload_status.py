@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:01
+
+import cloudinary.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advertisementimage',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Number of attempts made to push the image to storage.'),
+        ),
+        migrations.AddField(
+            model_name='advertisementimage',
+            name='error',
+            field=models.CharField(blank=True, default='', help_text='Last upload error, if any.', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='advertisementimage',
+            name='staged_path',
+            field=models.CharField(blank=True, default='', help_text='Local staging path of the file while it is being uploaded.', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='advertisementimage',
+            name='status',
+            field=models.CharField(choices=[('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', help_text='Upload status of the image.', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='advertisementimage',
+            name='image',
+            field=cloudinary.models.CloudinaryField(blank=True, help_text='Image file stored in Cloudinary.', max_length=255, null=True, verbose_name='image'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0007_advertisementimage_upload_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advertisementimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Stored derivatives (thumbnails, WebP/AVIF) keyed by variant name.'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from cloudinary.models import CloudinaryField
 
 
@@ -11,6 +12,10 @@ class Category(models.Model):
         max_length=100,
         help_text="Name of the category."
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Timestamp when the category was last modified."
+    )
 
     def __str__(self):
         return self.name
@@ -52,6 +57,47 @@ class RentAdvertisement(models.Model):
         auto_now_add=True,
         help_text="Timestamp when the advertisement was created."
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Timestamp when the advertisement, its images or its reviews last changed."
+    )
+    rating_avg = models.DecimalField(
+        max_digits=3,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Average review rating, maintained when reviews change."
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of reviews, maintained when reviews change."
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text="Weighted full-text search vector built from the title and description."
+    )
+
+    class Meta:
+        indexes = [
+            # Default feed: approved ads, newest first.
+            models.Index(fields=["approved", "-created_at"], name="rent_ad_approved_created_idx"),
+            # Approved feed sorted by price.
+            models.Index(fields=["approved", "price"], name="rent_ad_approved_price_idx"),
+            # Category listings filtered by approval and sorted by price.
+            models.Index(fields=["category", "approved", "price"], name="rent_ad_cat_appr_price_idx"),
+            # Category listings filtered by approval, newest first.
+            models.Index(fields=["category", "approved", "-created_at"], name="rent_ad_cat_appr_created_idx"),
+            # Approved feed sorted by rating.
+            models.Index(fields=["approved", "-rating_avg"], name="rent_ad_approved_rating_idx"),
+            # Small moderation queue of pending ads.
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(approved=False),
+                name="rent_ad_pending_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -60,7 +106,18 @@ class RentAdvertisement(models.Model):
 class AdvertisementImage(models.Model):
     """
     Model representing images for a rental advertisement.
+    Uploads are staged locally and pushed to storage in the background,
+    so an image starts out `processing` without a stored file.
     """
+    STATUS_PROCESSING = "processing"
+    STATUS_READY = "ready"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_PROCESSING, "Processing"),
+        (STATUS_READY, "Ready"),
+        (STATUS_FAILED, "Failed"),
+    )
+
     advertisement = models.ForeignKey(
         RentAdvertisement,
         on_delete=models.CASCADE,
@@ -69,8 +126,41 @@ class AdvertisementImage(models.Model):
     )
     image = CloudinaryField(
         "image",
+        blank=True,
+        null=True,
         help_text="Image file stored in Cloudinary."
     )
+    variants = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Stored derivatives (thumbnails, WebP/AVIF) keyed by variant name."
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_READY,
+        help_text="Upload status of the image."
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Number of attempts made to push the image to storage."
+    )
+    error = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        help_text="Last upload error, if any."
+    )
+    staged_path = models.CharField(
+        max_length=500,
+        blank=True,
+        default="",
+        help_text="Local staging path of the file while it is being uploaded."
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Timestamp when the image was last modified."
+    )
     
     def __str__(self):
         return f'Image for {self.advertisement.title}'
@@ -171,6 +261,10 @@ class Review(models.Model):
         auto_now_add=True,
         help_text="Timestamp when the review was created."
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Timestamp when the review was last modified."
+    )
 
     class Meta:
         unique_together = ("advertisement", "user")
@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from rent.models import RentAdvertisement
+
+
+class BaseSearchBackend:
+    """
+    Interface for advertisement full-text search backends.
+    A backend keeps its index in sync with advertisements and turns a
+    search term into a filtered, ranked queryset.
+    """
+
+    def index(self, ad):
+        raise NotImplementedError
+
+    def remove(self, ad_id):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def search(self, queryset, query):
+        """
+        Filter `queryset` to matching ads and annotate a `search_rank`
+        where a higher value means a better match.
+        """
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Search backed by the `search_vector` column and its GIN index.
+    Title terms are weighted above description terms.
+    """
+    config = "english"
+
+    def get_vector(self):
+        from django.contrib.postgres.search import SearchVector
+
+        return (
+            SearchVector("title", weight="A", config=self.config)
+            + SearchVector("description", weight="B", config=self.config)
+        )
+
+    def index(self, ad):
+        RentAdvertisement.objects.filter(pk=ad.pk).update(search_vector=self.get_vector())
+
+    def remove(self, ad_id):
+        # The vector lives on the advertisement row and is deleted with it.
+        pass
+
+    def rebuild(self):
+        RentAdvertisement.objects.update(search_vector=self.get_vector())
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(query, search_type="websearch", config=self.config)
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F("search_vector"), search_query)
+        )
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    Search backed by an FTS5 virtual table, used for local development and tests.
+    """
+    table = "rent_rentadvertisement_fts"
+    # bm25() column weights for (title, description).
+    weights = (10.0, 1.0)
+
+    def index(self, ad):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [ad.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, description) VALUES (%s, %s, %s)",
+                [ad.pk, ad.title, ad.description],
+            )
+
+    def remove(self, ad_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [ad_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, description) "
+                f"SELECT id, title, description FROM {RentAdvertisement._meta.db_table}"
+            )
+
+    def to_match_expression(self, query):
+        # Quote every term so user input can never be parsed as FTS5 syntax.
+        terms = ['"%s"' % term.replace('"', '""') for term in query.split()]
+        return " ".join(terms)
+
+    def search(self, queryset, query):
+        match = self.to_match_expression(query)
+        if not match:
+            return queryset
+        ad_table = RentAdvertisement._meta.db_table
+        title_weight, description_weight = self.weights
+        # bm25() is only defined inside a MATCH query on the FTS table, so the
+        # rank is a correlated subquery over it.
+        rank = RawSQL(
+            f"SELECT -bm25({self.table}, {title_weight}, {description_weight}) FROM {self.table} "
+            f"WHERE {self.table} MATCH %s AND {self.table}.rowid = {ad_table}.id",
+            [match],
+            output_field=FloatField(),
+        )
+        matches = RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [match])
+        return queryset.filter(id__in=matches).annotate(search_rank=rank)
+
+
+def get_search_backend():
+    """
+    Return the search backend configured by `RENT_SEARCH_BACKEND`,
+    or the one matching the default database vendor.
+    """
+    backend_path = getattr(settings, "RENT_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)()
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    return SQLiteSearchBackend()
+
+
+class AdvertisementSearchFilter(filters.SearchFilter):
+    """
+    Full-text search filter for advertisements.
+    Results are ordered by relevance unless the client asks for an explicit ordering.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = " ".join(self.get_search_terms(request))
+        if not query:
+            return queryset
+        queryset = get_search_backend().search(queryset, query)
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        return queryset.order_by("-search_rank", "-created_at")
+
@@ -1,8 +1,64 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from rent.models import Category, RentAdvertisement, AdvertisementImage, RentRequest, Favorite, Review
+from rent.storage import get_image_storage
+from rent.uploads import create_pending_images
+from users.validators import validate_file_size
 from django.contrib.auth import get_user_model
 
 
+def parse_field_list(value):
+    """
+    Split a comma-separated query parameter into a set of field names.
+    """
+    if not value:
+        return set()
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    Lets clients shape read responses with query parameters:
+
+    - `?fields=id,title` returns only the listed fields.
+    - `?omit=reviews` drops the listed fields.
+    - `?expand=category` replaces a primary key with the nested object for
+      fields declared in `expandable_fields`.
+
+    Only serializers built by a view (with the request in their context) are
+    affected, and only for safe methods, so input validation never changes.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None:
+            return
+        selected, expanded = self.get_field_selection(request)
+        for field_name in list(self.fields):
+            if field_name not in selected:
+                self.fields.pop(field_name)
+        for field_name in expanded:
+            self.fields[field_name] = self.expandable_fields[field_name](read_only=True)
+
+    @classmethod
+    def get_field_selection(cls, request):
+        """
+        Return the field names to render and the field names to expand.
+        Views use this to trim their queryset to the same selection.
+        """
+        field_names = set(cls.Meta.fields)
+        if request is None or request.method not in SAFE_METHODS:
+            return field_names, set()
+        params = request.query_params
+        only = parse_field_list(params.get("fields"))
+        omit = parse_field_list(params.get("omit"))
+        selected = {name for name in field_names if (not only or name in only) and name not in omit}
+        expanded = parse_field_list(params.get("expand")) & selected & set(cls.expandable_fields)
+        return selected, expanded
+
+
 class EmptySerializer(serializers.Serializer):
     """
     Empty serializer used for endpoints that don't require a request body.
@@ -11,17 +67,77 @@ class EmptySerializer(serializers.Serializer):
     pass
 
 
-class AdvertisementImageSerializer(serializers.ModelSerializer):
+class BulkModerationSerializer(serializers.Serializer):
+    """
+    Serializer for approving or rejecting several advertisements at once.
+    """
+    ACTION_CHOICES = (
+        ("approve", "Approve"),
+        ("reject", "Reject"),
+    )
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+        help_text="IDs of the advertisements to moderate."
+    )
+    action = serializers.ChoiceField(
+        choices=ACTION_CHOICES,
+        help_text="`approve` publishes the ads, `reject` marks them as not approved."
+    )
+
+
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer for property categories.
+    """
+    name = serializers.CharField(help_text="Name of the category.")
+
+    class Meta:
+        model = Category
+        fields = ["id", "name"]
+
+
+class StoredImageField(serializers.ImageField):
+    """
+    Image upload field that renders the URL from the configured image storage.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = get_image_storage().url(value)
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request is not None else url
+
+
+class AdvertisementImageSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for handling advertisement images.
+    `image` is empty until the background upload has finished; poll `status`.
     """
-    image = serializers.ImageField(
+    image = StoredImageField(
         help_text="Upload an image file for the advertisement."
     )
+    variants = serializers.SerializerMethodField(
+        method_name='get_variants',
+        help_text="URLs of the resized derivatives keyed by variant name, e.g. `thumb_webp`."
+    )
 
     class Meta:
         model = AdvertisementImage
-        fields = ["id", "image"]
+        fields = ["id", "image", "variants", "status", "error"]
+        read_only_fields = ["status", "error"]
+
+    def get_variants(self, obj):
+        storage = get_image_storage()
+        request = self.context.get("request")
+        urls = {}
+        for variant, identifier in obj.variants.items():
+            url = storage.url(identifier)
+            urls[variant] = request.build_absolute_uri(url) if request is not None else url
+        return urls
 
 
 class SimpleUserSerializer(serializers.ModelSerializer):
@@ -47,17 +163,14 @@ class SimpleAdvertisementSerializer(serializers.ModelSerializer):
         fields = ['id', 'title']
 
 
-class GetFavoriteSerializer(serializers.ModelSerializer):
+class GetFavoriteSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for retrieving a user's favorite advertisements.
     Includes user and simplified advertisement details.
     """
-    user = serializers.SerializerMethodField(method_name='get_user', help_text="Details of the user who favorited.")
+    user = SimpleUserSerializer(read_only=True, help_text="Details of the user who favorited.")
     advertisement = SimpleAdvertisementSerializer(help_text="Basic advertisement information.")
 
-    def get_user(self, obj):
-        return SimpleUserSerializer(obj.user).data
-
     class Meta:
         model = Favorite
         fields = ["id", "user", "advertisement"]
@@ -78,14 +191,11 @@ class FavoriteSerializer(serializers.ModelSerializer):
         fields = ["advertisement"]
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for reviews on advertisements.
     """
-    user = serializers.SerializerMethodField(method_name='get_user', help_text="Details of the reviewer.")
-
-    def get_user(self, obj):
-        return SimpleUserSerializer(obj.user).data
+    user = SimpleUserSerializer(read_only=True, help_text="Details of the reviewer.")
 
     class Meta:
         model = Review
@@ -93,30 +203,87 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ["advertisement", "user", "created_at"]
 
 
-class RentAdvertisementSerializer(serializers.ModelSerializer):
+class RentAdvertisementSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for retrieving rental advertisement details.
     Includes images and reviews.
     """
     images = AdvertisementImageSerializer(many=True, required=False, read_only=True)
-    owner = serializers.ReadOnlyField(source="owner.id", help_text="ID of the advertisement owner.")
+    owner = serializers.ReadOnlyField(source="owner_id", help_text="ID of the advertisement owner.")
     reviews = ReviewSerializer(many=True, read_only=True)
+    expandable_fields = {"category": CategorySerializer, "owner": SimpleUserSerializer}
 
     class Meta:
         model = RentAdvertisement
         fields = [
             "id", "owner", "category", "title", "description", "price",
-            "approved", "created_at", "images", "reviews"
+            "approved", "created_at", "rating_avg", "review_count", "images", "reviews"
         ]
 
 
+class RentAdvertisementListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer for advertisement listings.
+    Returns review aggregates instead of the nested reviews.
+    """
+    images = AdvertisementImageSerializer(many=True, read_only=True)
+    owner = serializers.ReadOnlyField(source="owner_id", help_text="ID of the advertisement owner.")
+    expandable_fields = {"category": CategorySerializer, "owner": SimpleUserSerializer}
+
+    class Meta:
+        model = RentAdvertisement
+        fields = [
+            "id", "owner", "category", "title", "description", "price",
+            "approved", "created_at", "rating_avg", "review_count", "images"
+        ]
+
+
+class ModerationAdvertisementSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Lightweight advertisement serializer for the moderation queue.
+    Includes images but leaves out reviews.
+    """
+    images = AdvertisementImageSerializer(many=True, read_only=True)
+    owner = serializers.ReadOnlyField(source="owner_id", help_text="ID of the advertisement owner.")
+
+    class Meta:
+        model = RentAdvertisement
+        fields = [
+            "id", "owner", "category", "title", "description", "price",
+            "created_at", "images"
+        ]
+
+
+class AdvertisementImageBatchSerializer(serializers.Serializer):
+    """
+    Serializer for uploading several images of an advertisement in one request.
+    Every file is validated before any of them is stored.
+    """
+    MAX_IMAGES = 20
+
+    images = serializers.ListField(
+        child=serializers.ImageField(validators=[validate_file_size]),
+        allow_empty=False,
+        max_length=MAX_IMAGES,
+        help_text="Image files to attach to the advertisement."
+    )
+
+
 class RentAdvertisementCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating a rental advertisement.
     """
+    images = serializers.ListField(
+        child=serializers.ImageField(validators=[validate_file_size]),
+        write_only=True,
+        required=False,
+        max_length=AdvertisementImageBatchSerializer.MAX_IMAGES,
+        help_text="Optional image files, uploaded in the background after the advertisement is created."
+    )
+
     class Meta:
         model = RentAdvertisement
-        fields = ["category", "title", "description", "price"]
+        fields = ["category", "title", "description", "price", "images"]
 
     def create(self, validated_data):
         """
@@ -124,12 +291,12 @@ class RentAdvertisementCreateSerializer(serializers.ModelSerializer):
         """
         images = validated_data.pop("images", [])
         ad = RentAdvertisement.objects.create(**validated_data)
-        for image in images:
-            AdvertisementImage.objects.create(advertisement=ad, image=image)
+        if images:
+            create_pending_images(ad.id, images)
         return ad
 
 
-class RentRequestSerializer(serializers.ModelSerializer):
+class RentRequestSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for retrieving rental requests.
     """
@@ -153,14 +320,3 @@ class RentRequestCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = RentRequest
         fields = ["message"]
-
-
-class CategorySerializer(serializers.ModelSerializer):
-    """
-    Serializer for property categories.
-    """
-    name = serializers.CharField(help_text="Name of the category.")
-
-    class Meta:
-        model = Category
-        fields = ["id", "name"]
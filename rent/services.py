@@ -0,0 +1,100 @@
+from django.db import models, transaction
+from django.db.models import Avg, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from rent.cache import invalidate_on_commit
+from rent.models import RentAdvertisement, RentRequest, Review
+from rent.signals import advertisements_approval_changed, rent_request_accepted, rent_requests_closed
+
+
+def set_advertisements_approval(ad_ids, approved):
+    """
+    Approve or reject advertisements in one `UPDATE ... WHERE id IN (...)`.
+
+    Only `approved` (and `updated_at`) are written, and only for ads whose
+    state actually changes. Returns a dict mapping every requested id to one of
+    "approved", "rejected", "unchanged" or "not_found".
+    """
+    ad_ids = list(dict.fromkeys(ad_ids))
+    with transaction.atomic():
+        current = dict(
+            RentAdvertisement.objects.select_for_update()
+            .filter(id__in=ad_ids)
+            .values_list("id", "approved")
+        )
+        changed = [ad_id for ad_id, value in current.items() if value != approved]
+        if changed:
+            RentAdvertisement.objects.filter(id__in=changed).update(
+                approved=approved, updated_at=timezone.now()
+            )
+            advertisements_approval_changed.send(
+                sender=RentAdvertisement, ad_ids=changed, approved=approved
+            )
+            invalidate_on_commit("ads")
+
+    changed = set(changed)
+    outcomes = {}
+    for ad_id in ad_ids:
+        if ad_id not in current:
+            outcomes[ad_id] = "not_found"
+        elif ad_id in changed:
+            outcomes[ad_id] = "approved" if approved else "rejected"
+        else:
+            outcomes[ad_id] = "unchanged"
+    return outcomes
+
+
+def refresh_review_aggregates(ad_id):
+    """
+    Recompute `rating_avg` and `review_count` for one advertisement.
+
+    Both values are derived from the reviews table inside a single UPDATE.
+    The advertisement row is locked first, so concurrent review writes for
+    the same ad run one after the other. Each UPDATE then starts after the
+    previous transaction committed and sees its review. Call it in the same
+    transaction as the review change.
+    """
+    list(RentAdvertisement.objects.select_for_update().filter(pk=ad_id).values_list("pk"))
+    reviews = Review.objects.filter(advertisement=OuterRef("pk")).values("advertisement")
+    RentAdvertisement.objects.filter(pk=ad_id).update(
+        review_count=Coalesce(Subquery(reviews.annotate(count=Count("id")).values("count")), 0),
+        rating_avg=Coalesce(
+            Subquery(reviews.annotate(avg=Avg("rating")).values("avg")),
+            0,
+            output_field=models.DecimalField(max_digits=3, decimal_places=2),
+        ),
+    )
+    invalidate_on_commit("ads")
+
+
+def accept_rent_request(rent_request):
+    """
+    Accept a rent request and close every other open request for the same
+    advertisement, in one transaction.
+    """
+    with transaction.atomic():
+        rent_request.status = "accepted"
+        rent_request.save()
+        # Lock the requests being closed so receivers of
+        # `rent_request_accepted` see exactly the rows that changed.
+        closed_requests = list(
+            RentRequest.objects.select_for_update()
+            .filter(advertisement_id=rent_request.advertisement_id)
+            .exclude(id=rent_request.id)
+            .exclude(status="closed")
+            .only("id", "sender", "advertisement")
+        )
+        closed = RentRequest.objects.filter(
+            id__in=[request.id for request in closed_requests]
+        ).update(status="closed")
+        for request in closed_requests:
+            request.status = "closed"
+        if closed:
+            rent_requests_closed.send(
+                sender=RentRequest, advertisement=rent_request.advertisement, count=closed
+            )
+        rent_request_accepted.send(
+            sender=RentRequest, rent_request=rent_request, closed_requests=closed_requests
+        )
+    return rent_request
@@ -0,0 +1,60 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from rent.cache import invalidate_on_commit
+from rent.models import Category, RentAdvertisement, AdvertisementImage, Review
+from rent.search import get_search_backend
+
+
+SEARCH_INDEXED_FIELDS = {"title", "description"}
+
+# Sent by rent.services after a bulk UPDATE of `approved`, which skips
+# model signals. Arguments: `ad_ids` (the ads that changed) and `approved`.
+advertisements_approval_changed = Signal()
+
+# Sent by rent.services after other requests for an ad are closed in bulk.
+# Arguments: `advertisement` and `count` (how many requests were closed).
+rent_requests_closed = Signal()
+
+# Sent by rent.services inside the transaction that accepts a request.
+# Arguments: `rent_request` (the accepted request) and `closed_requests`
+# (the other requests it closed).
+rent_request_accepted = Signal()
+
+
+@receiver(post_save, sender=RentAdvertisement)
+def index_advertisement(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the full-text search index in sync when an ad's text changes.
+    """
+    if update_fields is not None and not SEARCH_INDEXED_FIELDS & set(update_fields):
+        return
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=RentAdvertisement)
+def unindex_advertisement(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=AdvertisementImage)
+@receiver([post_save, post_delete], sender=Review)
+def touch_advertisement(sender, instance, **kwargs):
+    """
+    Bump the parent ad's `updated_at` so its validators change with its images and reviews.
+    """
+    RentAdvertisement.objects.filter(pk=instance.advertisement_id).update(updated_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=RentAdvertisement)
+@receiver([post_save, post_delete], sender=AdvertisementImage)
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_advertisement_cache(sender, **kwargs):
+    invalidate_on_commit("ads")
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_cache(sender, **kwargs):
+    # Ads embed their category when expanded, so both namespaces go stale.
+    invalidate_on_commit("categories", "ads")
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+from cloudinary import uploader
+from cloudinary.models import CloudinaryField, CloudinaryResource
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.module_loading import import_string
+
+
+class ImageStorage:
+    """
+    Interface for the backend that advertisement images are pushed to.
+    Stored identifiers are strings kept in `AdvertisementImage.image` and
+    `AdvertisementImage.variants`.
+    """
+
+    def save(self, path, name):
+        """
+        Store the local file at `path` under `name` (without extension)
+        and return the stored identifier.
+        """
+        raise NotImplementedError
+
+    def url(self, value):
+        """
+        Return the public URL of a stored identifier or of the
+        `CloudinaryResource` the image field parses it into.
+        """
+        raise NotImplementedError
+
+
+class CloudinaryImageStorage(ImageStorage):
+    """
+    Push images to Cloudinary, the production storage.
+    """
+
+    def save(self, path, name):
+        return uploader.upload_resource(path, public_id=name, resource_type="image").get_prep_value()
+
+    def url(self, value):
+        if not isinstance(value, CloudinaryResource):
+            value = CloudinaryField("image").to_python(value)
+        return value.url
+
+
+class FileSystemImageStorage(ImageStorage):
+    """
+    Keep images on the local filesystem under MEDIA_ROOT.
+    Used for local development and tests.
+    """
+
+    def __init__(self, location=None, base_url=None):
+        self.storage = FileSystemStorage(
+            location=location or settings.MEDIA_ROOT,
+            base_url=base_url or settings.MEDIA_URL,
+        )
+
+    def save(self, path, name):
+        with open(path, "rb") as source:
+            return self.storage.save(f"{name}{Path(path).suffix}", File(source))
+
+    def url(self, value):
+        if isinstance(value, CloudinaryResource):
+            # CloudinaryField parses stored names into public_id and format.
+            value = f"{value.public_id}.{value.format}" if value.format else value.public_id
+        return self.storage.url(value)
+
+
+def get_image_storage():
+    """
+    Return the image storage configured by `RENT_IMAGE_STORAGE`.
+    """
+    return import_string(settings.RENT_IMAGE_STORAGE)()
@@ -1,3 +1,908 @@
-from django.test import TestCase
+import importlib
+import json
+from decimal import Decimal
+from io import BytesIO
+import tempfile
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+import api.urls
+from rent.async_views import AdvertisementDetailView, AdvertisementListView, ReviewListView
+from rent.cache import get_cache_stats, get_generation
+from rent.checks import check_response_cache
+from rent.models import AdvertisementImage, Category, Favorite, RentAdvertisement, RentRequest, Review
+from rent.search import SQLiteSearchBackend
+from rent.serializers import AdvertisementImageSerializer
+from rent.signals import advertisements_approval_changed
+from rent.storage import FileSystemImageStorage
+from rent.uploads import create_pending_images, process_image
+
+
+def create_ad(owner, **fields):
+    fields.setdefault("category", Category.objects.get_or_create(name="Flat")[0])
+    fields.setdefault("title", "Flat in Gulshan")
+    fields.setdefault("description", "Two bedrooms.")
+    fields.setdefault("price", 25000)
+    return RentAdvertisement.objects.create(owner=owner, **fields)
+
+
+def png_upload(name, size=(8, 8), color="red"):
+    import PIL.Image
+
+    buffer = BytesIO()
+    PIL.Image.new("RGB", size, color).save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class ProcessImageTests(TestCase):
+    """
+    Staged files left behind by `rent.uploads.process_image`.
+    """
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        self.ad = create_ad(owner)
+        self.staging = Path(tempfile.mkdtemp())
+        self.staged = self.staging / "photo.jpg"
+        self.staged.write_bytes(b"jpeg")
+        self.variant = self.staging / "photo_thumb.webp"
+        self.variant.write_bytes(b"webp")
+        self.image = AdvertisementImage.objects.create(
+            advertisement=self.ad,
+            status=AdvertisementImage.STATUS_PROCESSING,
+            staged_path=str(self.staged),
+        )
+
+    def process_losing_claim(self, other_worker_status):
+        def lose_claim(image):
+            AdvertisementImage.objects.filter(pk=image.pk).update(status=other_worker_status)
+            return False
+
+        with mock.patch("rent.uploads.generate_variants", return_value={"thumb_webp": str(self.variant)}), \
+                mock.patch("rent.uploads.claim_attempt", side_effect=lose_claim):
+            process_image(self.image.pk)
+
+    def test_losing_the_claim_to_a_finished_worker_removes_variants(self):
+        self.process_losing_claim(AdvertisementImage.STATUS_READY)
+        self.assertFalse(self.variant.exists())
+
+    def test_losing_the_claim_to_a_running_worker_keeps_its_variants(self):
+        self.process_losing_claim(AdvertisementImage.STATUS_PROCESSING)
+        self.assertTrue(self.variant.exists())
+
+
+@override_settings(
+    RENT_IMAGE_STORAGE="rent.storage.FileSystemImageStorage",
+    RENT_UPLOAD_MAX_ATTEMPTS=3,
+    RENT_UPLOAD_RETRY_BACKOFF=0.5,
+)
+class ProcessImageRetryTests(TestCase):
+    """
+    `rent.uploads.process_image` retries failed uploads with backoff and
+    gives up after `RENT_UPLOAD_MAX_ATTEMPTS`.
+    """
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        self.ad = create_ad(owner)
+        self.media = Path(tempfile.mkdtemp())
+        media = override_settings(MEDIA_ROOT=str(self.media))
+        media.enable()
+        self.addCleanup(media.disable)
+        self.staged = Path(tempfile.mkdtemp()) / "photo.jpg"
+        self.staged.write_bytes(b"jpeg")
+        self.image = AdvertisementImage.objects.create(
+            advertisement=self.ad,
+            status=AdvertisementImage.STATUS_PROCESSING,
+            staged_path=str(self.staged),
+        )
+
+    def process(self, failures):
+        """
+        Run `process_image` with storage failing `failures` times first;
+        return the backoff delays slept.
+        """
+        save = FileSystemImageStorage.save
+        calls = []
+
+        def flaky_save(storage, path, name):
+            calls.append(name)
+            if len(calls) <= failures:
+                raise ConnectionResetError("connection reset by peer")
+            return save(storage, path, name)
+
+        with mock.patch("rent.uploads.generate_variants", return_value={}), \
+                mock.patch.object(FileSystemImageStorage, "save", flaky_save), \
+                mock.patch("rent.uploads.time.sleep") as sleep:
+            if failures:
+                with self.assertLogs("rent.uploads", "WARNING"):
+                    process_image(self.image.pk)
+            else:
+                process_image(self.image.pk)
+        self.image.refresh_from_db()
+        return [call.args[0] for call in sleep.call_args_list]
+
+    def test_success(self):
+        self.assertEqual(self.process(failures=0), [])
+        self.assertEqual(self.image.status, AdvertisementImage.STATUS_READY)
+        self.assertEqual(self.image.attempts, 1)
+        self.assertEqual(self.image.staged_path, "")
+        self.assertEqual((self.media / "ads" / str(self.ad.pk) / "photo.jpg").read_bytes(), b"jpeg")
+        self.assertFalse(self.staged.exists())
+
+    def test_transient_failure_is_retried(self):
+        self.assertEqual(self.process(failures=1), [0.5])
+        self.assertEqual(self.image.status, AdvertisementImage.STATUS_READY)
+        self.assertEqual(self.image.attempts, 2)
+        self.assertEqual(self.image.error, "")
+
+    def test_exhausted_attempts_fail(self):
+        self.assertEqual(self.process(failures=3), [0.5, 1.0])
+        self.assertEqual(self.image.status, AdvertisementImage.STATUS_FAILED)
+        self.assertEqual(self.image.attempts, 3)
+        self.assertEqual(self.image.error, "connection reset by peer")
+        # Kept for a later retry.
+        self.assertTrue(self.staged.exists())
+
+
+@override_settings(
+    RENT_IMAGE_STORAGE="rent.storage.FileSystemImageStorage",
+    RENT_IMAGE_VARIANT_PROCESSES=0,
+)
+class ImageVariantTests(TestCase):
+    """
+    Derivatives built by `process_image` and their URLs in
+    `AdvertisementImageSerializer.variants`.
+    """
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        self.ad = create_ad(owner)
+        self.media = Path(tempfile.mkdtemp())
+        media = override_settings(MEDIA_ROOT=str(self.media))
+        media.enable()
+        self.addCleanup(media.disable)
+        staged = Path(tempfile.mkdtemp()) / "photo.png"
+        staged.write_bytes(png_upload("photo.png", size=(640, 400)).read())
+        self.image = AdvertisementImage.objects.create(
+            advertisement=self.ad,
+            status=AdvertisementImage.STATUS_PROCESSING,
+            staged_path=str(staged),
+        )
+        process_image(self.image.pk)
+        self.image.refresh_from_db()
+
+    def test_ready_image_has_variants(self):
+        import PIL.Image
+        from rent.images import supported_formats
+
+        self.assertEqual(self.image.status, AdvertisementImage.STATUS_READY)
+        formats = supported_formats(["webp", "avif"])
+        self.assertIn("webp", formats)
+        self.assertEqual(
+            set(self.image.variants),
+            {f"{variant}_{fmt}" for variant in ("thumb", "medium") for fmt in formats},
+        )
+        directory = self.media / "ads" / str(self.ad.pk)
+        for fmt in formats:
+            with PIL.Image.open(directory / f"photo_thumb_{fmt}.{fmt}") as thumb:
+                self.assertEqual((thumb.format, thumb.size), (fmt.upper(), (320, 240)))
+        with PIL.Image.open(directory / "photo_medium_webp.webp") as medium:
+            self.assertEqual(medium.size, (640, 400))
+
+    def test_serializer_returns_variant_urls(self):
+        request = Request(APIRequestFactory().get("/"))
+        data = AdvertisementImageSerializer(self.image, context={"request": request}).data
+        self.assertEqual(set(data["variants"]), set(self.image.variants))
+        self.assertEqual(
+            data["variants"]["thumb_webp"],
+            f"http://testserver/media/ads/{self.ad.pk}/photo_thumb_webp.webp",
+        )
+        self.assertEqual(data["image"], f"http://testserver/media/ads/{self.ad.pk}/photo.png")
+
+
+class CreatePendingImagesTests(TestCase):
+    """
+    `rent.uploads.create_pending_images` bulk-creates rows, so it has to do
+    the work of the post_save receivers itself.
+    """
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        self.ad = create_ad(owner)
+        self.upload = SimpleUploadedFile("photo.jpg", b"jpeg", content_type="image/jpeg")
+
+    def create_images(self):
+        with override_settings(RENT_UPLOAD_STAGING_DIR=tempfile.mkdtemp()), \
+                mock.patch("rent.uploads.enqueue_images") as enqueue_images, \
+                self.captureOnCommitCallbacks(execute=True):
+            images = create_pending_images(self.ad.pk, [self.upload])
+        enqueue_images.assert_called_once_with([image.pk for image in images])
+
+    def test_touches_the_advertisement(self):
+        updated_at = self.ad.updated_at
+        self.create_images()
+        self.ad.refresh_from_db()
+        self.assertGreater(self.ad.updated_at, updated_at)
+
+    def test_invalidates_cached_advertisements(self):
+        generation = get_generation("ads")
+        self.create_images()
+        self.assertNotEqual(get_generation("ads"), generation)
+
+
+class CollectionValidatorTests(APITestCase):
+    """
+    Lists are validated by ETag only: Last-Modified cannot see deletions.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw12345!")
+        self.admin = User.objects.create_superuser("admin@example.com", "pw12345!")
+        self.ad = create_ad(self.owner)
+        self.reviews = [
+            Review.objects.create(
+                advertisement=self.ad,
+                user=User.objects.create_user(f"user{index}@example.com", "pw12345!"),
+                rating=4,
+            )
+            for index in range(2)
+        ]
+
+    def assertChangesAfterDelete(self, url, user, deleted):
+        self.client.force_authenticate(user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+
+        deleted.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+
+    def test_review_list(self):
+        url = reverse("ad-reviews-list", kwargs={"ad_pk": self.ad.pk})
+        self.assertChangesAfterDelete(url, self.owner, self.reviews[0])
+
+    def test_pending_list(self):
+        create_ad(self.owner)
+        self.assertChangesAfterDelete(reverse("ads-pending"), self.admin, self.ad)
+
+
+class AsyncReadViewTests(APITestCase):
+    """
+    The async read views answer like the sync endpoints, errors included.
+    """
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw12345!")
+        self.token = str(AccessToken.for_user(self.owner))
+        self.ad = create_ad(self.owner)
+        create_ad(self.owner, title="Flat in Banani")
+        Review.objects.create(advertisement=self.ad, user=self.owner, rating=5, comment="Nice.")
+
+    async def compare(self, view, path, token=None, **kwargs):
+        """
+        Request `path` from the sync endpoint and from `view`, and check
+        that both answer alike.
+        """
+        headers = {"Authorization": f"JWT {token}"} if token else {}
+        expected = await sync_to_async(self.client.get)(path, headers=headers)
+        response = await view.as_view()(AsyncRequestFactory().get(path, headers=headers), **kwargs)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+        self.assertEqual(response.get("WWW-Authenticate"), expected.get("WWW-Authenticate"))
+        return response
+
+    async def test_list(self):
+        response = await self.compare(AdvertisementListView, "/api/v1/ads/", self.token)
+        self.assertEqual(len(json.loads(response.content)["results"]), 2)
+
+    async def test_nested_list(self):
+        path = f"/api/v1/ads/{self.ad.pk}/reviews/"
+        await self.compare(ReviewListView, path, self.token, ad_pk=str(self.ad.pk))
+
+    async def test_detail(self):
+        path = f"/api/v1/ads/{self.ad.pk}/"
+        response = await self.compare(AdvertisementDetailView, path, self.token, pk=str(self.ad.pk))
+        self.assertEqual(response.status_code, 200)
+
+    async def test_missing_detail(self):
+        response = await self.compare(AdvertisementDetailView, "/api/v1/ads/999999/", self.token, pk="999999")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_unauthenticated(self):
+        response = await self.compare(AdvertisementListView, "/api/v1/ads/")
+        self.assertEqual(response.status_code, 401)
+
+    async def test_invalid_token(self):
+        response = await self.compare(AdvertisementListView, "/api/v1/ads/", "not-a-token")
+        self.assertEqual(response.status_code, 401)
+
+    async def test_writes_are_not_allowed(self):
+        request = AsyncRequestFactory().post("/api/v1/ads/", headers={"Authorization": f"JWT {self.token}"})
+        response = await AdvertisementListView.as_view()(request)
+        self.assertEqual(response.status_code, 405)
+
+    def test_routes_follow_the_setting(self):
+        self.addCleanup(importlib.reload, api.urls)
+        for enabled in (False, True):
+            with self.subTest(enabled=enabled), override_settings(RENT_ASYNC_VIEWS=enabled):
+                names = {getattr(pattern, "name", None) for pattern in importlib.reload(api.urls).urlpatterns}
+                self.assertEqual("async-ads-list" in names, enabled)
+
+
+class ResponseCacheTests(APITestCase):
+    """
+    Response caching and generation ETags only run on a shared cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        create_ad(self.owner)
+        self.client.force_authenticate(self.owner)
+
+    @override_settings(RENT_RESPONSE_CACHE=False)
+    def test_disabled_cache_builds_every_response(self):
+        first = self.client.get(reverse("categories-list"))
+        # A bulk update sends no signal, so the cache generation stays put.
+        Category.objects.update(name="Apartment", updated_at=timezone.now())
+        second = self.client.get(reverse("categories-list"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertNotIn("X-Cache", second)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data[0]["name"], "Apartment")
+
+    @override_settings(RENT_RESPONSE_CACHE=True)
+    def test_enabled_cache_answers_from_the_cache(self):
+        self.client.get(reverse("categories-list"))
+        self.assertEqual(self.client.get(reverse("categories-list"))["X-Cache"], "HIT")
+
+    @override_settings(RENT_RESPONSE_CACHE=True, RENT_CACHE_STATS=False)
+    def test_stats_are_not_counted_by_default(self):
+        self.client.get(reverse("categories-list"))
+        self.assertEqual(get_cache_stats(["categories"]), {"categories": {"hits": 0, "misses": 0}})
+
+    @override_settings(RENT_RESPONSE_CACHE=True, RENT_CACHE_STATS=True)
+    def test_stats_are_counted_when_enabled(self):
+        self.client.get(reverse("categories-list"))
+        self.client.get(reverse("categories-list"))
+        self.assertEqual(get_cache_stats(["categories"]), {"categories": {"hits": 1, "misses": 1}})
+
+    @override_settings(RENT_RESPONSE_CACHE=True)
+    def test_deploy_check_rejects_a_local_memory_cache(self):
+        self.assertEqual([error.id for error in check_response_cache(None)], ["rent.E001"])
+
+    @override_settings(RENT_RESPONSE_CACHE=False)
+    def test_deploy_check_passes_without_response_cache(self):
+        self.assertEqual(check_response_cache(None), [])
+
+
+@skipUnless(connection.vendor == "postgresql", "Query plans are only checked on PostgreSQL.")
+class ListingIndexTests(APITestCase):
+    """
+    The advertisement listings are served by the composite indexes on
+    `RentAdvertisement`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.owner = User.objects.create_user("owner@example.com", "pw12345!")
+        cls.admin = User.objects.create_superuser("admin@example.com", "pw12345!")
+        cls.category = Category.objects.create(name="Flat")
+        for index in range(20):
+            create_ad(cls.owner, category=cls.category, price=10000 + index, approved=index % 2 == 0)
+
+    def get_listing_plan(self, url, user, **params):
+        """
+        Request a listing and return the EXPLAIN output of its page query.
+        """
+        cache.clear()
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        sql = next(
+            query["sql"] for query in queries
+            if query["sql"].startswith("SELECT")
+            and 'FROM "rent_rentadvertisement"' in query["sql"]
+            and "ORDER BY" in query["sql"]
+        )
+        with connection.cursor() as cursor:
+            # The test tables are tiny, so a sequential scan would always win.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}")
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def assertIndexScan(self, plan, index_name):
+        self.assertRegex(plan, rf"Index (Only )?Scan (Backward )?(using|on) {index_name}\b")
+
+    def test_approved_ads_newest_first(self):
+        plan = self.get_listing_plan(reverse("ads-list"), self.owner, approved="true")
+        self.assertIndexScan(plan, "rent_ad_approved_created_idx")
+
+    def test_approved_ads_by_price(self):
+        plan = self.get_listing_plan(reverse("ads-list"), self.owner, approved="true", ordering="price")
+        self.assertIndexScan(plan, "rent_ad_approved_price_idx")
+
+    def test_approved_ads_by_rating(self):
+        plan = self.get_listing_plan(reverse("ads-list"), self.owner, approved="true", ordering="-rating_avg")
+        self.assertIndexScan(plan, "rent_ad_approved_rating_idx")
+
+    def test_category_ads_by_price(self):
+        plan = self.get_listing_plan(
+            reverse("ads-list"), self.owner, category=self.category.pk, approved="true", ordering="price"
+        )
+        self.assertIndexScan(plan, "rent_ad_cat_appr_price_idx")
+
+    def test_category_ads_newest_first(self):
+        plan = self.get_listing_plan(
+            reverse("ads-list"), self.owner, category=self.category.pk, approved="true"
+        )
+        self.assertIndexScan(plan, "rent_ad_cat_appr_created_idx")
+
+    def test_pending_ads(self):
+        plan = self.get_listing_plan(reverse("ads-pending"), self.admin)
+        self.assertIndexScan(plan, "rent_ad_pending_created_idx")
+
+
+@skipUnless(connection.vendor == "sqlite", "The FTS5 backend only runs on SQLite.")
+@override_settings(RENT_SEARCH_BACKEND="rent.search.SQLiteSearchBackend", RENT_RESPONSE_CACHE=False)
+class SQLiteSearchTests(APITestCase):
+    """
+    Advertisement search through the FTS5 backend.
+    """
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        self.client.force_authenticate(self.owner)
+        self.described = create_ad(
+            self.owner, title="Flat in Gulshan", description="Quiet flat with a lake view.", price=30000
+        )
+        self.titled = create_ad(
+            self.owner, title="Lake view flat", description="Two bedrooms.", price=20000
+        )
+        self.unrelated = create_ad(self.owner, title="Office in Motijheel", description="Open plan.")
+
+    def search(self, query, **params):
+        response = self.client.get(reverse("ads-list"), {"search": query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [ad["id"] for ad in response.data["results"]]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search("lake"), [self.titled.pk, self.described.pk])
+
+    def test_weights_decide_the_rank(self):
+        backend = SQLiteSearchBackend()
+        backend.weights = (1.0, 10.0)
+        ranked = backend.search(RentAdvertisement.objects.all(), "lake").order_by("-search_rank")
+        self.assertEqual([ad.pk for ad in ranked], [self.described.pk, self.titled.pk])
+
+    def test_match_expression_quotes_fts5_syntax(self):
+        backend = SQLiteSearchBackend()
+        self.assertEqual(backend.to_match_expression('lake OR view*'), '"lake" "OR" "view*"')
+        self.assertEqual(backend.to_match_expression('say "hi'), '"say" """hi"')
+        self.assertEqual(backend.to_match_expression("   "), "")
+
+    def test_fts5_syntax_is_searched_as_text(self):
+        for query in ['lake OR office', 'lake"', 'view*', 'NEAR(lake view)', '-lake']:
+            with self.subTest(query=query):
+                self.search(query)
+        # "OR" is a plain term here, and no ad contains it.
+        self.assertEqual(self.search("lake OR office"), [])
+
+    def test_title_update_is_reindexed(self):
+        self.unrelated.title = "Office near the lake"
+        self.unrelated.save()
+        self.assertIn(self.unrelated.pk, self.search("lake"))
+        self.assertEqual(self.search("motijheel"), [])
+
+    def test_untracked_update_does_not_reindex(self):
+        with mock.patch.object(SQLiteSearchBackend, "index") as index:
+            self.unrelated.price = 1
+            self.unrelated.save(update_fields=["price"])
+        index.assert_not_called()
+
+    def test_delete_is_unindexed(self):
+        self.titled.delete()
+        self.assertEqual(self.search("lake"), [self.described.pk])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {SQLiteSearchBackend.table} WHERE rowid = %s", [self.titled.pk])
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_ordering_overrides_the_rank(self):
+        self.assertEqual(self.search("lake", ordering="-price"), [self.described.pk, self.titled.pk])
+        self.assertEqual(self.search("lake", ordering="price"), [self.titled.pk, self.described.pk])
+
+
+@override_settings(RENT_RESPONSE_CACHE=False)
+class KeysetPaginationTests(APITestCase):
+    """
+    Cursor pages of the ad feed, walked both ways over duplicate sort values.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        cls.owner = owner
+        prices = [300, 200, 200, 100, 200, 300, 100]
+        ratings = [0, 4.5, 4.5, 3, 0, 4.5, 3]
+        cls.ads = [create_ad(owner, price=price) for price in prices]
+        same_time = timezone.now()
+        for ad, rating in zip(cls.ads, ratings):
+            RentAdvertisement.objects.filter(pk=ad.pk).update(rating_avg=rating)
+        # Three ads share a creation time.
+        RentAdvertisement.objects.filter(pk__in=[ad.pk for ad in cls.ads[2:5]]).update(created_at=same_time)
+        cls.ads = list(RentAdvertisement.objects.order_by("id"))
+
+    def setUp(self):
+        self.client.force_authenticate(self.owner)
+
+    def expected(self, ordering):
+        field = ordering.lstrip("-")
+        descending = ordering.startswith("-")
+        ads = sorted(self.ads, key=lambda ad: (getattr(ad, field), ad.pk), reverse=descending)
+        return [ad.pk for ad in ads]
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def walk(self, ordering):
+        """
+        Follow `next` to the end, then `previous` back to the start; return
+        the ids seen each way, in feed order.
+        """
+        pages = [self.get(reverse("ads-list"), cursor="", page_size=2, ordering=ordering)]
+        while pages[-1]["next"]:
+            pages.append(self.get(pages[-1]["next"]))
+        forward = [ad["id"] for page in pages for ad in page["results"]]
+
+        backward_pages = [pages[-1]]
+        while backward_pages[-1]["previous"]:
+            backward_pages.append(self.get(backward_pages[-1]["previous"]))
+        backward = [ad["id"] for page in reversed(backward_pages) for ad in page["results"]]
+        return forward, backward
+
+    def test_traversal_with_ties(self):
+        for ordering in ["-created_at", "created_at", "price", "-price", "rating_avg", "-rating_avg"]:
+            with self.subTest(ordering=ordering):
+                forward, backward = self.walk(ordering)
+                self.assertEqual(forward, self.expected(ordering))
+                self.assertEqual(backward, forward)
+
+    def test_first_page_links(self):
+        page = self.get(reverse("ads-list"), cursor="", page_size=3, ordering="price")
+        self.assertEqual(page["count"], len(self.ads))
+        self.assertIsNone(page["previous"])
+        self.assertIsNotNone(page["next"])
+
+    def test_count_can_be_skipped(self):
+        page = self.get(reverse("ads-list"), cursor="", page_size=3, count="false")
+        self.assertNotIn("count", page)
+        self.assertEqual(len(page["results"]), 3)
+
+    def test_garbage_cursor(self):
+        for cursor in ["garbage", "e30=", "eyJvcmRlcmluZyI6ICItcHJpY2UifQ=="]:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse("ads-list"), {"cursor": cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.data["detail"], "Invalid cursor.")
+
+    def test_cursor_reused_with_another_ordering(self):
+        next_url = self.get(reverse("ads-list"), cursor="", page_size=2, ordering="price")["next"]
+        response = self.client.get(next_url.replace("ordering=price", "ordering=-created_at"))
+        self.assertEqual(response.status_code, 404)
+
+
+class ModerationTests(APITestCase):
+    """
+    `approve` and `moderate` update ads in one statement and report every id.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw12345!")
+        self.admin = User.objects.create_superuser("admin@example.com", "pw12345!")
+        self.pending = [create_ad(self.owner) for _ in range(2)]
+        self.approved = create_ad(self.owner, approved=True)
+        self.client.force_authenticate(self.admin)
+        self.receiver = mock.Mock()
+        advertisements_approval_changed.connect(self.receiver)
+        self.addCleanup(advertisements_approval_changed.disconnect, self.receiver)
+
+    def moderate(self, ids, action):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("ads-moderate"), {"ids": ids, "action": action}, format="json")
+        self.ad_updates = [
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith(f'UPDATE "{RentAdvertisement._meta.db_table}"')
+        ]
+        return response
+
+    def test_outcome_per_id(self):
+        ids = [self.pending[0].pk, self.approved.pk, 999999, self.pending[1].pk, self.pending[0].pk]
+        response = self.moderate(ids, "approve")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"action": "approve", "results": [
+            {"id": self.pending[0].pk, "status": "approved"},
+            {"id": self.approved.pk, "status": "unchanged"},
+            {"id": 999999, "status": "not_found"},
+            {"id": self.pending[1].pk, "status": "approved"},
+        ]})
+        self.assertEqual(RentAdvertisement.objects.filter(approved=True).count(), 3)
+
+    def test_reject(self):
+        response = self.moderate([self.approved.pk, self.pending[0].pk], "reject")
+        self.assertEqual(response.data["results"], [
+            {"id": self.approved.pk, "status": "rejected"},
+            {"id": self.pending[0].pk, "status": "unchanged"},
+        ])
+        self.approved.refresh_from_db()
+        self.assertFalse(self.approved.approved)
+
+    def test_one_update_statement(self):
+        self.moderate([ad.pk for ad in self.pending] + [self.approved.pk], "approve")
+        self.assertEqual(len(self.ad_updates), 1)
+
+    def test_signal_carries_the_changed_ids(self):
+        self.moderate([ad.pk for ad in self.pending] + [self.approved.pk], "approve")
+        self.receiver.assert_called_once()
+        kwargs = self.receiver.call_args.kwargs
+        self.assertEqual(sorted(kwargs["ad_ids"]), sorted(ad.pk for ad in self.pending))
+        self.assertTrue(kwargs["approved"])
+
+    def test_no_signal_without_changes(self):
+        self.moderate([self.approved.pk, 999999], "approve")
+        self.receiver.assert_not_called()
+        self.assertEqual(self.ad_updates, [])
+
+    def test_invalid_request(self):
+        for data in [{"ids": [], "action": "approve"}, {"ids": [1], "action": "publish"}, {"action": "approve"}]:
+            with self.subTest(data=data):
+                response = self.client.post(reverse("ads-moderate"), data, format="json")
+                self.assertEqual(response.status_code, 400)
+
+    def test_approve(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("ads-approve", kwargs={"pk": self.pending[0].pk}))
+        self.assertEqual(response.status_code, 200)
+        self.pending[0].refresh_from_db()
+        self.assertTrue(self.pending[0].approved)
+        self.assertEqual(
+            sum(query["sql"].startswith(f'UPDATE "{RentAdvertisement._meta.db_table}"') for query in queries),
+            1,
+        )
+        self.assertEqual(self.receiver.call_args.kwargs["ad_ids"], [self.pending[0].pk])
+
+    def test_approve_missing_ad(self):
+        response = self.client.post(reverse("ads-approve", kwargs={"pk": 999999}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_admin_only(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(reverse("ads-moderate"), {"ids": [self.pending[0].pk], "action": "approve"}, format="json")
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post(reverse("ads-approve", kwargs={"pk": self.pending[0].pk}))
+        self.assertEqual(response.status_code, 403)
+        self.pending[0].refresh_from_db()
+        self.assertFalse(self.pending[0].approved)
+
+
+@override_settings(RENT_RESPONSE_CACHE=False)
+class ReviewAggregateTests(APITestCase):
+    """
+    `rating_avg` and `review_count` follow review writes through the API.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw12345!")
+        self.reviewers = [User.objects.create_user(f"reviewer{index}@example.com", "pw12345!") for index in range(2)]
+        self.ad = create_ad(self.owner)
+        self.url = reverse("ad-reviews-list", kwargs={"ad_pk": self.ad.pk})
+
+    def review(self, user, rating):
+        self.client.force_authenticate(user)
+        response = self.client.post(self.url, {"rating": rating, "comment": "Fine."})
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def assertAggregates(self, rating_avg, review_count):
+        self.ad.refresh_from_db()
+        self.assertEqual((self.ad.rating_avg, self.ad.review_count), (Decimal(rating_avg), review_count))
+
+    def test_create_update_delete(self):
+        first = self.review(self.reviewers[0], 5)
+        self.assertAggregates("5.00", 1)
+        self.review(self.reviewers[1], 2)
+        self.assertAggregates("3.50", 2)
+
+        self.client.force_authenticate(self.reviewers[0])
+        detail = reverse("ad-reviews-detail", kwargs={"ad_pk": self.ad.pk, "pk": first})
+        self.assertEqual(self.client.patch(detail, {"rating": 3}).status_code, 200)
+        self.assertAggregates("2.50", 2)
+
+        self.assertEqual(self.client.delete(detail).status_code, 204)
+        self.assertAggregates("2.00", 1)
+
+    def test_last_review_deleted(self):
+        review = self.review(self.reviewers[0], 4)
+        detail = reverse("ad-reviews-detail", kwargs={"ad_pk": self.ad.pk, "pk": review})
+        self.client.delete(detail)
+        self.assertAggregates("0", 0)
+
+    def test_ordering_uses_the_stored_columns(self):
+        other = create_ad(self.owner, title="Flat in Banani")
+        create_ad(self.owner, title="Unreviewed flat")
+        self.review(self.reviewers[0], 2)
+        self.client.force_authenticate(self.reviewers[0])
+        self.client.post(reverse("ad-reviews-list", kwargs={"ad_pk": other.pk}), {"rating": 5, "comment": "Great."})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("ads-list"), {"ordering": "-rating_avg"})
+        self.assertEqual(
+            [(ad["id"], ad["rating_avg"]) for ad in response.data["results"]][:2],
+            [(other.pk, 5.0), (self.ad.pk, 2.0)],
+        )
+        review_table = Review._meta.db_table
+        self.assertFalse(any(review_table in query["sql"] for query in queries.captured_queries))
+
+
+@override_settings(RENT_RESPONSE_CACHE=False)
+class RequestFavoriteFieldSelectionTests(APITestCase):
+    """
+    `?fields=` and `?omit=` on rent requests and favorites trim the output
+    and the joins; writes ignore them.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw12345!")
+        self.tenant = User.objects.create_user("tenant@example.com", "pw12345!")
+        self.ad = create_ad(self.owner)
+        self.rent_request = RentRequest.objects.create(advertisement=self.ad, sender=self.tenant, message="Hello.")
+        self.favorite = Favorite.objects.create(user=self.tenant, advertisement=self.ad)
+        self.requests_url = reverse("ad-requests-list", kwargs={"ad_pk": self.ad.pk})
+
+    def get(self, user, url, params):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, [query["sql"] for query in queries.captured_queries]
+
+    def assertJoins(self, queries, model, joined):
+        table = model._meta.db_table
+        self.assertEqual(any(f'JOIN "{table}"' in sql for sql in queries), joined)
+
+    def test_request_fields(self):
+        data, queries = self.get(self.owner, self.requests_url, {"fields": "id,status"})
+        self.assertEqual(data, [{"id": self.rent_request.pk, "status": "pending"}])
+        self.assertJoins(queries, get_user_model(), False)
+        self.assertJoins(queries, RentAdvertisement, False)
+
+    def test_request_omit(self):
+        data, queries = self.get(self.owner, self.requests_url, {"omit": "advertisement,message"})
+        self.assertEqual(set(data[0]), {"id", "sender", "status", "created_at"})
+        self.assertEqual(data[0]["sender"]["id"], self.tenant.pk)
+        self.assertJoins(queries, get_user_model(), True)
+        self.assertJoins(queries, RentAdvertisement, False)
+
+    def test_request_detail_fields(self):
+        url = reverse("ad-requests-detail", kwargs={"ad_pk": self.ad.pk, "pk": self.rent_request.pk})
+        data, queries = self.get(self.owner, url, {"fields": "message"})
+        self.assertEqual(data, {"message": "Hello."})
+        self.assertJoins(queries, RentAdvertisement, False)
+
+    def test_favorite_fields(self):
+        data, queries = self.get(self.tenant, reverse("favorites-list"), {"fields": "id"})
+        self.assertEqual(data, [{"id": self.favorite.pk}])
+        self.assertJoins(queries, get_user_model(), False)
+        self.assertJoins(queries, RentAdvertisement, False)
+
+    def test_favorite_omit(self):
+        data, queries = self.get(self.tenant, reverse("favorites-list"), {"omit": "user"})
+        self.assertEqual(set(data[0]), {"id", "advertisement"})
+        self.assertEqual(data[0]["advertisement"]["id"], self.ad.pk)
+        self.assertJoins(queries, get_user_model(), False)
+        self.assertJoins(queries, RentAdvertisement, True)
+
+    def test_writes_ignore_the_selection(self):
+        self.client.force_authenticate(self.tenant)
+        url = reverse("ad-requests-detail", kwargs={"ad_pk": self.ad.pk, "pk": self.rent_request.pk})
+        response = self.client.patch(f"{url}?fields=id", {"message": "Still interested."})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {"id", "advertisement", "sender", "status", "message", "created_at"})
+        self.rent_request.refresh_from_db()
+        self.assertEqual(self.rent_request.message, "Still interested.")
+
+        other = create_ad(self.owner, title="Flat in Banani")
+        response = self.client.post(f"{reverse('favorites-list')}?omit=advertisement", {"advertisement": other.pk})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {"advertisement": other.pk})
+
+
+class BatchUploadTests(APITestCase):
+    """
+    `POST /ads/{id}/images/batch/` validates every file before storing any.
+    """
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        self.client.force_authenticate(owner)
+        self.ad = create_ad(owner)
+        self.url = reverse("ad-images-batch", kwargs={"ad_pk": self.ad.pk})
+        staging_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(staging_dir.cleanup)
+        self.staging_dir = Path(staging_dir.name)
+        patcher = override_settings(RENT_UPLOAD_STAGING_DIR=staging_dir.name)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def upload(self, files, url=None):
+        with mock.patch("rent.uploads.enqueue_images") as enqueue_images, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url or self.url, {"images": files}, format="multipart")
+        return response, enqueue_images
+
+    def assertNothingStored(self):
+        self.assertFalse(AdvertisementImage.objects.exists())
+        self.assertEqual(list(self.staging_dir.iterdir()), [])
+
+    def test_results_follow_upload_order(self):
+        names = ["c.png", "a.png", "b.png"]
+        response, enqueue_images = self.upload([png_upload(name) for name in names])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual([result["name"] for result in response.data], names)
+        self.assertEqual({result["status"] for result in response.data}, {AdvertisementImage.STATUS_PROCESSING})
+        ids = [result["id"] for result in response.data]
+        self.assertEqual(ids, sorted(ids))
+        enqueue_images.assert_called_once_with(ids)
+        images = AdvertisementImage.objects.filter(advertisement=self.ad).order_by("pk")
+        self.assertEqual([image.pk for image in images], ids)
+
+    def test_invalid_files_are_reported_by_index(self):
+        # A PNG signature passes the streaming check; Pillow rejects the rest.
+        truncated = SimpleUploadedFile("broken.png", png_upload("x.png").read()[:40], content_type="image/png")
+        response, enqueue_images = self.upload([png_upload("a.png"), truncated, png_upload("b.png")])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data["images"]), {1})
+        enqueue_images.assert_not_called()
+        self.assertNothingStored()
+
+    def test_non_image_is_rejected_while_streaming(self):
+        text = SimpleUploadedFile("notes.png", b"not an image at all", content_type="image/png")
+        response, _ = self.upload([png_upload("a.png"), text])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("notes.png is not a supported image", response.data["detail"])
+        self.assertNothingStored()
+
+    def test_more_than_twenty_files(self):
+        response, _ = self.upload([png_upload(f"{index}.png") for index in range(21)])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("images", response.data)
+        self.assertNothingStored()
+
+    def test_missing_advertisement(self):
+        url = reverse("ad-images-batch", kwargs={"ad_pk": self.ad.pk + 100})
+        response, _ = self.upload([png_upload("a.png")], url=url)
+        self.assertEqual(response.status_code, 404)
+        self.assertNothingStored()
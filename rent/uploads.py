@@ -0,0 +1,225 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from rent.cache import invalidate_on_commit
+from rent.models import AdvertisementImage, RentAdvertisement
+from rent.storage import get_image_storage
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_variant_pool = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the process-wide worker pool that pushes staged images to storage.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RENT_UPLOAD_WORKERS,
+                thread_name_prefix="image-upload",
+            )
+    return _executor
+
+
+def get_variant_pool():
+    """
+    Return the process pool that encodes image derivatives off the GIL.
+    """
+    global _variant_pool
+    # Imported on first use; request handling never needs them.
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _executor_lock:
+        if _variant_pool is None:
+            _variant_pool = ProcessPoolExecutor(
+                max_workers=settings.RENT_IMAGE_VARIANT_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _variant_pool
+
+
+def generate_variants(staged_path):
+    """
+    Build the configured derivatives of a staged image, in the process pool
+    when `RENT_IMAGE_VARIANT_PROCESSES` is above 0.
+    Returns a dict of variant name to local path; empty if encoding fails.
+    """
+    # Pillow is only needed by the upload workers, keep it off cold starts.
+    from rent.images import build_variants
+
+    args = (staged_path, settings.RENT_IMAGE_VARIANTS, settings.RENT_IMAGE_VARIANT_FORMATS)
+    try:
+        if settings.RENT_IMAGE_VARIANT_PROCESSES > 0:
+            return get_variant_pool().submit(build_variants, *args).result()
+        return build_variants(*args)
+    except Exception:
+        logger.exception("Could not build variants for %s", staged_path)
+        return {}
+
+
+def stage_upload(uploaded_file):
+    """
+    Copy an uploaded file into the local staging area and return its path.
+    """
+    directory = Path(settings.RENT_UPLOAD_STAGING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{uuid.uuid4().hex}{Path(uploaded_file.name).suffix.lower()}"
+    with open(path, "wb") as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+    return str(path)
+
+
+def create_pending_images(advertisement_id, uploaded_files):
+    """
+    Stage uploaded files and create their image rows in the `processing` state.
+    The rows are handed to the worker pool once the transaction commits.
+    """
+    # bulk_create skips the post_save receivers in rent.signals.
+    RentAdvertisement.objects.filter(pk=advertisement_id).update(updated_at=timezone.now())
+    invalidate_on_commit("ads")
+    images = AdvertisementImage.objects.bulk_create([
+        AdvertisementImage(
+            advertisement_id=advertisement_id,
+            status=AdvertisementImage.STATUS_PROCESSING,
+            staged_path=stage_upload(uploaded_file),
+        )
+        for uploaded_file in uploaded_files
+    ])
+    image_ids = [image.pk for image in images]
+    transaction.on_commit(lambda: enqueue_images(image_ids))
+    return images
+
+
+def replace_pending_image(image, uploaded_file):
+    """
+    Stage a replacement file for an existing image and queue it for upload.
+    """
+    image.staged_path = stage_upload(uploaded_file)
+    image.status = AdvertisementImage.STATUS_PROCESSING
+    image.attempts = 0
+    image.error = ""
+    image.save(update_fields=["staged_path", "status", "attempts", "error", "updated_at"])
+    transaction.on_commit(lambda: enqueue_images([image.pk]))
+    return image
+
+
+def enqueue_images(image_ids):
+    """
+    Hand images to the worker pool, or process them inline when
+    `RENT_UPLOAD_WORKERS` is 0.
+    """
+    for image_id in image_ids:
+        if settings.RENT_UPLOAD_WORKERS > 0:
+            get_executor().submit(_process_in_worker, image_id)
+        else:
+            process_image(image_id)
+
+
+def _process_in_worker(image_id):
+    # Worker threads own their database connections.
+    close_old_connections()
+    try:
+        process_image(image_id)
+    except Exception:
+        logger.exception("Processing of image %s crashed", image_id)
+    finally:
+        close_old_connections()
+
+
+def remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def claim_attempt(image):
+    """
+    Atomically take the next upload attempt for an image.
+    Returns False when another worker got there first or the image is no longer processing.
+    """
+    claimed = AdvertisementImage.objects.filter(
+        pk=image.pk,
+        status=AdvertisementImage.STATUS_PROCESSING,
+        attempts=image.attempts,
+    ).update(attempts=image.attempts + 1)
+    if claimed:
+        image.attempts += 1
+    return bool(claimed)
+
+
+def process_image(image_id):
+    """
+    Push one staged image to storage, retrying with exponential backoff.
+    The image ends up `ready`, or `failed` with the last error recorded.
+    """
+    image = AdvertisementImage.objects.filter(
+        pk=image_id, status=AdvertisementImage.STATUS_PROCESSING
+    ).first()
+    if image is None:
+        return
+    if not os.path.exists(image.staged_path):
+        image.status = AdvertisementImage.STATUS_FAILED
+        image.error = "Staged file is missing."
+        image.save(update_fields=["status", "error", "updated_at"])
+        return
+
+    variant_paths = generate_variants(image.staged_path)
+    storage = get_image_storage()
+    name = f"ads/{image.advertisement_id}/{Path(image.staged_path).stem}"
+    while True:
+        if not claim_attempt(image):
+            # Variant paths are derived from the staged file, so a worker
+            # still uploading this image uses the same files and removes them
+            # when done. Once the image has left `processing` nobody will.
+            if not AdvertisementImage.objects.filter(
+                pk=image.pk, status=AdvertisementImage.STATUS_PROCESSING
+            ).exists():
+                remove_files(variant_paths.values())
+            return
+        try:
+            stored = storage.save(image.staged_path, name)
+            # Derivatives are stored next to the original.
+            variants = {
+                variant: storage.save(path, f"{name}_{variant}")
+                for variant, path in variant_paths.items()
+            }
+            break
+        except Exception as exc:
+            logger.warning("Upload of image %s failed (attempt %s): %s", image.pk, image.attempts, exc)
+            image.error = str(exc)[:255]
+            if image.attempts >= settings.RENT_UPLOAD_MAX_ATTEMPTS:
+                image.status = AdvertisementImage.STATUS_FAILED
+                image.save(update_fields=["error", "status", "updated_at"])
+                # The staged original is kept for a retry; variants are rebuilt then.
+                remove_files(variant_paths.values())
+                return
+            image.save(update_fields=["error", "updated_at"])
+            time.sleep(settings.RENT_UPLOAD_RETRY_BACKOFF * 2 ** (image.attempts - 1))
+
+    staged_path = image.staged_path
+    image.image = stored
+    image.variants = variants
+    image.status = AdvertisementImage.STATUS_READY
+    image.error = ""
+    image.staged_path = ""
+    image.save(update_fields=["image", "variants", "status", "error", "staged_path", "updated_at"])
+    remove_files([staged_path, *variant_paths.values()])
@@ -1,21 +1,45 @@
 from rest_framework import viewsets, permissions, status, filters, serializers
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_yasg.utils import swagger_auto_schema
+from drf_yasg.utils import no_body, swagger_auto_schema
 from drf_yasg import openapi
+from django.db import transaction
 from django.db.models import Prefetch
+from django.utils.cache import get_conditional_response
 
 from api.permissions import IsAdminOrReadOnly
-from rent.paginations import DefaultPagination
+from api.upload_handlers import StreamingImageUploadMixin
+from rent.cache import CachedResponseMixin
+from rent.conditional import ConditionalGetMixin, get_queryset_validators, set_validator_headers
+from rent.paginations import AdvertisementPagination, DefaultPagination
+from rent.search import AdvertisementSearchFilter
+from rent.services import set_advertisements_approval, refresh_review_aggregates, accept_rent_request
+from rent.uploads import create_pending_images, replace_pending_image
 from rent.models import Category, RentAdvertisement, AdvertisementImage, RentRequest, Favorite, Review
 from rent.serializers import (
-    CategorySerializer, AdvertisementImageSerializer, RentAdvertisementSerializer,
-    RentAdvertisementCreateSerializer, RentRequestSerializer, RentRequestCreateSerializer,
-    FavoriteSerializer, GetFavoriteSerializer, ReviewSerializer, EmptySerializer
+    CategorySerializer, AdvertisementImageSerializer, RentAdvertisementSerializer, RentAdvertisementListSerializer,
+    RentAdvertisementCreateSerializer, ModerationAdvertisementSerializer, RentRequestSerializer, RentRequestCreateSerializer,
+    FavoriteSerializer, GetFavoriteSerializer, ReviewSerializer, EmptySerializer,
+    BulkModerationSerializer, AdvertisementImageBatchSerializer
 )
 
 
+def select_selected_relations(view, queryset, relations):
+    """
+    Join only the `relations` the view's response renders, so `?fields=`
+    and `?omit=` also drop their joins.
+    """
+    serializer_class = view.get_serializer_class()
+    if hasattr(serializer_class, 'get_field_selection'):
+        selected, _ = serializer_class.get_field_selection(view.request)
+        relations = [name for name in relations if name in selected]
+    # select_related() without arguments would follow every foreign key.
+    return queryset.select_related(*relations) if relations else queryset
+
+
 class IsOwnerOrAdmin(permissions.BasePermission):
     """
     Custom permission to allow only the owner of an object or admin users to modify it.
@@ -25,42 +49,76 @@ class IsOwnerOrAdmin(permissions.BasePermission):
         return obj.owner == request.user or request.user.role == "admin"
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing property categories.
+    List and detail responses are cached and support conditional GET.
     """
+    cache_namespace = "categories"
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOrReadOnly]
 
 
-class RentAdvertisementViewSet(viewsets.ModelViewSet):
+class RentAdvertisementViewSet(StreamingImageUploadMixin, ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     API endpoint for creating, retrieving, updating, and managing rental advertisements.
-    Supports filtering, searching, and ordering.
+    Supports filtering, full-text searching, and ordering.
+    List and detail responses are cached and support conditional GET.
     """
-    queryset = RentAdvertisement.objects.select_related('category', 'owner').prefetch_related(
-        'images',
-        Prefetch('reviews', queryset=Review.objects.select_related('user'))
-    ).all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    cache_namespace = "ads"
+    queryset = RentAdvertisement.objects.all()
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, AdvertisementSearchFilter]
     filterset_fields = ['category', 'approved']
-    pagination_class = DefaultPagination
+    pagination_class = AdvertisementPagination
     search_fields = ['title', 'description']
-    ordering_fields = ['created_at', 'price']
+    ordering_fields = ['created_at', 'price', 'rating_avg']
     ordering = ['-created_at']
 
+    def get_queryset(self):
+        """
+        Load only what the response needs: joins, prefetches and columns
+        follow the `fields`, `omit` and `expand` query parameters.
+        """
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if not hasattr(serializer_class, 'get_field_selection'):
+            return queryset.defer('search_vector')
+        selected, expanded = serializer_class.get_field_selection(self.request)
+
+        related = [name for name in ('owner', 'category') if name in expanded]
+        if related:
+            queryset = queryset.select_related(*related)
+        if 'images' in selected:
+            queryset = queryset.prefetch_related('images')
+        if 'reviews' in selected:
+            queryset = queryset.prefetch_related(
+                Prefetch('reviews', queryset=Review.objects.select_related('user'))
+            )
+
+        if self.request is None or self.request.method not in permissions.SAFE_METHODS:
+            return queryset.defer('search_vector')
+        columns = {field.name for field in RentAdvertisement._meta.concrete_fields} & selected
+        # Ordering fields stay loaded so keyset cursors can be built without extra queries.
+        return queryset.only('id', *self.ordering_fields, *columns)
+
     def get_serializer_class(self):
         if self.action == "approve":
             return EmptySerializer
+        if self.action == "moderate":
+            return BulkModerationSerializer
         if self.action == "create":
             return RentAdvertisementCreateSerializer
+        if self.action == "pending":
+            return ModerationAdvertisementSerializer
+        if self.action == "list":
+            return RentAdvertisementListSerializer
         return RentAdvertisementSerializer
 
     def get_permissions(self):
         if self.action in ['update', 'partial_update', 'destroy']:
             return [permissions.IsAuthenticated(), IsOwnerOrAdmin()]
-        elif self.action in ['approve', 'pending']:
+        elif self.action in ['approve', 'moderate', 'pending']:
             return [permissions.IsAdminUser()]
        
         else:
@@ -80,25 +138,63 @@ class RentAdvertisementViewSet(viewsets.ModelViewSet):
     )
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
-        ad = self.get_object()
-        ad.approved = True
-        ad.save()
+        try:
+            ad_id = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound()
+        if set_advertisements_approval([ad_id], approved=True)[ad_id] == "not_found":
+            raise NotFound()
         return Response({'status': 'advertisement approved'})
 
+    @swagger_auto_schema(
+        method='post',
+        operation_summary="Bulk approve or reject advertisements",
+        operation_description=(
+            "Approve or reject a list of advertisements in a single update (Admin only). "
+            "Returns the outcome for every requested ID: approved, rejected, unchanged or not_found."
+        ),
+        request_body=BulkModerationSerializer,
+        responses={200: openapi.Response("Per-advertisement moderation outcomes")}
+    )
+    @action(detail=False, methods=['post'])
+    def moderate(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        outcomes = set_advertisements_approval(
+            serializer.validated_data['ids'],
+            approved=serializer.validated_data['action'] == 'approve',
+        )
+        return Response({
+            'action': serializer.validated_data['action'],
+            'results': [{'id': ad_id, 'status': outcome} for ad_id, outcome in outcomes.items()],
+        })
+
     @swagger_auto_schema(
         method='get',
         operation_summary="List pending advertisements",
-        operation_description="Retrieve all advertisements that are not yet approved.",
-        responses={200: RentAdvertisementSerializer(many=True)}
+        operation_description=(
+            "Retrieve advertisements that are not yet approved, oldest first and paginated. "
+            "Send the returned ETag in If-None-Match to get 304 when the queue is unchanged."
+        ),
+        responses={200: ModerationAdvertisementSerializer(many=True)}
     )
     @action(detail=False, methods=['get'])
     def pending(self, request):
-        ads = self.queryset.filter(approved=False)
-        serializer = self.get_serializer(ads, many=True)
-        return Response(serializer.data)
+        ads = RentAdvertisement.objects.filter(approved=False)
+        etag, last_modified = get_queryset_validators(request, ads)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return set_validator_headers(not_modified, etag, last_modified)
+
+        paginator = DefaultPagination()
+        queryset = ads.prefetch_related('images').defer('search_vector').order_by('created_at', 'id')
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        response = paginator.get_paginated_response(serializer.data)
+        return set_validator_headers(response, etag, last_modified)
 
 
-class AdvertisementImageViewSet(viewsets.ModelViewSet):
+class AdvertisementImageViewSet(StreamingImageUploadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing images of a specific rental advertisement.
     """
@@ -111,12 +207,64 @@ class AdvertisementImageViewSet(viewsets.ModelViewSet):
         ad_id = self.kwargs.get('ad_pk')
         return AdvertisementImage.objects.filter(advertisement_id=ad_id)
 
+    def create(self, request, *args, **kwargs):
+        """
+        Accept the image for background upload and answer 202 with its `processing` status.
+        """
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
     def perform_create(self, serializer):
         ad_id = self.kwargs.get('ad_pk')
-        serializer.save(advertisement_id=ad_id)
+        serializer.instance = create_pending_images(ad_id, [serializer.validated_data['image']])[0]
+
+    @swagger_auto_schema(
+        method='post',
+        operation_summary="Upload several images at once",
+        operation_description=(
+            "Upload up to 20 images in one multipart request, repeating the `images` field. "
+            "All files are checked for type and size first; if any is invalid nothing is stored "
+            "and the errors are keyed by file index. Otherwise answers 202 with one result per "
+            "file, in upload order, each `processing` until its background upload finishes."
+        ),
+        # Swagger 2 cannot describe a list of files, so `images` is documented as one file field.
+        request_body=no_body,
+        manual_parameters=[
+            openapi.Parameter(
+                'images', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True,
+                description="Image file; repeat the field for every image."
+            )
+        ],
+        responses={202: AdvertisementImageSerializer(many=True)}
+    )
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def batch(self, request, ad_pk=None):
+        if not RentAdvertisement.objects.filter(pk=ad_pk).exists():
+            raise NotFound("Advertisement not found.")
+        serializer = AdvertisementImageBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        uploaded_files = serializer.validated_data['images']
+        with transaction.atomic():
+            images = create_pending_images(ad_pk, uploaded_files)
+        results = [
+            {"name": uploaded_file.name, **data}
+            for uploaded_file, data in zip(
+                uploaded_files,
+                AdvertisementImageSerializer(images, many=True, context=self.get_serializer_context()).data
+            )
+        ]
+        return Response(results, status=status.HTTP_202_ACCEPTED)
+
+    def perform_update(self, serializer):
+        uploaded_file = serializer.validated_data.get('image')
+        if uploaded_file is not None:
+            replace_pending_image(serializer.instance, uploaded_file)
 
     def get_serializer_context(self):
-        return {'advertisement_id': self.kwargs.get('ad_pk')}
+        context = super().get_serializer_context()
+        context['advertisement_id'] = self.kwargs.get('ad_pk')
+        return context
 
 
 class RentRequestViewSet(viewsets.ModelViewSet):
@@ -136,18 +284,22 @@ class RentRequestViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         if self.action == "list":
             ad_id = self.kwargs.get("ad_pk")
-            ad = RentAdvertisement.objects.get(id=ad_id)
-            if self.request.user != ad.owner:
+            ad = RentAdvertisement.objects.only('owner').get(id=ad_id)
+            if ad.owner_id != self.request.user.pk:
                 return RentRequest.objects.none()
-            return RentRequest.objects.filter(advertisement=ad)
-        return super().get_queryset()
+            queryset = RentRequest.objects.filter(advertisement=ad)
+        else:
+            queryset = super().get_queryset()
+        return select_selected_relations(self, queryset, ('sender', 'advertisement'))
 
     def perform_create(self, serializer):
         ad_id = self.kwargs.get("ad_pk")
         ad = RentAdvertisement.objects.get(id=ad_id)
         if RentRequest.objects.filter(advertisement=ad, sender=self.request.user).exists():
             raise serializers.ValidationError({"detail": "You have already sent a request for this advertisement."})
-        serializer.save(advertisement=ad, sender=self.request.user, status="pending")
+        # The owner's notification event is written in the same transaction.
+        with transaction.atomic():
+            serializer.save(advertisement=ad, sender=self.request.user, status="pending")
 
     @swagger_auto_schema(
         method='post',
@@ -161,9 +313,7 @@ class RentRequestViewSet(viewsets.ModelViewSet):
         ad = rent_request.advertisement
         if request.user != ad.owner:
             return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
-        rent_request.status = "accepted"
-        rent_request.save()
-        RentRequest.objects.filter(advertisement=ad).exclude(id=rent_request.id).update(status="closed")
+        accept_rent_request(rent_request)
         return Response({"status": "request accepted"})
 
 
@@ -184,7 +334,8 @@ class FavoriteViewSet(viewsets.ModelViewSet):
             return Favorite.objects.none()
         
         # Normal behavior for real requests
-        return Favorite.objects.filter(user=self.request.user)
+        queryset = Favorite.objects.filter(user=self.request.user)
+        return select_selected_relations(self, queryset, ('user', 'advertisement'))
 
     def perform_create(self, serializer):
         if Favorite.objects.filter(user=self.request.user, advertisement=serializer.validated_data['advertisement']).exists():
@@ -192,7 +343,7 @@ class FavoriteViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing reviews on advertisements.
     """
@@ -201,10 +352,22 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         ad_id = self.kwargs.get("ad_pk")
-        return Review.objects.filter(advertisement_id=ad_id)
+        return Review.objects.filter(advertisement_id=ad_id).select_related('user')
 
     def perform_create(self, serializer):
         ad_id = self.kwargs.get("ad_pk")
         if Review.objects.filter(user=self.request.user, advertisement_id=ad_id).exists():
             raise serializers.ValidationError({"detail": "You have already reviewed this advertisement."})
-        serializer.save(user=self.request.user, advertisement_id=ad_id)
+        with transaction.atomic():
+            review = serializer.save(user=self.request.user, advertisement_id=ad_id)
+            refresh_review_aggregates(review.advertisement_id)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            review = serializer.save()
+            refresh_review_aggregates(review.advertisement_id)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            refresh_review_aggregates(instance.advertisement_id)
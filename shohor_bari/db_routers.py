@@ -0,0 +1,184 @@
+import hashlib
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+PIN_CACHE_PREFIX = "db:pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Alias of the replica the current request reads from, or None to read
+# from the primary. Only ReplicaRoutingMiddleware sets it, so management
+# commands, workers and shell sessions always use the primary.
+_use_replica = ContextVar("use_replica", default=None)
+
+# Replica alias -> time.monotonic() until which it is considered down.
+_unavailable_until = {}
+
+
+def get_replica_aliases():
+    return [alias for alias in connections if alias != DEFAULT_DB_ALIAS]
+
+
+def choose_replica():
+    """
+    Return a replica for one request, chosen at random among those not
+    marked down, or None when there is none. Connecting is left to the
+    first read, so requests that never read do not open a connection.
+    """
+    now = time.monotonic()
+    replicas = [alias for alias in get_replica_aliases() if _unavailable_until.get(alias, 0) <= now]
+    return random.choice(replicas) if replicas else None
+
+
+def is_replica_available(alias):
+    """
+    Check a replica connection, marking it down for `DATABASE_REPLICA_RETRY_AFTER`
+    seconds when it cannot be reached.
+    """
+    if _unavailable_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        _unavailable_until[alias] = time.monotonic() + settings.DATABASE_REPLICA_RETRY_AFTER
+        return False
+    return True
+
+
+class ReplicaRouter:
+    """
+    Send reads from safe-method requests in the apps listed in
+    `DATABASE_REPLICA_APPS` to the replica the middleware chose for the
+    request, so every read of a request sees the same replica. If that
+    replica cannot be reached, the rest of the request reads from the
+    primary.
+
+    Everything else (writes, reads inside a transaction, requests pinned
+    to the primary after a write, code running outside a request) uses
+    the primary. Migrations only run on the primary; replicas get their
+    schema through replication.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _use_replica.get()
+        if alias is None:
+            return None
+        if model._meta.app_label not in settings.DATABASE_REPLICA_APPS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias if is_replica_available(alias) else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _pin_key(request):
+    """
+    Return the cache key pinning this client to the primary, based on its
+    credentials, or None for anonymous clients.
+    """
+    credentials = (
+        request.META.get("HTTP_AUTHORIZATION")
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    if not credentials:
+        return None
+    return f"{PIN_CACHE_PREFIX}:{hashlib.md5(credentials.encode()).hexdigest()}"
+
+
+def is_pinned(request):
+    if request.COOKIES.get(settings.DATABASE_PIN_COOKIE_NAME):
+        return True
+    key = _pin_key(request)
+    return key is not None and cache.get(key) is not None
+
+
+async def ais_pinned(request):
+    if request.COOKIES.get(settings.DATABASE_PIN_COOKIE_NAME):
+        return True
+    key = _pin_key(request)
+    return key is not None and await cache.aget(key) is not None
+
+
+def pin_to_primary(request, response):
+    """
+    Keep the client's next reads on the primary so it sees its own write
+    while the replicas catch up. Browsers carry the cookie; API clients
+    that drop cookies are matched through a cache marker on their credentials.
+    """
+    seconds = settings.DATABASE_PIN_SECONDS
+    response.set_cookie(
+        settings.DATABASE_PIN_COOKIE_NAME, "1", max_age=seconds, httponly=True, samesite="Lax"
+    )
+    key = _pin_key(request)
+    if key is not None:
+        cache.set(key, 1, timeout=seconds)
+
+
+async def apin_to_primary(request, response):
+    seconds = settings.DATABASE_PIN_SECONDS
+    response.set_cookie(
+        settings.DATABASE_PIN_COOKIE_NAME, "1", max_age=seconds, httponly=True, samesite="Lax"
+    )
+    key = _pin_key(request)
+    if key is not None:
+        await cache.aset(key, 1, timeout=seconds)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Pick the replica that safe-method requests from clients that have not
+    written recently read from, and pin clients to the primary after a write.
+    Runs natively in both sync and async mode.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not get_replica_aliases():
+            return self.get_response(request)
+
+        safe = request.method in SAFE_METHODS
+        token = _use_replica.set(choose_replica() if safe and not is_pinned(request) else None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+        if not safe and response.status_code < 400:
+            pin_to_primary(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not get_replica_aliases():
+            return await self.get_response(request)
+
+        safe = request.method in SAFE_METHODS
+        token = _use_replica.set(choose_replica() if safe and not await ais_pinned(request) else None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+        if not safe and response.status_code < 400:
+            await apin_to_primary(request, response)
+        return response
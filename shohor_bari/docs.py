@@ -0,0 +1,95 @@
+from functools import cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect
+from django.template.loader import render_to_string
+from drf_yasg import openapi
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.renderers import ReDocRenderer, SwaggerUIRenderer
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+
+# Prebuilt schema written by `manage.py generate_openapi_schema`, relative
+# to the static files root.
+SCHEMA_STATIC_PATH = "api/openapi.json"
+
+API_INFO = openapi.Info(
+   title="Shohor Bari API",
+   default_version='v1',
+   description="API documentation for Shohor Bari project",
+   terms_of_service="https://www.google.com/policies/terms/",
+   contact=openapi.Contact(email="contact@snippets.local"),
+   license=openapi.License(name="BSD License"),
+)
+
+schema_view = get_schema_view(
+   API_INFO,
+   public=True,
+   permission_classes=(permissions.AllowAny,),
+)
+
+
+def generate_schema(request=None):
+    """
+    Build the public OpenAPI schema. Without a request the schema has no
+    host, so clients use the one they loaded it from.
+    """
+    return OpenAPISchemaGenerator(info=API_INFO).get_schema(request=request, public=True)
+
+
+class StaticSwaggerUIRenderer(SwaggerUIRenderer):
+    """
+    Swagger UI loading the prebuilt schema from static files.
+    """
+
+    def get_swagger_ui_settings(self):
+        data = super().get_swagger_ui_settings()
+        data['url'] = staticfiles_storage.url(SCHEMA_STATIC_PATH)
+        return data
+
+
+class StaticReDocRenderer(ReDocRenderer):
+    """
+    ReDoc loading the prebuilt schema from static files.
+    """
+
+    def get_redoc_settings(self):
+        data = super().get_redoc_settings()
+        data['url'] = staticfiles_storage.url(SCHEMA_STATIC_PATH)
+        return data
+
+
+STATIC_RENDERERS = {
+    'swagger': StaticSwaggerUIRenderer,
+    'redoc': StaticReDocRenderer,
+}
+
+
+@cache
+def live_schema_ui(renderer):
+    return schema_view.with_ui(renderer, cache_timeout=0)
+
+
+def schema_ui(request, renderer, *args, **kwargs):
+    """
+    Serve the docs page. In DEBUG the schema is generated on every request;
+    otherwise the page points at the prebuilt static schema, which
+    WhiteNoise serves under a hashed name with far-future cache headers.
+    """
+    if settings.DEBUG:
+        return live_schema_ui(renderer)(request, *args, **kwargs)
+
+    if not staticfiles_storage.exists(SCHEMA_STATIC_PATH):
+        raise Http404("The API schema has not been generated.")
+    if request.GET.get('format') == 'openapi':
+        return redirect(staticfiles_storage.url(SCHEMA_STATIC_PATH))
+
+    ui_renderer = STATIC_RENDERERS[renderer]()
+    context = {'request': request}
+    ui_renderer.set_context(context)
+    context['title'] = API_INFO.title
+    context['version'] = API_INFO._default_version
+    return HttpResponse(render_to_string(ui_renderer.template, context, request))
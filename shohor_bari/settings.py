@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from decouple import config
 from pathlib import Path
 from datetime import timedelta
+import tempfile
 import cloudinary
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,27 +45,34 @@ INSTALLED_APPS = [
     'django_filters',   
     'rest_framework',
     'djoser',
-    'debug_toolbar',
 
     # local apps
     "api",
     "users",
     "rent",
     "admin_app",
+    "notifications",
 ]
 
 MIDDLEWARE = [
-    "debug_toolbar.middleware.DebugToolbarMiddleware", # Debug Toolbar Middleware
     'django.middleware.security.SecurityMiddleware',
-    "whitenoise.middleware.WhiteNoiseMiddleware", # WhiteNoise Middleware
+    "shohor_bari.middleware.WhiteNoiseMiddleware", # WhiteNoise Middleware, async-capable
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'shohor_bari.db_routers.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Debug Toolbar, only installed when enabled (off unless DEBUG) so
+# production never imports it.
+ENABLE_DEBUG_TOOLBAR = config('ENABLE_DEBUG_TOOLBAR', default=DEBUG, cast=bool)
+if ENABLE_DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.insert(0, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = 'shohor_bari.urls'
 
 TEMPLATES = [
@@ -104,9 +112,49 @@ DATABASES = {
         "PASSWORD": config("POSTGRES_PASSWORD", default=""),
         "HOST": config("POSTGRES_HOST", default="localhost"),
         "PORT": config("POSTGRES_PORT", default=5432),
+        # Drop reused connections that the server or pooler closed meanwhile.
+        "CONN_HEALTH_CHECKS": config("CONN_HEALTH_CHECKS", default=True, cast=bool),
     }
 }
 
+# Connection reuse. With DATABASE_POOL each process keeps a psycopg
+# connection pool (Django requires CONN_MAX_AGE=0 then); otherwise a
+# connection is kept for CONN_MAX_AGE seconds across requests.
+DATABASE_POOL = config("DATABASE_POOL", default=False, cast=bool)
+if DATABASE_POOL:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": config("DATABASE_POOL_MIN_SIZE", default=1, cast=int),
+            "max_size": config("DATABASE_POOL_MAX_SIZE", default=4, cast=int),
+            # Seconds to wait for a free connection before failing.
+            "timeout": config("DATABASE_POOL_TIMEOUT", default=10, cast=float),
+            # Seconds an idle connection above min_size is kept open.
+            "max_idle": config("DATABASE_POOL_MAX_IDLE", default=300, cast=float),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = config("CONN_MAX_AGE", default=60, cast=int)
+
+# Read replicas (comma-separated hosts, same credentials as the primary).
+# Safe-method requests in DATABASE_REPLICA_APPS read from them; a client
+# that writes is pinned to the primary for DATABASE_PIN_SECONDS.
+DATABASE_REPLICA_HOSTS = [
+    host.strip() for host in config("POSTGRES_REPLICA_HOSTS", default="").split(',') if host.strip()
+]
+for index, host in enumerate(DATABASE_REPLICA_HOSTS, start=1):
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["shohor_bari.db_routers.ReplicaRouter"]
+DATABASE_REPLICA_APPS = ["rent", "users"]
+DATABASE_PIN_SECONDS = config("DATABASE_PIN_SECONDS", default=10, cast=int)
+DATABASE_PIN_COOKIE_NAME = "db_pin"
+# Seconds an unreachable replica is skipped before it is tried again.
+DATABASE_REPLICA_RETRY_AFTER = config("DATABASE_REPLICA_RETRY_AFTER", default=30, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -138,13 +186,94 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Cache
+# Redis in production (set REDIS_URL), local memory otherwise.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'shohor-bari',
+        }
+    }
+
+# Cached API responses and generation ETags need a cache shared by every
+# worker: with local memory an invalidation only reaches one process. They
+# are on with REDIS_URL (or in DEBUG) and off otherwise.
+RENT_RESPONSE_CACHE = config('RENT_RESPONSE_CACHE', default=bool(REDIS_URL) or DEBUG, cast=bool)
+# Seconds a cached public API response is kept.
+RENT_CACHE_TIMEOUT = config('RENT_CACHE_TIMEOUT', default=300, cast=int)
+# Count cache hits and misses for the dashboard (one more cache write per request).
+RENT_CACHE_STATS = config('RENT_CACHE_STATS', default=False, cast=bool)
+
+# Async versions of the read endpoints under /api/v1/async/, for ASGI
+# deployments. Off until they have been measured against the production
+# database; the sync endpoints serve the same data.
+RENT_ASYNC_VIEWS = config('RENT_ASYNC_VIEWS', default=False, cast=bool)
+
 # Email settings
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Mail is sent over SMTP during the request. Where `manage.py send_queued_email`
+# runs on a schedule, set EMAIL_BACKEND=users.mail.QueuedEmailBackend to queue
+# it in the database instead; the command delivers it through
+# EMAIL_DELIVERY_BACKEND, so requests never wait on the SMTP server.
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_DELIVERY_BACKEND = config(
+    'EMAIL_DELIVERY_BACKEND', default='django.core.mail.backends.smtp.EmailBackend'
+)
 EMAIL_HOST = config('EMAIL_HOST', default='')
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True)
 EMAIL_PORT = config('EMAIL_PORT', default=587)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
+
+# Queued email delivery: messages per batch, attempts before a message is
+# moved to the dead letters, and the first retry delay in seconds (doubled
+# on every further attempt). A sender claims its batch for
+# EMAIL_QUEUE_CLAIM_TIMEOUT seconds; if it dies, the messages are sent again
+# after that.
+EMAIL_QUEUE_BATCH_SIZE = config('EMAIL_QUEUE_BATCH_SIZE', default=50, cast=int)
+EMAIL_QUEUE_MAX_ATTEMPTS = config('EMAIL_QUEUE_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_QUEUE_RETRY_DELAY = config('EMAIL_QUEUE_RETRY_DELAY', default=60, cast=int)
+EMAIL_QUEUE_CLAIM_TIMEOUT = config('EMAIL_QUEUE_CLAIM_TIMEOUT', default=600, cast=int)
+
+# Rent request notifications. Events are dispatched once the request that
+# wrote them commits, which works without a worker (e.g. on Vercel). Where
+# `manage.py dispatch_notifications --loop` runs as a worker, set
+# NOTIFICATION_DISPATCH_INLINE=False to keep that work out of requests.
+# Events are fanned out in batches; a failing event is retried up to
+# NOTIFICATION_MAX_ATTEMPTS times, and dispatched events are kept for
+# NOTIFICATION_EVENT_RETENTION_DAYS. NOTIFICATION_EMAIL also emails each
+# notification; it defaults to on only when dispatch runs in the worker, so
+# inline dispatch writes the in-app inbox without an SMTP round trip in the
+# request. To email inline anyway, set it with the queued EMAIL_BACKEND above.
+NOTIFICATION_DISPATCH_INLINE = config('NOTIFICATION_DISPATCH_INLINE', default=True, cast=bool)
+NOTIFICATION_BATCH_SIZE = config('NOTIFICATION_BATCH_SIZE', default=200, cast=int)
+NOTIFICATION_MAX_ATTEMPTS = config('NOTIFICATION_MAX_ATTEMPTS', default=5, cast=int)
+NOTIFICATION_EVENT_RETENTION_DAYS = config('NOTIFICATION_EVENT_RETENTION_DAYS', default=30, cast=int)
+NOTIFICATION_EMAIL = config('NOTIFICATION_EMAIL', default=not NOTIFICATION_DISPATCH_INLINE, cast=bool)
+
+# Server-Sent Events under /api/v1/stream/ (ASGI only). The in-process
+# broker only reaches clients connected to the publishing process; set
+# EVENT_STREAM_BROKER=notifications.broker.RedisBroker when running several
+# workers. Streams send a heartbeat comment every EVENT_STREAM_HEARTBEAT
+# seconds and close after EVENT_STREAM_MAX_SECONDS (clients reconnect after
+# EVENT_STREAM_RETRY_MS); a client more than EVENT_STREAM_QUEUE_SIZE
+# messages behind is disconnected. Stream tokens for `?token=` are valid for
+# EVENT_STREAM_TOKEN_LIFETIME seconds.
+EVENT_STREAM_BROKER = config('EVENT_STREAM_BROKER', default='notifications.broker.InMemoryBroker')
+EVENT_STREAM_HEARTBEAT = config('EVENT_STREAM_HEARTBEAT', default=15, cast=int)
+EVENT_STREAM_MAX_SECONDS = config('EVENT_STREAM_MAX_SECONDS', default=600, cast=int)
+EVENT_STREAM_RETRY_MS = config('EVENT_STREAM_RETRY_MS', default=3000, cast=int)
+EVENT_STREAM_QUEUE_SIZE = config('EVENT_STREAM_QUEUE_SIZE', default=100, cast=int)
+EVENT_STREAM_TOKEN_LIFETIME = config('EVENT_STREAM_TOKEN_LIFETIME', default=60, cast=int)
 
 
 # Static files (CSS, JavaScript, Images)
@@ -157,7 +286,16 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Static files
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# Django 5.1+ only reads STORAGES. Hashed names let WhiteNoise serve static
+# files (including the prebuilt API schema) with far-future cache headers.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
 
 # Media (Cloudinary Storage)
 DEFAULT_FILE_STORAGE = "whitenoise.storage.CompressedStaticFilesStorage"
@@ -172,6 +310,34 @@ cloudinary.config(
 )
 
 
+# Advertisement image uploads
+# Files are staged locally and pushed to RENT_IMAGE_STORAGE once the request
+# commits, inline by default. Serverless deploys freeze after the response, so
+# only set RENT_UPLOAD_WORKERS above 0 on long-lived servers. Inline, the 202
+# response waits for the upload and its retries: a failing upload sleeps
+# RENT_UPLOAD_RETRY_BACKOFF * (1 + 2 + ...) seconds between attempts, about
+# 3 s with the defaults, before the image is marked failed. A batch upload is
+# processed one file after another, so its response waits for every file.
+RENT_IMAGE_STORAGE = config('RENT_IMAGE_STORAGE', default='rent.storage.CloudinaryImageStorage')
+RENT_UPLOAD_STAGING_DIR = config(
+    'RENT_UPLOAD_STAGING_DIR',
+    default=str(Path(tempfile.gettempdir()) / 'shohor-bari-uploads')
+)
+RENT_UPLOAD_WORKERS = config('RENT_UPLOAD_WORKERS', default=0, cast=int)
+RENT_UPLOAD_MAX_ATTEMPTS = config('RENT_UPLOAD_MAX_ATTEMPTS', default=3, cast=int)
+RENT_UPLOAD_RETRY_BACKOFF = config('RENT_UPLOAD_RETRY_BACKOFF', default=1.0, cast=float)
+
+# Derivatives built for every uploaded image, in each supported format.
+# Cropped variants are filled to the exact size; the others fit inside it.
+RENT_IMAGE_VARIANTS = {
+    'thumb': {'size': (320, 240), 'crop': True},
+    'medium': {'size': (1280, 960), 'crop': False},
+}
+RENT_IMAGE_VARIANT_FORMATS = ['webp', 'avif']
+# Worker processes for encoding; 0 encodes in the uploading thread.
+RENT_IMAGE_VARIANT_PROCESSES = config('RENT_IMAGE_VARIANT_PROCESSES', default=0, cast=int)
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -184,7 +350,7 @@ AUTH_USER_MODEL = "users.CustomUser"
 REST_FRAMEWORK = {
     'COERCE_DECIMAL_TO_STRING': False,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     # 'DEFAULT_PERMISSION_CLASSES': [
     #     'rest_framework.permissions.IsAuthenticated',
@@ -204,6 +370,10 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("JWT",),
 }
 
+# Seconds the id, role and flags of a JWT-authenticated user are cached
+# (0 loads the user from the database on every request).
+JWT_USER_CACHE_TIMEOUT = config('JWT_USER_CACHE_TIMEOUT', default=60, cast=int)
+
 # Djoser settings
 DJOSER = {
     'PASSWORD_RESET_CONFIRM_URL': 'password/reset/confirm/{uid}/{token}',
@@ -216,6 +386,10 @@ DJOSER = {
     }
 }
 
+# Full-text search backend for advertisements.
+# Leave empty to pick PostgreSQL or SQLite FTS5 from the database vendor.
+RENT_SEARCH_BACKEND = config('RENT_SEARCH_BACKEND', default='')
+
 # Swagger settings
 SWAGGER_SETTINGS = {
    'SECURITY_DEFINITIONS': {
@@ -0,0 +1,86 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from rent.models import RentAdvertisement
+from shohor_bari import db_routers
+from shohor_bari.db_routers import ReplicaRouter, ReplicaRoutingMiddleware
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    `ReplicaRoutingMiddleware` and `ReplicaRouter` with two SQLite replicas.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.add_replicas(
+            replica_1=str(Path(directory.name) / "replica_1.sqlite3"),
+            replica_2=str(Path(directory.name) / "replica_2.sqlite3"),
+        )
+        patcher = mock.patch.dict(db_routers._unavailable_until, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_replicas(self, **names):
+        databases = {DEFAULT_DB_ALIAS: dict(connections.settings[DEFAULT_DB_ALIAS])}
+        databases.update({alias: {"ENGINE": "django.db.backends.sqlite3", "NAME": name} for alias, name in names.items()})
+        configured = connections.configure_settings(databases)
+        for patcher in [
+            mock.patch.dict(connections.settings, {alias: configured[alias] for alias in names}),
+            # The aliases did not exist when the test class declared its databases.
+            mock.patch.object(type(self), "databases", type(self).databases | set(names)),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for alias in names:
+            self.addCleanup(self.drop_connection, alias)
+
+    def drop_connection(self, alias):
+        connections[alias].close()
+        del connections[alias]
+
+    def request(self, method="get", reads=3):
+        """
+        Run a request through the middleware; return the database of each read.
+        """
+        router = ReplicaRouter()
+
+        def view(request):
+            view.reads = [router.db_for_read(RentAdvertisement) for _ in range(reads)]
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(view)(getattr(RequestFactory(), method)("/"))
+        return view.reads
+
+    def test_reads_of_a_request_use_one_replica(self):
+        chosen = set()
+        for _ in range(30):
+            reads = self.request()
+            self.assertEqual(len(set(reads)), 1)
+            chosen.update(reads)
+        self.assertEqual(chosen, {"replica_1", "replica_2"})
+
+    def test_replica_is_chosen_without_shuffling_per_read(self):
+        with mock.patch("shohor_bari.db_routers.random.choice", return_value="replica_2") as choice:
+            self.assertEqual(self.request(reads=5), ["replica_2"] * 5)
+        choice.assert_called_once()
+
+    def test_unreachable_replica_falls_back_to_the_primary(self):
+        self.add_replicas(replica_1="/nonexistent/directory/replica_1.sqlite3")
+        with mock.patch("shohor_bari.db_routers.random.choice", return_value="replica_1"):
+            self.assertEqual(self.request(), [DEFAULT_DB_ALIAS] * 3)
+        # Marked down, so the next requests pick the other replica.
+        for _ in range(5):
+            self.assertEqual(self.request(), ["replica_2"] * 3)
+
+    def test_unsafe_requests_use_the_primary(self):
+        self.assertEqual(self.request(method="post"), [None] * 3)
+
+    def test_outside_a_request_uses_the_primary(self):
+        self.assertIsNone(ReplicaRouter().db_for_read(RentAdvertisement))
@@ -1,4 +1,3 @@
-
 from django.shortcuts import redirect
 
 
@@ -6,4 +5,16 @@ def api_root_view(request):
     """
     API root view that provides a list of available endpoints.
     """
-    return redirect('api-root')
\ No newline at end of file
+    return redirect('api-root')
+
+
+def schema_ui_view(renderer):
+    """
+    Return a view rendering the API docs with `renderer` ('swagger' or 'redoc').
+    The OpenAPI stack in shohor_bari.docs is imported on the first docs
+    request, so API requests never load it.
+    """
+    def view(request, *args, **kwargs):
+        from shohor_bari.docs import schema_ui
+        return schema_ui(request, renderer, *args, **kwargs)
+    return view
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from users.models import CustomUser
+from django.utils import timezone
+from users.mail import MESSAGE_FIELDS
+from users.models import CustomUser, DeadLetterEmail, QueuedEmail
 
 
 @admin.register(CustomUser)
@@ -32,6 +34,34 @@ class CustomUserAdmin(BaseUserAdmin):
     ordering = ('email',)
 
 
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    """Admin configuration for messages waiting to be sent."""
+    list_display = ('subject', 'to', 'attempts', 'next_attempt_at', 'created_at')
+    search_fields = ('subject',)
+    ordering = ('next_attempt_at',)
+    readonly_fields = ('last_error', 'created_at')
+
+
+@admin.register(DeadLetterEmail)
+class DeadLetterEmailAdmin(admin.ModelAdmin):
+    """Admin configuration for messages that could not be delivered."""
+    list_display = ('subject', 'to', 'attempts', 'last_error', 'failed_at')
+    search_fields = ('subject',)
+    ordering = ('-failed_at',)
+    actions = ('requeue',)
+
+    @admin.action(description='Queue selected messages for sending again')
+    def requeue(self, request, queryset):
+        fields = [field for field in MESSAGE_FIELDS if field not in ('attempts', 'last_error')]
+        QueuedEmail.objects.bulk_create([
+            QueuedEmail(**{field: getattr(email, field) for field in fields}, next_attempt_at=timezone.now())
+            for email in queryset
+        ])
+        count = queryset.delete()[0]
+        self.message_user(request, f'{count} messages queued again.')
+
+
 # Customize admin site branding
 admin.site.site_header = 'Shohor Bari Admin'
 admin.site.site_title = 'Shohor Bari Admin Portal'
@@ -0,0 +1,104 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+
+PRINCIPAL_CACHE_PREFIX = "users:principal"
+
+# Loaded eagerly on a cache hit; every other field is deferred and
+# fetched from the database only if a view reads it.
+PRINCIPAL_FIELDS = ["id", "role", "is_staff", "is_superuser", "is_active"]
+
+
+def _principal_key(user_id):
+    return f"{PRINCIPAL_CACHE_PREFIX}:{user_id}"
+
+
+def invalidate_principal(user_id):
+    """
+    Drop the cached principal once the current transaction commits, so a
+    concurrent request cannot cache the old values again.
+    """
+    transaction.on_commit(lambda: cache.delete(_principal_key(user_id)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    `JWTAuthentication` that caches the user's id, role and flags for
+    `JWT_USER_CACHE_TIMEOUT` seconds instead of loading the user on every
+    request.
+
+    On a hit `request.user` is a `CustomUser` with only those fields
+    loaded. Saving or deleting a user drops the cached entry (see
+    `users.signals`); bulk updates are picked up when the entry expires.
+    """
+
+    def get_user(self, validated_token):
+        key = self.get_principal_key(validated_token)
+        if key is None:
+            return super().get_user(validated_token)
+        values = cache.get(key)
+        if values is not None:
+            return self.build_principal(values)
+
+        # Not found and inactive users raise here and are not cached.
+        user = super().get_user(validated_token)
+        cache.set(key, self.get_principal_values(user), timeout=settings.JWT_USER_CACHE_TIMEOUT)
+        return user
+
+    async def aauthenticate(self, request):
+        """
+        Async version of `authenticate` for the async views.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        key = self.get_principal_key(validated_token)
+        if key is None:
+            return await sync_to_async(super().get_user)(validated_token)
+        values = await cache.aget(key)
+        if values is not None:
+            return self.build_principal(values)
+
+        user = await sync_to_async(super().get_user)(validated_token)
+        await cache.aset(key, self.get_principal_values(user), timeout=settings.JWT_USER_CACHE_TIMEOUT)
+        return user
+
+    def get_principal_key(self, validated_token):
+        """
+        Return the cache key of the token's user, or None when the
+        principal must not be cached.
+        """
+        if (
+            not settings.JWT_USER_CACHE_TIMEOUT
+            or api_settings.USER_ID_FIELD != "id"
+            # Revocation checks need the password hash, which is not cached.
+            or api_settings.CHECK_REVOKE_TOKEN
+            or api_settings.USER_ID_CLAIM not in validated_token
+        ):
+            return None
+        return _principal_key(validated_token[api_settings.USER_ID_CLAIM])
+
+    def get_principal_values(self, user):
+        return {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+
+    def build_principal(self, values):
+        # from_db() expects the values in model field order.
+        names = [f.attname for f in self.user_model._meta.concrete_fields if f.attname in values]
+        user = self.user_model.from_db(None, names, [values[name] for name in names])
+        user._load_deferred_together = True
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
@@ -0,0 +1,203 @@
+import base64
+import logging
+import smtplib
+from datetime import timedelta
+from email.mime.base import MIMEBase
+from email.utils import formatdate
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from users.models import DeadLetterEmail, QueuedEmail
+
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_FIELDS = [
+    "subject", "body", "from_email", "to", "cc", "bcc", "reply_to",
+    "headers", "alternatives", "attachments", "attempts", "last_error", "created_at",
+]
+
+
+def serialize_message(message):
+    """
+    Return the `QueuedEmail` fields for an `EmailMessage`.
+    """
+    attachments = []
+    for attachment in message.attachments:
+        if isinstance(attachment, MIMEBase):
+            filename, content, mimetype = (
+                attachment.get_filename(), attachment.get_payload(decode=True), attachment.get_content_type()
+            )
+        else:
+            filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append([filename, base64.b64encode(content).decode("ascii"), mimetype])
+
+    return {
+        "subject": str(message.subject),
+        "body": str(message.body),
+        "from_email": message.from_email or settings.DEFAULT_FROM_EMAIL,
+        "to": list(message.to),
+        "cc": list(message.cc),
+        "bcc": list(message.bcc),
+        "reply_to": list(message.reply_to),
+        # Date the message when it was queued, not when it is finally sent.
+        "headers": {"Date": formatdate(localtime=settings.EMAIL_USE_LOCALTIME), **message.extra_headers},
+        "alternatives": [[str(content), mimetype] for content, mimetype in getattr(message, "alternatives", [])],
+        "attachments": attachments,
+    }
+
+
+def build_message(email, connection=None):
+    """
+    Rebuild the message stored in a `QueuedEmail` or `DeadLetterEmail`.
+    """
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        cc=email.cc,
+        bcc=email.bcc,
+        reply_to=email.reply_to,
+        headers=email.headers,
+        alternatives=[tuple(alternative) for alternative in email.alternatives],
+        connection=connection,
+    )
+    for filename, content, mimetype in email.attachments:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """
+    Email backend that stores messages in the `QueuedEmail` table instead
+    of talking to a mail server, so sending an email costs one INSERT.
+
+    Messages sent inside a transaction are only queued if it commits.
+    `manage.py send_queued_email` delivers them through
+    `EMAIL_DELIVERY_BACKEND`.
+    """
+
+    def send_messages(self, email_messages):
+        queued = [
+            QueuedEmail(**serialize_message(message))
+            for message in email_messages
+            if message.recipients()
+        ]
+        try:
+            QueuedEmail.objects.bulk_create(queued)
+        except DatabaseError:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(queued)
+
+
+def is_permanent_failure(exc):
+    """
+    Whether retrying cannot help: the server rejected the message, the
+    sender or every recipient with a 5xx reply.
+    """
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+
+def is_connection_failure(exc):
+    # smtplib errors are OSErrors too; only socket errors and disconnects
+    # leave the connection unusable.
+    return isinstance(exc, smtplib.SMTPServerDisconnected) or (
+        isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+    )
+
+
+def move_to_dead_letter(email):
+    with transaction.atomic():
+        DeadLetterEmail.objects.create(**{field: getattr(email, field) for field in MESSAGE_FIELDS})
+        email.delete()
+
+
+def record_failure(email, exc):
+    email.attempts += 1
+    email.last_error = f"{type(exc).__name__}: {exc}"
+    if email.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS or is_permanent_failure(exc):
+        logger.warning("Giving up on queued email %s after %d attempts: %s", email.pk, email.attempts, exc)
+        move_to_dead_letter(email)
+        return
+    delay = settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (email.attempts - 1)
+    email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    email.save(update_fields=["attempts", "last_error", "next_attempt_at"])
+
+
+def claim_queued_email(batch_size):
+    """
+    Claim up to `batch_size` due messages and return them.
+
+    The rows are locked with SKIP LOCKED only long enough to push their
+    `next_attempt_at` back by `EMAIL_QUEUE_CLAIM_TIMEOUT`, which hides them
+    from other senders. The returned objects keep the original time, so
+    unsent ones can be released with `release_queued_email`.
+    """
+    with transaction.atomic():
+        batch = list(
+            QueuedEmail.objects.select_for_update(skip_locked=True)
+            .filter(next_attempt_at__lte=timezone.now())
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        QueuedEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            next_attempt_at=timezone.now() + timedelta(seconds=settings.EMAIL_QUEUE_CLAIM_TIMEOUT)
+        )
+    return batch
+
+
+def release_queued_email(emails):
+    """
+    Give claimed messages back to the queue, due when they were claimed.
+    """
+    QueuedEmail.objects.bulk_update(emails, ["next_attempt_at"])
+
+
+def send_queued_email(connection, batch_size):
+    """
+    Send up to `batch_size` due messages over `connection`, a delivery
+    backend whose connection is kept open across the batch.
+
+    Delivered messages are deleted. Failed ones are retried with
+    exponential backoff, and moved to `DeadLetterEmail` after
+    `EMAIL_QUEUE_MAX_ATTEMPTS` tries or a permanent rejection. The batch is
+    claimed in a short transaction and sent outside it, so no lock is held
+    while talking to the mail server and several senders can run at once;
+    a sender that dies mid-batch leaves its messages to be sent again after
+    `EMAIL_QUEUE_CLAIM_TIMEOUT`.
+
+    Returns the number of messages sent and failed. If the server cannot
+    be reached, the remaining messages are released and the error is
+    raised without using up their attempts.
+    """
+    sent = failed = 0
+    batch = claim_queued_email(batch_size)
+    for index, email in enumerate(batch):
+        try:
+            # A no-op while connected.
+            connection.open()
+        except OSError:
+            release_queued_email(batch[index:])
+            raise
+        try:
+            connection.send_messages([build_message(email)])
+        except Exception as exc:
+            failed += 1
+            record_failure(email, exc)
+            if is_connection_failure(exc):
+                # Reconnect for the next message.
+                connection.close()
+            continue
+        sent += 1
+        email.delete()
+    return sent, failed
@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from users.mail import send_queued_email
+from users.models import DeadLetterEmail, QueuedEmail
+
+
+class Command(BaseCommand):
+    """
+    Deliver messages queued by `users.mail.QueuedEmailBackend` through
+    `EMAIL_DELIVERY_BACKEND`, reusing one SMTP connection for as long as
+    there is mail to send.
+    """
+    help = "Send queued email (activation, password reset, ...)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.EMAIL_QUEUE_BATCH_SIZE,
+            help="Messages claimed and sent per batch."
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep running, polling the queue every --interval seconds when it is empty."
+        )
+        parser.add_argument("--interval", type=float, default=5, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, **options):
+        connection = get_connection(settings.EMAIL_DELIVERY_BACKEND, fail_silently=False)
+        total_sent = total_failed = 0
+        try:
+            while True:
+                try:
+                    sent, failed = send_queued_email(connection, options["batch_size"])
+                except OSError as exc:
+                    if not options["loop"]:
+                        raise
+                    self.stderr.write(f"Mail server unreachable: {exc}")
+                    sent = failed = 0
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    continue
+                # Queue drained: don't hold an idle connection the server would drop.
+                connection.close()
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {total_sent} messages, {total_failed} failed attempts. "
+            f"{QueuedEmail.objects.count()} queued, {DeadLetterEmail.objects.count()} dead letters."
+        ))
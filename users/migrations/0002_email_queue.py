@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeadLetterEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+                ('from_email', models.CharField(max_length=254)),
+                ('to', models.JSONField(default=list, help_text='Recipient addresses.')),
+                ('cc', models.JSONField(blank=True, default=list)),
+                ('bcc', models.JSONField(blank=True, default=list)),
+                ('reply_to', models.JSONField(blank=True, default=list)),
+                ('headers', models.JSONField(blank=True, default=dict, help_text='Extra message headers.')),
+                ('alternatives', models.JSONField(blank=True, default=list, help_text='[content, mimetype] pairs, e.g. the HTML version of the body.')),
+                ('attachments', models.JSONField(blank=True, default=list, help_text='[filename, base64 content, mimetype] triples.')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, help_text='Delivery attempts so far.')),
+                ('last_error', models.TextField(blank=True, help_text='Error of the last failed attempt.')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the message was queued.')),
+                ('failed_at', models.DateTimeField(auto_now_add=True, help_text='When delivery was given up.')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='QueuedEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+                ('from_email', models.CharField(max_length=254)),
+                ('to', models.JSONField(default=list, help_text='Recipient addresses.')),
+                ('cc', models.JSONField(blank=True, default=list)),
+                ('bcc', models.JSONField(blank=True, default=list)),
+                ('reply_to', models.JSONField(blank=True, default=list)),
+                ('headers', models.JSONField(blank=True, default=dict, help_text='Extra message headers.')),
+                ('alternatives', models.JSONField(blank=True, default=list, help_text='[content, mimetype] pairs, e.g. the HTML version of the body.')),
+                ('attachments', models.JSONField(blank=True, default=list, help_text='[filename, base64 content, mimetype] triples.')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, help_text='Delivery attempts so far.')),
+                ('last_error', models.TextField(blank=True, help_text='Error of the last failed attempt.')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the message was queued.')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='The message is not sent before this time (retry backoff).')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['next_attempt_at'], name='users_queued_email_due_idx')],
+            },
+        ),
+    ]
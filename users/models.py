@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.utils import timezone
 from django.core.validators import validate_email, FileExtensionValidator
 from django.core.exceptions import ValidationError
 from cloudinary.models import CloudinaryField
@@ -129,4 +130,71 @@ class CustomUser(AbstractUser):
         """Return the email as the string representation of the user."""
         return self.email
 
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        """
+        Load every deferred field at once for users authenticated from the
+        principal cache (see `users.authentication`), rather than one query
+        per field read.
+        """
+        if fields is not None and getattr(self, "_load_deferred_together", False):
+            fields = self.get_deferred_fields() | set(fields)
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+
+# =========================
+# Outgoing Email Queue
+# =========================
+class StoredEmail(models.Model):
+    """
+    Base for outgoing messages kept in the database.
+    Stores everything needed to rebuild the `EmailMultiAlternatives` that was queued.
+    """
+    subject = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list, help_text="Recipient addresses.")
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    reply_to = models.JSONField(default=list, blank=True)
+    headers = models.JSONField(default=dict, blank=True, help_text="Extra message headers.")
+    alternatives = models.JSONField(
+        default=list, blank=True,
+        help_text="[content, mimetype] pairs, e.g. the HTML version of the body."
+    )
+    attachments = models.JSONField(
+        default=list, blank=True,
+        help_text="[filename, base64 content, mimetype] triples."
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Delivery attempts so far.")
+    last_error = models.TextField(blank=True, help_text="Error of the last failed attempt.")
+    created_at = models.DateTimeField(default=timezone.now, help_text="When the message was queued.")
+
+    class Meta:
+        abstract = True
 
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.to)}'
+
+
+class QueuedEmail(StoredEmail):
+    """
+    Message waiting to be sent by `manage.py send_queued_email`.
+    Written by `users.mail.QueuedEmailBackend` and deleted once delivered.
+    """
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="The message is not sent before this time (retry backoff)."
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["next_attempt_at"], name="users_queued_email_due_idx"),
+        ]
+
+
+class DeadLetterEmail(StoredEmail):
+    """
+    Message that could not be delivered after `EMAIL_QUEUE_MAX_ATTEMPTS` tries.
+    Requeue it from the admin once the cause is fixed.
+    """
+    failed_at = models.DateTimeField(auto_now_add=True, help_text="When delivery was given up.")
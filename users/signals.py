@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.authentication import invalidate_principal
+from users.models import CustomUser
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidate_cached_principal(sender, instance, **kwargs):
+    """
+    Make the next authenticated request see a changed role, staff flag or
+    deactivation.
+    """
+    invalidate_principal(instance.pk)
@@ -1,3 +1,259 @@
-from django.test import TestCase
+import socketserver
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import _principal_key
+from users.mail import send_queued_email
+from users.models import DeadLetterEmail, QueuedEmail
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Just enough SMTP for `smtplib`: rejects the addresses in
+    `server.rejected` for good and those in `server.deferred` for now, and
+    drops the connection after `server.drop_after` messages.
+    """
+
+    def handle(self):
+        self.server.connections += 1
+        delivered = 0
+        self.reply("220 fake ESMTP")
+        recipients = []
+        for line in self.rfile:
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].split(":", 1)[0].upper()
+            if verb in ("EHLO", "HELO", "NOOP", "RSET"):
+                self.reply("250 ok")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 ok")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip("<> ")
+                if address in self.server.rejected:
+                    self.reply("550 no such user")
+                elif address in self.server.deferred:
+                    self.reply("451 try again later")
+                else:
+                    recipients.append(address)
+                    self.reply("250 ok")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                for data_line in self.rfile:
+                    if data_line == b".\r\n":
+                        break
+                self.server.messages.append(recipients)
+                delivered += 1
+                self.reply("250 queued")
+                if delivered == self.server.drop_after:
+                    return
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 not implemented")
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeSMTPHandler)
+        self.connections = 0
+        self.messages = []
+        self.rejected = set()
+        self.deferred = set()
+        self.drop_after = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class FakeSMTPMixin:
+    def setUp(self):
+        super().setUp()
+        self.smtp = FakeSMTPServer()
+        threading.Thread(target=self.smtp.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+        settings = override_settings(
+            EMAIL_HOST="127.0.0.1", EMAIL_PORT=self.smtp.port, EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="",
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def queue(self, *recipients):
+        with override_settings(EMAIL_BACKEND="users.mail.QueuedEmailBackend"):
+            for recipient in recipients:
+                mail.send_mail("Activate your account", "Hello", "noreply@example.com", [recipient])
+
+    def send(self, batch_size=50):
+        connection = get_connection("django.core.mail.backends.smtp.EmailBackend", fail_silently=False)
+        try:
+            return send_queued_email(connection, batch_size)
+        finally:
+            connection.close()
+
+
+class QueuedEmailTests(FakeSMTPMixin, TestCase):
+    """
+    `QueuedEmailBackend` and `send_queued_email` against a fake SMTP server.
+    """
+
+    def test_queuing_does_not_connect(self):
+        self.queue("a@example.com")
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+        self.assertEqual(self.smtp.connections, 0)
+
+    def test_backlog_is_sent_over_one_connection(self):
+        self.queue("a@example.com", "b@example.com", "c@example.com")
+        self.assertEqual(self.send(), (3, 0))
+        self.assertEqual(self.smtp.messages, [["a@example.com"], ["b@example.com"], ["c@example.com"]])
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    def test_dropped_connection_is_reopened(self):
+        self.smtp.drop_after = 1
+        self.queue("a@example.com", "b@example.com", "c@example.com")
+        sent, failed = self.send()
+        self.assertEqual(sent + failed, 3)
+        self.assertGreaterEqual(self.smtp.connections, 2)
+        # Whatever the drop interrupted is retried later, not lost.
+        self.assertEqual(QueuedEmail.objects.count(), failed)
+
+    def test_permanent_rejection_goes_to_dead_letters(self):
+        self.smtp.rejected.add("gone@example.com")
+        self.queue("gone@example.com", "a@example.com")
+        self.assertEqual(self.send(), (1, 1))
+        self.assertFalse(QueuedEmail.objects.exists())
+        self.assertEqual(DeadLetterEmail.objects.get().to, ["gone@example.com"])
+
+    def test_unreachable_server_keeps_attempts(self):
+        self.queue("a@example.com")
+        due = QueuedEmail.objects.get().next_attempt_at
+        self.smtp.shutdown()
+        self.smtp.server_close()
+        with self.assertRaises(OSError):
+            self.send()
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.attempts, 0)
+        self.assertEqual(email.next_attempt_at, due)
+
+    @override_settings(EMAIL_QUEUE_RETRY_DELAY=60)
+    def test_temporary_failure_is_retried_later(self):
+        self.smtp.deferred.add("a@example.com")
+        self.queue("a@example.com")
+        self.assertEqual(self.send(), (0, 1))
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+
+class QueuedEmailClaimTests(FakeSMTPMixin, TransactionTestCase):
+    """
+    Messages are claimed in a short transaction and sent outside it.
+    """
+
+    def test_messages_are_sent_outside_a_transaction(self):
+        self.queue("a@example.com", "b@example.com")
+        states = []
+
+        def send_messages(messages):
+            states.append((
+                transaction.get_connection().in_atomic_block,
+                QueuedEmail.objects.filter(next_attempt_at__lte=timezone.now()).count(),
+            ))
+            return len(messages)
+
+        connection = get_connection("django.core.mail.backends.locmem.EmailBackend")
+        connection.send_messages = send_messages
+        self.assertEqual(send_queued_email(connection, 50), (2, 0))
+        # Not in a transaction, and the claimed messages are not due for other senders.
+        self.assertEqual(states, [(False, 0), (False, 0)])
+
+    def test_unreachable_server_releases_the_claim(self):
+        self.queue("a@example.com")
+        self.smtp.shutdown()
+        self.smtp.server_close()
+        with self.assertRaises(OSError):
+            self.send()
+        self.assertTrue(QueuedEmail.objects.filter(next_attempt_at__lte=timezone.now()).exists())
+
+
+@override_settings(JWT_USER_CACHE_TIMEOUT=60, RENT_RESPONSE_CACHE=False)
+class CachedJWTAuthenticationTests(APITestCase):
+    """
+    The JWT principal is cached between requests and dropped when the user changes.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("owner@example.com", "pw12345!")
+        self.client.credentials(HTTP_AUTHORIZATION=f"JWT {AccessToken.for_user(self.user)}")
+        self.url = reverse("categories-list")
+
+    def assertRequestQueries(self, user_queries, status=200):
+        # The category list costs two queries (validators and rows) once authenticated.
+        num = user_queries + (2 if status == 200 else 0)
+        with self.assertNumQueries(num):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def test_second_request_skips_the_user_query(self):
+        self.assertRequestQueries(1)
+        self.assertRequestQueries(0)
+
+    def test_cached_principal_has_the_role_and_flags(self):
+        self.assertRequestQueries(1)
+        self.assertEqual(cache.get(_principal_key(self.user.pk)), {
+            "id": self.user.pk, "role": self.user.role,
+            "is_staff": False, "is_superuser": False, "is_active": True,
+        })
+
+    def test_save_drops_the_entry(self):
+        self.assertRequestQueries(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = True
+            self.user.save()
+        self.assertIsNone(cache.get(_principal_key(self.user.pk)))
+        self.assertRequestQueries(1)
+        self.assertTrue(cache.get(_principal_key(self.user.pk))["is_staff"])
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertRequestQueries(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertRequestQueries(1, status=401)
+        # Inactive users are not cached.
+        self.assertIsNone(cache.get(_principal_key(self.user.pk)))
+
+    def test_inactive_cached_principal_is_rejected(self):
+        self.assertRequestQueries(1)
+        # E.g. deactivated by a bulk update, which sends no signal.
+        values = cache.get(_principal_key(self.user.pk))
+        cache.set(_principal_key(self.user.pk), {**values, "is_active": False})
+        self.assertRequestQueries(0, status=401)
+
+    def test_delete_drops_the_entry(self):
+        self.assertRequestQueries(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertRequestQueries(1, status=401)
@@ -1,5 +1,34 @@
 from django.core.exceptions import ValidationError
 
+# Largest accepted upload, shared with api.upload_handlers.
+MAX_UPLOAD_SIZE_MB = 50
+MAX_UPLOAD_SIZE = MAX_UPLOAD_SIZE_MB * 1024 * 1024
+
+# Leading bytes of the image formats accepted for upload.
+IMAGE_SIGNATURES = {
+    "jpeg": (b"\xff\xd8\xff",),
+    "png": (b"\x89PNG\r\n\x1a\n",),
+    "gif": (b"GIF87a", b"GIF89a"),
+}
+
+
+def sniff_image_format(header):
+    """
+    Return the image format named by the magic bytes at the start of a file,
+    or None when they match no accepted format.
+
+    Args:
+        header (bytes): At least the first 12 bytes of the file.
+    """
+    for image_format, signatures in IMAGE_SIGNATURES.items():
+        if header.startswith(signatures):
+            return image_format
+    # WebP is a RIFF container: "RIFF", a 4-byte size, then "WEBP".
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
 def validate_file_size(file):
     """
     Validates that the uploaded file does not exceed the maximum allowed size.
@@ -20,9 +49,6 @@ def validate_file_size(file):
         >>> validate_file_size(uploaded_file)
         # Raises ValidationError if file is larger than allowed
     """
-    max_size = 50  # Maximum size in MB
-    max_size_in_bytes = max_size * 1024 * 1024  # Convert MB to bytes
-
     # Compare file size with maximum limit
-    if file.size > max_size_in_bytes:
-        raise ValidationError(f"File size exceeds {max_size} MB limit.")
+    if file.size > MAX_UPLOAD_SIZE:
+        raise ValidationError(f"File size exceeds {MAX_UPLOAD_SIZE_MB} MB limit.")
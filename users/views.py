@@ -0,0 +1,10 @@
+from djoser.views import UserViewSet as BaseUserViewSet
+
+from api.upload_handlers import StreamingImageUploadMixin
+
+
+class UserViewSet(StreamingImageUploadMixin, BaseUserViewSet):
+    """
+    djoser's user endpoints, with profile image uploads checked by
+    `StreamingImageUploadHandler` while they stream in.
+    """